@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Inmoser Service Order Management',
-    'version': '17.0.1.0.0',
+    'version': '17.0.1.1.0',
     'category': 'Services/Field Service',
     'summary': 'Gestión integral de órdenes de servicio para Inmoser',
     'description': """
@@ -24,6 +24,7 @@
     'depends': [
         'base',
         'mail',
+        'bus',
         'portal',
         'website',
         'hr',
@@ -43,6 +44,7 @@
         'data/ir_sequence_data.xml',
         'data/service_type_data.xml',
         'data/email_templates.xml',
+        'data/ir_config_parameter_data.xml',
         'data/cron_jobs.xml',
         
         # Views
@@ -72,6 +74,7 @@
         ],
         'web.assets_frontend': [
             'inmoser_service_order/static/src/scss/portal.scss',
+            'inmoser_service_order/static/src/js/order_status.js',
         ],
     },
     'images': ['static/description/banner.png'],
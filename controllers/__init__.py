@@ -2,3 +2,5 @@
 
 from . import client_portal
 
+from . import qr_code
+from . import evidence_upload
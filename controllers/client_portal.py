@@ -3,12 +3,23 @@
 from odoo import http, fields, _
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal
-from odoo.exceptions import AccessError, MissingError
+from odoo.exceptions import AccessError, MissingError, UserError
+import gzip
+import hashlib
 import json
 import logging
+from werkzeug.urls import url_encode
+
+from ..models.service_order_portal import PORTAL_SORTINGS
 
 _logger = logging.getLogger(__name__)
 
+# Imágenes de la orden que el cliente puede descargar desde el portal
+PORTAL_PHOTO_FIELDS = [
+    'photo_before', 'photo_before_1024', 'photo_before_128',
+    'photo_after', 'photo_after_1024', 'photo_after_128',
+]
+
 class InmoserPortal(http.Controller):
     """
     Controlador del portal web de Inmoser para acceso público
@@ -18,28 +29,30 @@ class InmoserPortal(http.Controller):
     def equipment_portal(self, equipment_id, **kw):
         """Portal público para ver información del equipo"""
         try:
-            # Buscar equipo
+            # Buscar equipo; la versión cambia con el equipo, su cliente o sus órdenes
             equipment = request.env['inmoser.service.equipment'].sudo().browse(equipment_id)
+            version = equipment._get_portal_version()
             
-            if not equipment.exists():
+            if not version:
                 return request.render('inmoser_service_order.equipment_not_found')
             
-            # Obtener órdenes de servicio del equipo
-            service_orders = request.env['inmoser.service.order'].sudo().search([
-                ('equipment_id', '=', equipment_id)
-            ], order='create_date desc', limit=10)
-            
-            # Obtener orden actual (si existe)
-            current_order = service_orders.filtered(lambda o: o.state not in ['done', 'cancelled'])[:1]
+            # Escaneos repetidos: 304 sin renderizar si el navegador tiene esta versión
+            etag = '"%s"' % hashlib.sha1(('%s/%s/%s/%s' % (
+                version, request.env.lang, request.env.uid, fields.Date.context_today(equipment)
+            )).encode()).hexdigest()
+            headers = [
+                ('Cache-Control', 'private, no-cache'),
+                ('ETag', etag),
+            ]
+            if etag.strip('"') in request.httprequest.if_none_match:
+                return request.make_response(b'', headers=headers, status=304)
             
             values = {
-                'equipment': equipment,
-                'service_orders': service_orders,
-                'current_order': current_order,
+                'content': equipment._get_portal_content(version),
                 'page_name': 'equipment_portal',
             }
             
-            return request.render('inmoser_service_order.equipment_portal_template', values)
+            return request.render('inmoser_service_order.equipment_portal_template', values, headers=headers)
             
         except Exception as e:
             _logger.error(f"Error in equipment portal: {str(e)}")
@@ -196,6 +209,64 @@ class InmoserPortal(http.Controller):
             _logger.error(f"Error getting order status: {str(e)}")
             return {'error': str(e)}
     
+    @http.route(['/inmoser/api/order-status/<int:order_id>/poll'], type='http', auth="public", methods=['GET'])
+    def poll_order_status(self, order_id, token=None, **kw):
+        """
+        Consulta condicional del estado: 304 sin cargar la orden si no cambió
+        
+        Requiere el token de estado de la orden (el mismo que firma su canal del bus).
+        """
+        Order = request.env['inmoser.service.order'].sudo()
+        if not Order._check_status_token(order_id, token):
+            return request.not_found()
+        etag = Order._get_status_etag(order_id)
+        if not etag:
+            return request.not_found()
+        
+        headers = [
+            ('Cache-Control', 'no-cache'),
+            ('ETag', etag),
+        ]
+        if etag.strip('"') in request.httprequest.if_none_match:
+            return request.make_response(b'', headers=headers, status=304)
+        
+        order = Order.browse(order_id)
+        values = dict(order._get_status_values(), order_id=order.id, name=order.name)
+        return request.make_json_response(values, headers=headers)
+    
+    @http.route(['/inmoser/api/order-status/batch'], type='http', auth="user", methods=['POST'], csrf=False)
+    def batch_order_status(self, **kw):
+        """
+        API masiva de estados de órdenes
+        
+        Cuerpo JSON: {"ids": [...]} y/o {"updated_since": "..."}, con "cursor"
+        (el "next" de la respuesta anterior) y "limit" opcionales. La respuesta
+        se comprime con gzip si el cliente lo acepta.
+        """
+        try:
+            params = json.loads(request.httprequest.get_data() or b'{}')
+            result = request.env['inmoser.service.order']._get_status_batch(
+                order_ids=params.get('ids'),
+                updated_since=params.get('updated_since'),
+                cursor=params.get('cursor'),
+                limit=params.get('limit'),
+            )
+        except (ValueError, TypeError, UserError) as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+        except AccessError as e:
+            return request.make_json_response({'error': str(e)}, status=403)
+        
+        body = json.dumps(result, separators=(',', ':')).encode()
+        headers = [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('Cache-Control', 'no-store'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if len(body) > 1024 and 'gzip' in request.httprequest.accept_encodings:
+            body = gzip.compress(body, compresslevel=6)
+            headers.append(('Content-Encoding', 'gzip'))
+        return request.make_response(body, headers=headers)
+    
     @http.route(['/inmoser/api/technician-location/<int:order_id>'], type='json', auth="public")
     def get_technician_location(self, order_id, **kw):
         """API para obtener ubicación del técnico (si está disponible)"""
@@ -224,30 +295,23 @@ class InmoserPortalExtended(CustomerPortal):
     """
     
     def _prepare_home_portal_values(self, counters):
-        """Añadir contadores de Inmoser al portal"""
+        """Añadir contadores de Inmoser al portal (almacenados en el cliente, sin contar)"""
         values = super()._prepare_home_portal_values(counters)
+        partner = request.env.user.partner_id.sudo()
         
         if 'service_order_count' in counters:
-            partner = request.env.user.partner_id
-            service_order_count = request.env['inmoser.service.order'].search_count([
-                ('partner_id', '=', partner.id)
-            ])
-            values['service_order_count'] = service_order_count
+            values['service_order_count'] = partner.x_inmoser_service_order_count
         
         if 'equipment_count' in counters:
-            partner = request.env.user.partner_id
-            equipment_count = request.env['inmoser.service.equipment'].search_count([
-                ('partner_id', '=', partner.id)
-            ])
-            values['equipment_count'] = equipment_count
+            values['equipment_count'] = partner.x_inmoser_equipment_count
         
         return values
     
     @http.route(['/my/service-orders', '/my/service-orders/page/<int:page>'], 
                 type='http', auth="user", website=True)
     def portal_my_service_orders(self, page=1, date_begin=None, date_end=None, 
-                                sortby=None, filterby=None, **kw):
-        """Portal de órdenes de servicio del cliente"""
+                                sortby=None, filterby=None, after=None, before=None, **kw):
+        """Portal de órdenes de servicio del cliente, paginado por clave"""
         values = self._prepare_portal_layout_values()
         partner = request.env.user.partner_id
         
@@ -266,23 +330,32 @@ class InmoserPortalExtended(CustomerPortal):
             domain += [('state', '=', 'done')]
         
         # Ordenamiento
-        order = 'create_date desc'
-        if sortby == 'date':
-            order = 'scheduled_date desc'
-        elif sortby == 'name':
-            order = 'name'
+        if sortby not in PORTAL_SORTINGS:
+            sortby = 'date'
         
-        # Paginación
-        order_count = ServiceOrder.search_count(domain)
+        # Paginación: total cacheado; las páginas siguiente/anterior continúan desde la clave
+        url_args = {'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby, 'filterby': filterby}
+        order_count = ServiceOrder._portal_count(domain)
         pager = request.website.pager(
             url="/my/service-orders",
-            url_args={'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby, 'filterby': filterby},
+            url_args=url_args,
             total=order_count,
             page=page,
             step=self._items_per_page
         )
         
-        orders = ServiceOrder.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
+        try:
+            orders, first_cursor, last_cursor = ServiceOrder._portal_search_page(
+                domain, sortby, self._items_per_page,
+                after=after, before=before, offset=pager['offset']
+            )
+        except UserError:
+            return request.redirect('/my/service-orders')
+        
+        if last_cursor and pager['page_next']['num'] != pager['page']['num']:
+            pager['page_next']['url'] = self._cursor_url(pager['page_next']['url'], 'after', last_cursor)
+        if first_cursor and pager['page_previous']['num'] != pager['page']['num']:
+            pager['page_previous']['url'] = self._cursor_url(pager['page_previous']['url'], 'before', first_cursor)
         
         values.update({
             'orders': orders,
@@ -305,6 +378,10 @@ class InmoserPortalExtended(CustomerPortal):
         
         return request.render("inmoser_service_order.portal_my_service_orders", values)
     
+    def _cursor_url(self, url, name, cursor):
+        """Añadir el cursor de la página a la URL del paginador"""
+        return '%s%s%s' % (url, '&' if '?' in url else '?', url_encode({name: cursor}))
+    
     @http.route(['/my/service-orders/<int:order_id>'], type='http', auth="user", website=True)
     def portal_service_order_detail(self, order_id, **kw):
         """Detalle de orden de servicio en el portal"""
@@ -319,4 +396,20 @@ class InmoserPortalExtended(CustomerPortal):
         }
         
         return request.render("inmoser_service_order.portal_service_order_detail", values)
+    
+    @http.route(['/my/service-orders/<int:order_id>/photo/<string:field_name>'], type='http', auth="user")
+    def portal_service_order_photo(self, order_id, field_name, unique=None, **kw):
+        """Foto de evidencia de la orden servida desde el filestore con cabeceras de caché"""
+        if field_name not in PORTAL_PHOTO_FIELDS:
+            return request.not_found()
+        try:
+            order = self._document_check_access('inmoser.service.order', order_id)
+        except (AccessError, MissingError):
+            return request.not_found()
+        
+        stream = request.env['ir.binary']._get_image_stream_from(order, field_name)
+        # Con "unique" la URL cambia con la orden: el navegador puede guardarla indefinidamente
+        if unique:
+            return stream.get_response(immutable=True)
+        return stream.get_response(max_age=3600)
 
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http, _
+from odoo.http import request
+from odoo.exceptions import AccessError, UserError, ValidationError
+from psycopg2.errors import LockNotAvailable
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Tamaño de parte recomendado a los clientes móviles
+CHUNK_SIZE = 512 * 1024
+
+
+class InmoserEvidenceUpload(http.Controller):
+    """
+    Subida por partes y reanudable de fotos de evidencia desde campo
+
+    Protocolo:
+        1. start: declara archivo, tamaño y SHA-256; devuelve token y bytes
+           ya recibidos (para reanudar basta con volver a llamar a start).
+        2. PUT por cada parte, con cabecera X-Upload-Offset y opcionalmente
+           X-Chunk-Checksum (SHA-256 de la parte).
+        3. finish: verifica el archivo completo y lo añade a la galería.
+    """
+
+    def _get_session(self, token):
+        return request.env['inmoser.evidence.upload'].sudo().search([
+            ('token', '=', token),
+            ('user_id', '=', request.env.uid),
+        ], limit=1)
+
+    @http.route(['/inmoser/evidence/upload/start'], type='json', auth="user")
+    def upload_start(self, order_id, filename, size, checksum, kind='other', **kw):
+        """Abrir o reanudar una subida"""
+        order = request.env['inmoser.service.order'].browse(int(order_id)).exists()
+        if not order:
+            return {'error': _('Service order not found.')}
+        try:
+            session = request.env['inmoser.evidence.upload']._start(order, filename, int(size), checksum, kind)
+        except (AccessError, UserError) as e:
+            return {'error': str(e)}
+        return {
+            'token': session.token,
+            'received': session.received,
+            'chunk_size': CHUNK_SIZE,
+        }
+
+    @http.route(['/inmoser/evidence/upload/<string:token>'], type='http', auth="user", methods=['PUT'], csrf=False)
+    def upload_chunk(self, token, **kw):
+        """Recibir una parte; el cuerpo se copia al archivo por bloques"""
+        session = self._get_session(token)
+        if not session:
+            return request.not_found()
+        headers = request.httprequest.headers
+        try:
+            received = session._write_chunk(
+                int(headers.get('X-Upload-Offset', 0)),
+                request.httprequest.stream,
+                headers.get('X-Chunk-Checksum')
+            )
+        except LockNotAvailable:
+            return request.make_json_response({'error': _('Another chunk is being written.')}, status=409)
+        except (UserError, ValueError) as e:
+            return request.make_json_response({'error': str(e), 'received': session.received}, status=400)
+        return request.make_json_response({'received': received})
+
+    @http.route(['/inmoser/evidence/upload/<string:token>/finish'], type='json', auth="user")
+    def upload_finish(self, token, **kw):
+        """Verificar la suma y guardar la foto en la galería"""
+        session = self._get_session(token)
+        if not session:
+            return {'error': _('Upload not found.')}
+        try:
+            evidence = session._finish()
+        except (UserError, ValidationError) as e:
+            return {'error': str(e)}
+        if not evidence:
+            return {'error': _('File checksum mismatch; the upload has been restarted.'), 'received': 0}
+        return {'evidence_id': evidence.id}
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http
+from odoo.http import request, content_disposition, Response
+from odoo.exceptions import AccessError, MissingError
+from werkzeug.wsgi import wrap_file
+import base64
+import logging
+import tempfile
+
+_logger = logging.getLogger(__name__)
+
+
+class InmoserQRCode(http.Controller):
+    """
+    Imágenes QR renderizadas bajo demanda desde la caché
+    """
+
+    @http.route(['/inmoser/qr/equipment/<int:equipment_id>.png'], type='http', auth="user")
+    def equipment_qr(self, equipment_id, size=10, **kw):
+        """QR del equipo"""
+        return self._qr_response('inmoser.service.equipment', equipment_id, size)
+
+    @http.route(['/inmoser/qr/service-order/<int:order_id>.png'], type='http', auth="user")
+    def service_order_qr(self, order_id, size=10, **kw):
+        """QR de la orden de servicio"""
+        return self._qr_response('inmoser.service.order', order_id, size)
+
+    @http.route(['/inmoser/qr/labels/<int:sheet_id>.pdf'], type='http', auth="user")
+    def qr_label_sheet(self, sheet_id, **kw):
+        """Hoja PDF de etiquetas QR, enviada en flujo desde un archivo temporal"""
+        sheet = request.env['inmoser.qr.label.sheet'].browse(sheet_id)
+        try:
+            sheet.check_access_rule('read')
+        except (AccessError, MissingError):
+            return request.not_found()
+        if not sheet.exists():
+            return request.not_found()
+
+        stream = tempfile.TemporaryFile()
+        sheet._write_pdf(stream)
+        size = stream.tell()
+        stream.seek(0)
+        return Response(
+            wrap_file(request.httprequest.environ, stream),
+            headers=[
+                ('Content-Type', 'application/pdf'),
+                ('Content-Length', size),
+                ('Content-Disposition', content_disposition('qr_labels.pdf')),
+            ],
+            direct_passthrough=True
+        )
+
+    def _qr_response(self, model, record_id, size):
+        """Responder con la imagen cacheada; 304 si el navegador ya la tiene"""
+        record = request.env[model].browse(record_id)
+        try:
+            record.check_access_rights('read')
+            record.check_access_rule('read')
+        except (AccessError, MissingError):
+            return request.not_found()
+        if not record.exists():
+            return request.not_found()
+
+        try:
+            size = min(max(int(size), 1), 40)
+        except ValueError:
+            size = 10
+
+        qr_generator = request.env['inmoser.qr.generator']
+        if model == 'inmoser.service.equipment':
+            payload = qr_generator.generate_equipment_qr_url(record.id)
+        else:
+            payload = qr_generator.generate_service_order_qr_url(record.id)
+
+        qr_cache = request.env['inmoser.qr.cache']
+        etag = '"%s"' % qr_cache._make_key(payload, size)
+        headers = [
+            ('Cache-Control', 'private, max-age=86400'),
+            ('ETag', etag),
+        ]
+        if etag.strip('"') in request.httprequest.if_none_match:
+            return request.make_response(b'', headers=headers, status=304)
+
+        image = qr_cache._get_image(payload, size)
+        return request.make_response(
+            base64.b64decode(image),
+            headers=headers + [('Content-Type', 'image/png')]
+        )
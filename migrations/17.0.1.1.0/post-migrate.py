@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, SUPERUSER_ID
+import logging
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 200
+
+# Columnas binarias que pasan a adjuntos del filestore: {tabla: (modelo, campos)}
+MOVED_COLUMNS = {
+    'inmoser_service_order': ('inmoser.service.order', ['photo_before', 'photo_after', 'customer_signature']),
+}
+
+# Columnas QR sin uso: las imágenes se sirven desde inmoser.qr.cache
+DROPPED_COLUMNS = {
+    'inmoser_service_order': ['qr_code_order', 'qr_code_order_text'],
+    'inmoser_service_equipment': ['qr_code', 'qr_code_text'],
+}
+
+
+def _column_type(cr, table, column):
+    cr.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = %s AND column_name = %s
+    """, (table, column))
+    row = cr.fetchone()
+    return row and row[0]
+
+
+def _move_column(env, table, model, field):
+    """Mover los valores de la columna a adjuntos, por lotes, y eliminarla"""
+    cr = env.cr
+    records = env[model].with_context(tracking_disable=True)
+    moved = 0
+    while True:
+        cr.execute(
+            'SELECT id, "%s" FROM "%s" WHERE "%s" IS NOT NULL ORDER BY id LIMIT %%s' % (field, table, field),
+            (CHUNK_SIZE,)
+        )
+        rows = cr.fetchall()
+        if not rows:
+            break
+        for record_id, value in rows:
+            records.browse(record_id).write({field: bytes(value)})
+        env.flush_all()
+        cr.execute(
+            'UPDATE "%s" SET "%s" = NULL WHERE id IN %%s' % (table, field),
+            (tuple(row[0] for row in rows),)
+        )
+        env.invalidate_all()
+        moved += len(rows)
+
+    cr.execute('ALTER TABLE "%s" DROP COLUMN "%s"' % (table, field))
+    _logger.info("Moved %s values of %s.%s to filestore attachments", moved, model, field)
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+
+    for table, (model, fields) in MOVED_COLUMNS.items():
+        for field in fields:
+            if _column_type(cr, table, field) == 'bytea':
+                _move_column(env, table, model, field)
+
+    for table, columns in DROPPED_COLUMNS.items():
+        for column in columns:
+            if _column_type(cr, table, column):
+                cr.execute('ALTER TABLE "%s" DROP COLUMN "%s"' % (table, column))
+                _logger.info("Dropped unused column %s.%s", table, column)
+
+    # Las órdenes ya marcadas como vencidas se notificaron con el cron anterior
+    cr.execute("""
+        UPDATE inmoser_service_order
+        SET overdue_notified_date = scheduled_date
+        WHERE is_overdue AND overdue_notified_date IS NULL
+    """)
@@ -2,12 +2,25 @@
 
 from . import res_partner_extension
 from . import hr_employee_extension
+from . import hr_employee_route
 from . import service_equipment
+from . import service_equipment_portal
 from . import service_type
 from . import service_order
+from . import service_order_tracking
 from . import service_order_refaction_line
 from . import service_order_business_logic
+from . import service_order_dispatch
+from . import service_order_notification
+from . import service_order_photo
+from . import service_order_evidence
+from . import service_order_status
+from . import service_order_api
+from . import service_order_portal
+from . import technician_daily_load
+from . import notification_outbox
 from . import qr_code_generator
+from . import qr_cache
 from . import account_integration
 from . import stock_integration
 from . import hr_integration
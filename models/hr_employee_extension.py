@@ -4,6 +4,9 @@ from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 import re
 
+from ..tools.availability import hours_to_mask, parse_available_hours, parse_week_masks
+from ..tools.ranking import LEVEL_RANK, geo_point, tokenize
+
 
 class HrEmployeeExtension(models.Model):
     _inherit = 'hr.employee'
@@ -28,6 +31,13 @@ class HrEmployeeExtension(models.Model):
         default='10-12,12-14,15-17'
     )
     
+    x_inmoser_hours_mask = fields.Integer(
+        string='Available Hours Mask',
+        compute='_compute_hours_mask',
+        store=True,
+        help='Horas disponibles precompiladas como máscara de bits (bit n = hora n)'
+    )
+    
     x_inmoser_technician_level = fields.Selection([
         ('junior', 'Junior'),
         ('senior', 'Senior'),
@@ -40,6 +50,13 @@ class HrEmployeeExtension(models.Model):
         help='Especialidades y certificaciones del técnico'
     )
     
+    x_inmoser_specialty_tokens = fields.Char(
+        string='Specialty Tokens',
+        compute='_compute_specialty_tokens',
+        store=True,
+        help='Especialidades normalizadas como palabras separadas por espacios, para el ranking'
+    )
+    
     x_inmoser_max_daily_orders = fields.Integer(
         string='Max Daily Orders',
         help='Número máximo de órdenes de servicio por día',
@@ -54,45 +71,63 @@ class HrEmployeeExtension(models.Model):
         help='Órdenes de servicio asignadas a este técnico'
     )
     
-    # Campos computados
+    # Campos computados (almacenados, se recalculan solo para los técnicos afectados)
     x_inmoser_active_orders_count = fields.Integer(
         string='Active Orders Count',
-        compute='_compute_active_orders_count',
+        compute='_compute_orders_count',
+        store=True,
         help='Número de órdenes activas asignadas'
     )
     
     x_inmoser_completed_orders_count = fields.Integer(
         string='Completed Orders Count',
-        compute='_compute_completed_orders_count',
+        compute='_compute_orders_count',
+        store=True,
         help='Número de órdenes completadas'
     )
 
-    @api.depends('x_inmoser_assigned_orders.state')
-    def _compute_active_orders_count(self):
-        """Calcula el número de órdenes activas del técnico"""
+    @api.depends('x_inmoser_available_hours')
+    def _compute_hours_mask(self):
+        """Precompila las horas disponibles en una máscara de bits"""
         for employee in self:
-            if employee.x_inmoser_is_technician:
-                active_states = ['assigned', 'in_progress', 'pending_approval', 'accepted']
-                employee.x_inmoser_active_orders_count = len(
-                    employee.x_inmoser_assigned_orders.filtered(
-                        lambda o: o.state in active_states
-                    )
-                )
-            else:
-                employee.x_inmoser_active_orders_count = 0
+            try:
+                hours = parse_available_hours(employee.x_inmoser_available_hours) or []
+            except ValueError:
+                hours = []
+            employee.x_inmoser_hours_mask = hours_to_mask(hours)
 
-    @api.depends('x_inmoser_assigned_orders.state')
-    def _compute_completed_orders_count(self):
-        """Calcula el número de órdenes completadas del técnico"""
+    @api.depends('x_inmoser_specialties')
+    def _compute_specialty_tokens(self):
+        """Precalcula las especialidades como conjunto de palabras normalizadas"""
         for employee in self:
-            if employee.x_inmoser_is_technician:
-                employee.x_inmoser_completed_orders_count = len(
-                    employee.x_inmoser_assigned_orders.filtered(
-                        lambda o: o.state == 'done'
-                    )
-                )
-            else:
-                employee.x_inmoser_completed_orders_count = 0
+            employee.x_inmoser_specialty_tokens = ' '.join(sorted(tokenize(employee.x_inmoser_specialties)))
+
+    @api.depends('x_inmoser_is_technician', 'x_inmoser_assigned_orders.state')
+    def _compute_orders_count(self):
+        """Calcula las órdenes activas y completadas con una consulta agrupada"""
+        active_states = ['assigned', 'in_progress', 'pending_approval', 'accepted']
+        technician_ids = [employee._origin.id for employee in self
+                          if employee.x_inmoser_is_technician and employee._origin.id]
+        
+        counts = {}
+        if technician_ids:
+            groups = self.env['inmoser.service.order'].sudo()._read_group(
+                [
+                    ('assigned_technician_id', 'in', technician_ids),
+                    ('state', 'in', active_states + ['done']),
+                ],
+                groupby=['assigned_technician_id', 'state'],
+                aggregates=['__count'],
+            )
+            for technician, state, count in groups:
+                counts[(technician.id, state)] = count
+        
+        for employee in self:
+            technician_id = employee._origin.id if employee.x_inmoser_is_technician else None
+            employee.x_inmoser_active_orders_count = sum(
+                counts.get((technician_id, state), 0) for state in active_states
+            )
+            employee.x_inmoser_completed_orders_count = counts.get((technician_id, 'done'), 0)
 
     @api.constrains('x_inmoser_available_hours')
     def _check_available_hours_format(self):
@@ -108,14 +143,12 @@ class HrEmployeeExtension(models.Model):
                     ))
                 
                 # Validar que las horas sean válidas (0-23)
-                hours_ranges = employee.x_inmoser_available_hours.split(',')
-                for hour_range in hours_ranges:
-                    start_hour, end_hour = hour_range.split('-')
-                    if not (0 <= int(start_hour) <= 23 and 0 <= int(end_hour) <= 23):
+                for start_hour, end_hour in parse_available_hours(employee.x_inmoser_available_hours):
+                    if not (0 <= start_hour <= 23 and 0 <= end_hour <= 23):
                         raise ValidationError(_(
                             'Las horas deben estar entre 0 y 23.'
                         ))
-                    if int(start_hour) >= int(end_hour):
+                    if start_hour >= end_hour:
                         raise ValidationError(_(
                             'La hora de inicio debe ser menor que la hora de fin.'
                         ))
@@ -129,6 +162,18 @@ class HrEmployeeExtension(models.Model):
                     'El número máximo de órdenes diarias debe ser mayor que cero.'
                 ))
 
+    def _get_working_hours(self):
+        """
+        Horas de trabajo semanales de los empleados de self
+        
+        Se leen de x_inmoser_week_masks, precompilado y almacenado por empleado:
+        el ORM lo recalcula solo para el técnico cuyo horario cambia.
+        
+        Returns:
+            dict: {employee_id: (máscara_lunes, ..., máscara_domingo) o None}
+        """
+        return {employee.id: parse_week_masks(employee.x_inmoser_week_masks) for employee in self}
+
     @api.onchange('x_inmoser_is_technician')
     def _onchange_is_technician(self):
         """Limpia campos específicos de técnico si se desmarca"""
@@ -160,47 +205,41 @@ class HrEmployeeExtension(models.Model):
         }
         return action
 
-    def get_available_time_slots(self, date):
+    def get_available_time_slots(self, date, duration=2.0):
         """
         Obtiene los slots de tiempo disponibles para un técnico en una fecha específica
         
         Args:
             date (datetime.date): Fecha para la cual obtener los slots
+            duration (float): Duración en horas del trabajo a programar
             
         Returns:
-            list: Lista de tuplas (hora_inicio, hora_fin) disponibles
+            list: Lista de tuplas (hora_inicio, hora_fin) disponibles, en horas decimales
         """
         self.ensure_one()
         if not self.x_inmoser_is_technician or not self.x_inmoser_available_hours:
             return []
         
-        # Obtener órdenes ya programadas para esa fecha
-        existing_orders = self.x_inmoser_assigned_orders.filtered(
-            lambda o: o.scheduled_date and o.scheduled_date.date() == date and o.state not in ['cancelled', 'done']
-        )
-        
-        # Convertir horas disponibles a lista de slots
-        available_slots = []
-        hours_ranges = self.x_inmoser_available_hours.split(',')
-        
-        for hour_range in hours_ranges:
-            start_hour, end_hour = map(int, hour_range.split('-'))
-            available_slots.append((start_hour, end_hour))
+        # Reservas del día (con su duración estimada) cargadas por el motor de disponibilidad
+        availability = self.env['inmoser.service.order']._get_technician_availability(date, self)
         
-        # Filtrar slots ocupados (simplificado - asume 2 horas por servicio)
-        occupied_hours = []
-        for order in existing_orders:
-            order_hour = order.scheduled_date.hour
-            occupied_hours.extend([order_hour, order_hour + 1])
-        
-        # Filtrar slots disponibles
-        free_slots = []
-        for start_hour, end_hour in available_slots:
-            for hour in range(start_hour, end_hour, 2):  # Slots de 2 horas
-                if hour not in occupied_hours and hour + 1 not in occupied_hours:
-                    free_slots.append((hour, hour + 2))
+        return availability.free_slots(self.id, duration)
+
+    def _get_ranking_features(self):
+        """
+        Rasgos precalculados de los técnicos para el ranking de candidatos
         
-        return free_slots
+        Returns:
+            dict: {technician_id: (especialidades, nivel, punto_base)}
+        """
+        return {
+            employee.id: (
+                frozenset((employee.x_inmoser_specialty_tokens or '').split()),
+                LEVEL_RANK.get(employee.x_inmoser_technician_level, 0),
+                geo_point(employee.address_id.partner_latitude, employee.address_id.partner_longitude),
+            )
+            for employee in self
+        }
 
     def check_daily_capacity(self, date):
         """
@@ -216,10 +255,8 @@ class HrEmployeeExtension(models.Model):
         if not self.x_inmoser_is_technician:
             return False
         
-        # Contar órdenes programadas para esa fecha
-        orders_count = len(self.x_inmoser_assigned_orders.filtered(
-            lambda o: o.scheduled_date and o.scheduled_date.date() == date and o.state not in ['cancelled', 'done']
-        ))
+        # Órdenes programadas para esa fecha según el resumen diario
+        orders_count = self.env['inmoser.technician.daily.load'].get_booked_count(self.id, date)
         
         return orders_count < self.x_inmoser_max_daily_orders
 
@@ -236,13 +273,11 @@ class HrEmployeeExtension(models.Model):
             recordset: Técnicos disponibles
         """
         technicians = self.search([('x_inmoser_is_technician', '=', True)])
-        available_technicians = self.env['hr.employee']
         
-        for technician in technicians:
-            if technician.check_daily_capacity(date) and technician.get_available_time_slots(date):
-                available_technicians |= technician
+        # Una sola consulta agrupada para las reservas de todos los técnicos
+        availability = self.env['inmoser.service.order']._get_technician_availability(date, technicians)
         
-        return available_technicians
+        return self.browse(availability.technicians_with_free_slots())
 
     def name_get(self):
         """Personaliza la visualización del nombre para técnicos"""
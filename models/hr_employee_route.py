@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from datetime import datetime, time, timedelta
+import logging
+
+from ..tools.availability import round_up_to_slot
+from ..tools.ranking import geo_point, haversine_km
+from ..tools.routing import solve_route
+
+_logger = logging.getLogger(__name__)
+
+
+class HrEmployeeRoute(models.Model):
+    """
+    Optimización de la ruta diaria de los técnicos
+    """
+    _inherit = 'hr.employee'
+
+    def action_optimize_route(self):
+        """Optimizar la ruta de mañana (o de la fecha en contexto) de los técnicos"""
+        day = fields.Date.to_date(self.env.context.get('route_date')) or (
+            fields.Datetime.now().date() + timedelta(days=1)
+        )
+        rescheduled = 0
+        for technician in self.filtered('x_inmoser_is_technician'):
+            rescheduled += technician._optimize_route(day)
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Route Optimization'),
+                'message': _('%s service orders rescheduled for %s.') % (rescheduled, day),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _cron_optimize_routes(self):
+        """Cron job nocturno para optimizar las rutas del día siguiente"""
+        day = fields.Datetime.now().date() + timedelta(days=1)
+        groups = self.env['inmoser.service.order']._read_group([
+            ('state', '=', 'assigned'),
+            ('assigned_technician_id', '!=', False),
+            ('scheduled_date', '>=', datetime.combine(day, time.min)),
+            ('scheduled_date', '<', datetime.combine(day, time.min) + timedelta(days=1)),
+        ], groupby=['assigned_technician_id'], aggregates=['__count'])
+
+        rescheduled = 0
+        for technician, count in groups:
+            if count > 1:
+                rescheduled += technician._optimize_route(day)
+        _logger.info("Route optimization: %s service orders rescheduled for %s", rescheduled, day)
+        return rescheduled
+
+    def _optimize_route(self, day):
+        """
+        Reordenar las órdenes asignadas del técnico en el día para minimizar traslados
+
+        Las paradas se ordenan con vecino más cercano + 2-opt sobre la matriz de
+        distancias entre clientes; después se reparten en el horario del técnico,
+        sumando el tiempo de traslado, alrededor de las órdenes ya iniciadas.
+
+        Returns:
+            int: Número de órdenes con nueva fecha programada
+        """
+        self.ensure_one()
+        orders = self.env['inmoser.service.order'].search([
+            ('assigned_technician_id', '=', self.id),
+            ('state', '=', 'assigned'),
+            ('scheduled_date', '>=', datetime.combine(day, time.min)),
+            ('scheduled_date', '<', datetime.combine(day, time.min) + timedelta(days=1)),
+        ], order='scheduled_date, id')
+        if len(orders) < 2:
+            return 0
+
+        # Motor del día sin las órdenes a reprogramar: solo quedan las fijas
+        availability = orders._get_technician_availability(day, self)
+        if availability.working_hours.get(self.id) is None:
+            # Sin horario no hay jornada en la que repartir la ruta
+            _logger.info("Route optimization: technician %s has no working hours, skipped", self.id)
+            return 0
+
+        points = orders.mapped('partner_id')._get_route_coordinates()
+        located = orders.filtered(lambda o: points[o.partner_id.id])
+        if len(located) < 2:
+            return 0
+
+        origin = geo_point(self.address_id.partner_latitude, self.address_id.partner_longitude)
+        stops = [points[order.partner_id.id] for order in located]
+        route = [located[index] for index in solve_route(stops, origin)]
+        # Las órdenes sin coordenadas se atienden al final, en su orden actual
+        route += list(orders - located)
+
+        speed = float(self.env['ir.config_parameter'].sudo().get_param(
+            'inmoser_service_order.route_speed_kmh', 30
+        ))
+        now = fields.Datetime.now()
+
+        schedule = {}
+        cursor = max(datetime.combine(day, time.min), now)
+        previous = origin
+        for order in route:
+            location = points[order.partner_id.id]
+            if previous and location:
+                cursor += timedelta(hours=haversine_km(previous, location) / speed)
+            duration = order._get_estimated_duration()
+            start = availability.next_free_slot(self.id, duration, round_up_to_slot(cursor))
+            if not start:
+                # No cabe en el horario: la ruta propuesta no es viable, mantener la actual
+                return 0
+            availability.book(self.id, start, duration)
+            schedule[order] = start
+            cursor = start + timedelta(hours=duration)
+            previous = location or previous
+
+        changed = {order: start for order, start in schedule.items() if order.scheduled_date != start}
+        if changed:
+            self.env['inmoser.service.order']._write_scheduled_dates(changed)
+        return len(changed)
+
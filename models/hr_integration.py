@@ -5,6 +5,8 @@ from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, timedelta
 import logging
 
+from ..tools.availability import FULL_DAY_MASK, float_hours_to_mask, format_week_masks
+
 _logger = logging.getLogger(__name__)
 
 class HrEmployeeServiceIntegration(models.Model):
@@ -56,6 +58,39 @@ class HrEmployeeServiceIntegration(models.Model):
         string='Service Schedule'
     )
     
+    x_inmoser_week_masks = fields.Char(
+        string='Weekly Hours Masks',
+        compute='_compute_week_masks',
+        store=True,
+        help='Horas de trabajo precompiladas de lunes a domingo (máscaras separadas por comas); '
+             'vacío si el técnico no tiene restricciones de horario'
+    )
+    
+    @api.depends('x_inmoser_available_hours', 'x_inmoser_hours_mask',
+                 'service_schedule_ids.day_of_week', 'service_schedule_ids.hours_mask',
+                 'service_schedule_ids.is_available')
+    def _compute_week_masks(self):
+        """
+        Precompilar las horas de trabajo de cada día de la semana
+        
+        Cada día usa las filas disponibles de inmoser.technician.schedule si
+        existen para ese día; en otro caso, las horas disponibles del técnico.
+        """
+        for employee in self:
+            schedule_masks = {}
+            for schedule in employee.service_schedule_ids:
+                day = int(schedule.day_of_week)
+                mask = schedule.hours_mask if schedule.is_available else 0
+                schedule_masks[day] = schedule_masks.get(day, 0) | mask
+            
+            if not employee.x_inmoser_available_hours and not schedule_masks:
+                employee.x_inmoser_week_masks = format_week_masks(None)
+                continue
+            default_mask = employee.x_inmoser_hours_mask if employee.x_inmoser_available_hours else FULL_DAY_MASK
+            employee.x_inmoser_week_masks = format_week_masks(
+                [schedule_masks.get(day, default_mask) for day in range(7)]
+            )
+    
     @api.depends('timesheet_ids', 'x_inmoser_service_order_ids')
     def _compute_service_statistics(self):
         """Calcular estadísticas de servicio"""
@@ -317,6 +352,19 @@ class TechnicianSchedule(models.Model):
         default=True
     )
     
+    hours_mask = fields.Integer(
+        string='Hours Mask',
+        compute='_compute_hours_mask',
+        store=True,
+        help='Horas completas del turno como máscara de bits (bit n = hora n)'
+    )
+    
+    @api.depends('start_time', 'end_time')
+    def _compute_hours_mask(self):
+        """Precompilar el turno en una máscara de horas"""
+        for schedule in self:
+            schedule.hours_mask = float_hours_to_mask(schedule.start_time, schedule.end_time)
+    
     @api.constrains('start_time', 'end_time')
     def _check_times(self):
         """Validar horarios"""
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from datetime import timedelta
+import logging
+import threading
+import time as timer
+
+_logger = logging.getLogger(__name__)
+
+
+class NotificationOutbox(models.Model):
+    """
+    Bandeja de salida de notificaciones por correo de las órdenes de servicio
+
+    Los botones de cambio de estado solo registran la intención de notificar
+    dentro de su transacción; un cron procesa la bandeja, renderiza las
+    plantillas por lotes y envía los correos con una conexión SMTP por lote,
+    reintentando con espera exponencial cuando el envío falla.
+    """
+    _name = 'inmoser.notification.outbox'
+    _description = 'Notification Outbox'
+    _order = 'id'
+
+    template_id = fields.Many2one(
+        'mail.template',
+        string='Template',
+        required=True,
+        ondelete='cascade'
+    )
+
+    model = fields.Char(
+        string='Model',
+        required=True
+    )
+
+    res_id = fields.Integer(
+        string='Record ID',
+        required=True
+    )
+
+    render_context = fields.Json(
+        string='Render Context',
+        help='Valores adicionales de contexto para renderizar la plantilla'
+    )
+
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed')
+    ], string='State', default='pending', required=True, index=True)
+
+    attempts = fields.Integer(
+        string='Attempts',
+        default=0
+    )
+
+    next_attempt = fields.Datetime(
+        string='Next Attempt',
+        default=fields.Datetime.now,
+        index=True
+    )
+
+    mail_id = fields.Many2one(
+        'mail.mail',
+        string='Mail',
+        ondelete='set null',
+        help='Correo generado; se reutiliza en los reintentos'
+    )
+
+    sent_date = fields.Datetime(
+        string='Sent Date'
+    )
+
+    last_error = fields.Text(
+        string='Last Error'
+    )
+
+    @api.model
+    def _enqueue(self, template_xmlid, records, render_context=None):
+        """
+        Registrar notificaciones pendientes para los registros
+
+        Args:
+            template_xmlid (str): XML ID de la plantilla de correo
+            records (recordset): Registros a notificar
+            render_context (dict, optional): Contexto adicional serializable
+
+        Returns:
+            recordset: Entradas creadas en la bandeja
+        """
+        template = self.env.ref(template_xmlid, raise_if_not_found=False)
+        if not template or not records:
+            return self.browse()
+
+        entries = self.sudo().create([{
+            'template_id': template.id,
+            'model': records._name,
+            'res_id': record.id,
+            'render_context': render_context or False,
+        } for record in records])
+
+        # Procesar la bandeja en cuanto termine la transacción actual
+        cron = self.env.ref('inmoser_service_order.cron_process_notification_outbox', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return entries
+
+    def _claim_due(self, limit):
+        """Tomar y bloquear entradas pendientes; otros procesos saltan las bloqueadas"""
+        self.env.cr.execute("""
+            SELECT id FROM inmoser_notification_outbox
+            WHERE state = 'pending' AND next_attempt <= %s
+            ORDER BY next_attempt, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (fields.Datetime.now(), limit))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _cron_process_outbox(self):
+        """Cron job que procesa la bandeja de salida por lotes"""
+        started = timer.monotonic()
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'inmoser_service_order.outbox_batch_size', 200
+        ))
+
+        totals = {'sent': 0, 'retry': 0, 'failed': 0}
+        outbox = self.sudo()
+        while True:
+            entries = outbox._claim_due(batch_size)
+            if not entries:
+                break
+            for state, count in entries._process().items():
+                totals[state] += count
+            if auto_commit:
+                self.env.cr.commit()
+
+        _logger.info(
+            "Notification outbox: %(sent)s sent, %(retry)s to retry, %(failed)s failed in %(seconds).2fs",
+            dict(totals, seconds=timer.monotonic() - started)
+        )
+        return totals
+
+    def _process(self):
+        """
+        Renderizar y enviar un lote de entradas
+
+        Returns:
+            dict: Número de entradas enviadas, a reintentar y fallidas
+        """
+        mails = self.env['mail.mail'].sudo()
+        errors = {}
+
+        # Renderizado por lotes: una llamada por plantilla y contexto
+        groups = {}
+        for entry in self:
+            key = (entry.template_id, repr(sorted((entry.render_context or {}).items())))
+            groups.setdefault(key, self.browse())
+            groups[key] |= entry
+
+        for (template, __), entries in groups.items():
+            retries = entries.filtered(lambda e: e.mail_id.exists())
+            fresh = entries - retries
+            if retries:
+                retries.mail_id.mark_outgoing()
+                mails |= retries.mail_id
+            if not fresh:
+                continue
+            try:
+                created = template.with_context(**(fresh[0].render_context or {})).send_mail_batch(
+                    fresh.mapped('res_id'), force_send=False
+                )
+            except Exception as e:
+                _logger.warning("Could not render template %s: %s", template.name, e)
+                for entry in fresh:
+                    errors[entry.id] = str(e)
+                continue
+            created_by_res_id = {mail.res_id: mail for mail in created}
+            for entry in fresh:
+                entry.mail_id = created_by_res_id.get(entry.res_id)
+            mails |= created
+
+        # Una conexión SMTP por servidor de correo para todo el lote
+        if mails:
+            mails.send(auto_commit=False, raise_exception=False)
+
+        return self._record_results(errors)
+
+    def _record_results(self, errors):
+        """Marcar entradas enviadas o programar su reintento con espera exponencial"""
+        params = self.env['ir.config_parameter'].sudo()
+        max_attempts = int(params.get_param('inmoser_service_order.outbox_max_attempts', 5))
+        backoff = int(params.get_param('inmoser_service_order.outbox_backoff_seconds', 60))
+        now = fields.Datetime.now()
+
+        counts = {'sent': 0, 'retry': 0, 'failed': 0}
+        sent = self.browse()
+        for entry in self:
+            mail = entry.mail_id.exists()
+            if entry.id not in errors and (not mail or mail.state == 'sent'):
+                sent |= entry
+                continue
+
+            attempts = entry.attempts + 1
+            values = {
+                'attempts': attempts,
+                'last_error': errors.get(entry.id) or mail.failure_reason or _('Unknown error'),
+            }
+            if attempts >= max_attempts:
+                values['state'] = 'failed'
+                counts['failed'] += 1
+            else:
+                values['next_attempt'] = now + timedelta(seconds=backoff * 2 ** (attempts - 1))
+                counts['retry'] += 1
+            entry.write(values)
+
+        if sent:
+            sent.write({'state': 'sent', 'sent_date': now, 'last_error': False})
+            counts['sent'] = len(sent)
+        return counts
+
+    @api.autovacuum
+    def _gc_sent_entries(self):
+        """Eliminar entradas enviadas hace más de una semana"""
+        self.sudo().search([
+            ('state', '=', 'sent'),
+            ('sent_date', '<', fields.Datetime.now() - timedelta(days=7)),
+        ]).unlink()
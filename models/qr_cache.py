@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.tools import mute_logger
+from datetime import timedelta
+from psycopg2 import IntegrityError
+import base64
+import hashlib
+import logging
+
+from ..tools.qr import render_qr_pngs
+
+_logger = logging.getLogger(__name__)
+
+# Un acceso solo se registra si el último es más antiguo que este intervalo
+TOUCH_INTERVAL = timedelta(hours=1)
+
+
+class QRCodeCache(models.Model):
+    """
+    Caché de imágenes QR direccionada por contenido
+
+    Cada imagen se identifica por el hash del texto codificado y su tamaño, de
+    modo que solo se renderiza la primera vez que se solicita y nunca se vuelve
+    a generar mientras el texto no cambie. Las imágenes se guardan como
+    adjuntos desde la ruta /inmoser/qr, la hoja de etiquetas o la acción de
+    generar; el autovacuum elimina las menos usadas por encima del límite (LRU).
+    """
+    _name = 'inmoser.qr.cache'
+    _description = 'QR Code Cache'
+    _order = 'last_used desc, id desc'
+
+    key = fields.Char(
+        string='Key',
+        required=True,
+        index=True,
+        help='Hash del texto codificado, tamaño y borde'
+    )
+
+    payload = fields.Char(
+        string='Payload',
+        required=True
+    )
+
+    box_size = fields.Integer(
+        string='Box Size',
+        default=10
+    )
+
+    border = fields.Integer(
+        string='Border',
+        default=4
+    )
+
+    image = fields.Binary(
+        string='Image',
+        attachment=True
+    )
+
+    last_used = fields.Datetime(
+        string='Last Used',
+        default=fields.Datetime.now,
+        index=True
+    )
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'The QR cache key must be unique.'),
+    ]
+
+    @api.model
+    def _make_key(self, payload, box_size=10, border=4):
+        """Clave de caché a partir del contenido y el tamaño"""
+        return hashlib.sha256(('%s:%s:%s' % (box_size, border, payload)).encode()).hexdigest()
+
+    @api.model
+    def _get_entry(self, payload, box_size=10, border=4):
+        """
+        Obtener la entrada de caché del texto, renderizándola si no existe
+
+        Args:
+            payload (str): Texto a codificar en el QR
+            box_size (int): Tamaño de cada módulo del QR
+            border (int): Borde del QR
+
+        Returns:
+            record: Entrada inmoser.qr.cache
+        """
+        key = self._make_key(payload, box_size, border)
+        cache = self.sudo()
+        entry = cache.search([('key', '=', key)], limit=1)
+        if entry:
+            entry._touch()
+            return entry
+
+        image = self.env['inmoser.qr.generator'].generate_qr_code(payload, box_size, border)
+        try:
+            with self.env.cr.savepoint(), mute_logger('odoo.sql_db'):
+                entry = cache.create({
+                    'key': key,
+                    'payload': payload,
+                    'box_size': box_size,
+                    'border': border,
+                    'image': image,
+                })
+        except IntegrityError:
+            # Otra transacción la renderizó al mismo tiempo
+            return cache.search([('key', '=', key)], limit=1)
+        return entry
+
+    @api.model
+    def _get_image(self, payload, box_size=10, border=4):
+        """Imagen QR en base64 para el texto, desde la caché"""
+        return self._get_entry(payload, box_size, border).image
+
+    @api.model
+    def _get_images(self, payloads, box_size=10, border=4):
+        """
+        Imágenes PNG de un lote de textos, renderizando solo las que faltan
+
+        Args:
+            payloads (list): Textos a codificar
+
+        Returns:
+            dict: {texto: PNG en bytes}
+        """
+        images = self._get_encoded_images(payloads, box_size, border)
+        return {payload: base64.b64decode(image) for payload, image in images.items()}
+
+    @api.model
+    def _get_encoded_images(self, payloads, box_size=10, border=4, store=True):
+        """
+        Imágenes en base64 de un lote de textos con una sola búsqueda
+
+        Solo se renderizan, en el proceso actual, las que faltan. Con
+        store=False (lecturas de campos calculados) no se escribe nada: ni se
+        registra el uso ni se guardan las renderizadas.
+
+        Args:
+            payloads (list): Textos a codificar
+            store (bool): Registrar el uso y guardar las renderizadas en la caché
+
+        Returns:
+            dict: {texto: imagen en base64}
+        """
+        if not payloads:
+            return {}
+        cache = self.sudo()
+        keys = {payload: self._make_key(payload, box_size, border) for payload in payloads}
+        entries = cache.search([('key', 'in', list(set(keys.values())))])
+        if store:
+            entries._touch()
+        images_by_key = {entry.key: entry.image for entry in entries}
+
+        missing = [payload for payload in dict.fromkeys(payloads) if keys[payload] not in images_by_key]
+        if missing:
+            rendered = render_qr_pngs(missing, box_size, border)
+            values = [{
+                'key': keys[payload],
+                'payload': payload,
+                'box_size': box_size,
+                'border': border,
+                'image': base64.b64encode(png),
+            } for payload, png in zip(missing, rendered)]
+            if store:
+                try:
+                    with self.env.cr.savepoint(), mute_logger('odoo.sql_db'):
+                        entries |= cache.create(values)
+                except IntegrityError:
+                    # Renderizadas al mismo tiempo por otra transacción: no se guardan
+                    pass
+            images_by_key.update((value['key'], value['image']) for value in values)
+
+        images = {payload: images_by_key[keys[payload]] for payload in payloads}
+        # Liberar las imágenes leídas: el lote siguiente no las necesita
+        entries.invalidate_recordset(['image'])
+        return images
+
+    def _touch(self):
+        """Registrar el uso de la entrada, como mucho una vez por intervalo"""
+        now = fields.Datetime.now()
+        stale = self.filtered(lambda entry: not entry.last_used or entry.last_used < now - TOUCH_INTERVAL)
+        if stale:
+            self.env.cr.execute(
+                "UPDATE inmoser_qr_cache SET last_used = %s WHERE id IN %s",
+                (now, tuple(stale.ids))
+            )
+            stale.invalidate_recordset(['last_used'])
+
+    @api.autovacuum
+    def _gc_least_used(self):
+        """Eliminar las entradas menos usadas por encima del límite configurado"""
+        limit = int(self.env['ir.config_parameter'].sudo().get_param(
+            'inmoser_service_order.qr_cache_size', 5000
+        ))
+        self.env.cr.execute("""
+            SELECT id FROM inmoser_qr_cache
+            ORDER BY last_used DESC, id DESC
+            OFFSET %s
+        """, (limit,))
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        if ids:
+            self.sudo().browse(ids).unlink()
+            _logger.info("QR cache: %s least recently used entries evicted", len(ids))
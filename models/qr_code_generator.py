@@ -1,12 +1,12 @@
 # -*- coding: utf-8 -*-
 
-import qrcode
 import base64
-from io import BytesIO
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
 
+from ..tools.qr import render_qr_png
+
 _logger = logging.getLogger(__name__)
 
 class QRCodeGenerator(models.Model):
@@ -29,57 +29,40 @@ class QRCodeGenerator(models.Model):
             str: Imagen QR en base64
         """
         try:
-            # Crear instancia QR
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=size,
-                border=border,
-            )
-            
-            # Añadir datos
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Crear imagen
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convertir a base64
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            
-            return img_str
+            # Renderizar y convertir a base64
+            return base64.b64encode(render_qr_png(data, size, border)).decode()
             
         except Exception as e:
             _logger.error(f"Error generating QR code: {str(e)}")
             raise UserError(_("Error generating QR code: %s") % str(e))
     
-    def generate_equipment_qr_url(self, equipment_id):
+    def generate_equipment_qr_url(self, equipment_id, base_url=None):
         """
         Generar URL para acceso al portal del equipo
         
         Args:
             equipment_id (int): ID del equipo
+            base_url (str, optional): URL base ya leída (generación masiva)
             
         Returns:
             str: URL completa para el portal
         """
-        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        base_url = base_url or self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         portal_url = f"{base_url}/inmoser/equipment/{equipment_id}"
         return portal_url
     
-    def generate_service_order_qr_url(self, order_id):
+    def generate_service_order_qr_url(self, order_id, base_url=None):
         """
         Generar URL para acceso al portal de la orden de servicio
         
         Args:
             order_id (int): ID de la orden de servicio
+            base_url (str, optional): URL base ya leída (generación masiva)
             
         Returns:
             str: URL completa para el portal
         """
-        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        base_url = base_url or self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         portal_url = f"{base_url}/inmoser/service-order/{order_id}"
         return portal_url
 
@@ -89,20 +72,18 @@ class ServiceEquipmentQR(models.Model):
     """
     _inherit = 'inmoser.service.equipment'
     
+    def _get_qr_payload(self, base_url=None):
+        """Texto codificado en el QR del equipo"""
+        self.ensure_one()
+        return self.env['inmoser.qr.generator'].generate_equipment_qr_url(self.id, base_url)
+    
     def action_generate_qr_code(self):
         """Generar código QR para el equipo"""
         for record in self:
             try:
-                # Generar URL del portal
-                qr_generator = self.env['inmoser.qr.generator']
-                portal_url = qr_generator.generate_equipment_qr_url(record.id)
-                
-                # Generar código QR
-                qr_image = qr_generator.generate_qr_code(portal_url)
-                
-                # Actualizar campos
-                record.qr_code = qr_image
-                record.qr_code_text = portal_url
+                # El QR se toma de la caché; solo se renderiza si el texto cambió
+                portal_url = record._get_qr_payload()
+                self.env['inmoser.qr.cache']._get_entry(portal_url)
                 
                 # Mensaje de éxito
                 record.message_post(
@@ -112,13 +93,17 @@ class ServiceEquipmentQR(models.Model):
                 
             except Exception as e:
                 raise UserError(_("Error generating QR code: %s") % str(e))
-    
-    @api.model
-    def create(self, vals):
-        """Generar QR automáticamente al crear equipo"""
-        record = super().create(vals)
-        record.action_generate_qr_code()
-        return record
+
+    def action_print_qr_labels(self):
+        """Imprimir una hoja PDF con las etiquetas QR de los equipos seleccionados"""
+        sheet = self.env['inmoser.qr.label.sheet'].create({
+            'equipment_ids': [(6, 0, self.ids)],
+        })
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/inmoser/qr/labels/%s.pdf' % sheet.id,
+            'target': 'new',
+        }
 
 class ServiceOrderQR(models.Model):
     """
@@ -128,55 +113,44 @@ class ServiceOrderQR(models.Model):
     
     qr_code_order = fields.Binary(
         string='Order QR Code',
+        compute='_compute_qr_code_order',
         help='QR code for accessing this service order'
     )
     
     qr_code_order_text = fields.Char(
         string='Order QR Code URL',
+        compute='_compute_qr_code_order',
         help='URL encoded in the QR code'
     )
     
+    def _compute_qr_code_order(self):
+        """QR de las órdenes desde la caché con una sola búsqueda, sin escribir en ella"""
+        qr_generator = self.env['inmoser.qr.generator']
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        urls = {
+            record: qr_generator.generate_service_order_qr_url(record.id, base_url)
+            for record in self if record.id
+        }
+        images = self.env['inmoser.qr.cache']._get_encoded_images(list(urls.values()), store=False)
+        for record in self:
+            portal_url = urls.get(record)
+            record.qr_code_order_text = portal_url or False
+            record.qr_code_order = images.get(portal_url, False)
+    
     def action_generate_order_qr_code(self):
         """Generar código QR para la orden de servicio"""
         for record in self:
             try:
-                # Generar URL del portal
-                qr_generator = self.env['inmoser.qr.generator']
-                portal_url = qr_generator.generate_service_order_qr_url(record.id)
+                # El texto solo depende del ID: la caché evita volver a renderizar
+                portal_url = self.env['inmoser.qr.generator'].generate_service_order_qr_url(record.id)
+                self.env['inmoser.qr.cache']._get_entry(portal_url)
                 
-                # Generar código QR
-                qr_image = qr_generator.generate_qr_code(portal_url)
-                
-                # Actualizar campos
-                record.qr_code_order = qr_image
-                record.qr_code_order_text = portal_url
-                
-                # Mensaje de éxito
-                record.message_post(
-                    body=_('Order QR Code generated successfully. URL: %s') % portal_url,
-                    message_type='notification'
-                )
+                # Mensaje de éxito (se omite en modo resumen del seguimiento)
+                if not record._is_tracking_digest():
+                    record.message_post(
+                        body=_('Order QR Code generated successfully. URL: %s') % portal_url,
+                        message_type='notification'
+                    )
                 
             except Exception as e:
                 raise UserError(_("Error generating order QR code: %s") % str(e))
-    
-    @api.model
-    def create(self, vals):
-        """Generar QR automáticamente al crear orden"""
-        record = super().create(vals)
-        if record.state != 'draft':
-            record.action_generate_order_qr_code()
-        return record
-    
-    def write(self, vals):
-        """Regenerar QR si cambia información relevante"""
-        result = super().write(vals)
-        
-        # Regenerar QR si cambia el estado o información importante
-        if any(field in vals for field in ['state', 'partner_id', 'equipment_id']):
-            for record in self:
-                if record.state != 'draft':
-                    record.action_generate_order_qr_code()
-        
-        return result
-
@@ -2,8 +2,14 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+import logging
 import re
 
+_logger = logging.getLogger(__name__)
+
+# Campos de dirección que usa la geolocalización
+GEOLOCATION_FIELDS = ('street', 'street2', 'zip', 'city', 'state_id', 'country_id')
+
 
 class ResPartnerExtension(models.Model):
     _inherit = 'res.partner'
@@ -33,6 +39,13 @@ class ResPartnerExtension(models.Model):
         help='Notas adicionales específicas del cliente de servicios'
     )
     
+    x_inmoser_geolocation_failed = fields.Boolean(
+        string='Geolocation Failed',
+        help='La geolocalización de la dirección no dio resultado; se reintenta al cambiar la dirección',
+        readonly=True,
+        copy=False
+    )
+    
     # Relaciones con otros modelos
     x_inmoser_equipment_ids = fields.One2many(
         'inmoser.service.equipment',
@@ -48,30 +61,38 @@ class ResPartnerExtension(models.Model):
         help='Órdenes de servicio de este cliente'
     )
     
-    # Campos computados
+    # Campos computados (almacenados: el inicio del portal los lee sin contar)
     x_inmoser_equipment_count = fields.Integer(
         string='Equipment Count',
         compute='_compute_equipment_count',
+        store=True,
         help='Número total de equipos registrados'
     )
     
     x_inmoser_service_order_count = fields.Integer(
         string='Service Orders Count',
         compute='_compute_service_order_count',
+        store=True,
         help='Número total de órdenes de servicio'
     )
 
-    @api.depends('x_inmoser_equipment_ids')
+    @api.depends('x_inmoser_equipment_ids', 'x_inmoser_equipment_ids.active')
     def _compute_equipment_count(self):
-        """Calcula el número de equipos del cliente"""
+        """Calcula el número de equipos del cliente con una consulta agregada"""
+        counts = dict(self.env['inmoser.service.equipment']._read_group(
+            [('partner_id', 'in', self._origin.ids)], groupby=['partner_id'], aggregates=['__count']
+        ))
         for partner in self:
-            partner.x_inmoser_equipment_count = len(partner.x_inmoser_equipment_ids)
+            partner.x_inmoser_equipment_count = counts.get(partner._origin, 0)
 
     @api.depends('x_inmoser_service_order_ids')
     def _compute_service_order_count(self):
-        """Calcula el número de órdenes de servicio del cliente"""
+        """Calcula el número de órdenes de servicio del cliente con una consulta agregada"""
+        counts = dict(self.env['inmoser.service.order']._read_group(
+            [('partner_id', 'in', self._origin.ids)], groupby=['partner_id'], aggregates=['__count']
+        ))
         for partner in self:
-            partner.x_inmoser_service_order_count = len(partner.x_inmoser_service_order_ids)
+            partner.x_inmoser_service_order_count = counts.get(partner._origin, 0)
 
     @api.model
     def create(self, vals):
@@ -82,12 +103,46 @@ class ResPartnerExtension(models.Model):
 
     def write(self, vals):
         """Override write para generar secuencia si se marca como cliente de servicio"""
+        if any(field in vals for field in GEOLOCATION_FIELDS) and 'x_inmoser_geolocation_failed' not in vals:
+            # Dirección nueva: se puede volver a geolocalizar
+            vals['x_inmoser_geolocation_failed'] = False
         if vals.get('x_inmoser_is_service_client', False):
             for partner in self:
                 if not partner.x_inmoser_client_sequence:
                     vals['x_inmoser_client_sequence'] = self.env['ir.sequence'].next_by_code('inmoser.client.sequence')
         return super(ResPartnerExtension, self).write(vals)
 
+    def _get_route_coordinates(self):
+        """
+        Coordenadas de los clientes para planear rutas
+        
+        Los clientes sin coordenadas se geolocalizan una sola vez si el módulo
+        base_geolocalize está instalado; el resultado queda guardado en el partner.
+        Si la dirección no se encuentra, no se reintenta hasta que cambie.
+        
+        Returns:
+            dict: {partner_id: (latitud, longitud) o None}
+        """
+        missing = self.filtered(
+            lambda p: not p.partner_latitude and not p.partner_longitude and not p.x_inmoser_geolocation_failed
+        )
+        if 'date_localization' in self._fields:
+            missing = missing.filtered(lambda p: not p.date_localization)
+        if missing and hasattr(missing, 'geo_localize'):
+            try:
+                missing.geo_localize()
+            except Exception as e:
+                _logger.warning("Could not geolocate partners %s: %s", missing.ids, e)
+            else:
+                failed = missing.filtered(lambda p: not p.partner_latitude and not p.partner_longitude)
+                failed.sudo().write({'x_inmoser_geolocation_failed': True})
+        
+        return {
+            partner.id: (partner.partner_latitude, partner.partner_longitude)
+            if partner.partner_latitude or partner.partner_longitude else None
+            for partner in self
+        }
+
     @api.constrains('x_inmoser_phone_mobile_2')
     def _check_phone_mobile_2_format(self):
         """Valida el formato del teléfono móvil adicional"""
@@ -2,9 +2,6 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
-import qrcode
-import io
-import base64
 from PIL import Image
 
 
@@ -72,15 +69,14 @@ class ServiceEquipment(models.Model):
     qr_code = fields.Binary(
         string='QR Code',
         help='Código QR del equipo',
-        readonly=True
+        compute='_compute_qr_code_text'
     )
     
     qr_code_text = fields.Char(
         string='QR Code Text',
-        help='Texto codificado en el QR',
+        help='Texto codificado en el QR (URL de la página pública del equipo)',
         readonly=True,
-        compute='_compute_qr_code_text',
-        store=True
+        compute='_compute_qr_code'
     )
     
     # Estado y control
@@ -140,15 +136,6 @@ class ServiceEquipment(models.Model):
         ('unknown', 'Unknown')
     ], string='Warranty Status', compute='_compute_warranty_status')
 
-    @api.depends('partner_id.x_inmoser_client_sequence', 'name')
-    def _compute_qr_code_text(self):
-        """Calcula el texto del código QR combinando secuencias"""
-        for equipment in self:
-            if equipment.partner_id and equipment.partner_id.x_inmoser_client_sequence and equipment.name != _('New'):
-                equipment.qr_code_text = f"{equipment.partner_id.x_inmoser_client_sequence}-{equipment.name}"
-            else:
-                equipment.qr_code_text = False
-
     @api.depends('service_order_ids')
     def _compute_service_order_count(self):
         """Calcula el número de órdenes de servicio"""
@@ -181,58 +168,36 @@ class ServiceEquipment(models.Model):
 
     @api.model
     def create(self, vals):
-        """Override create para generar secuencia y QR automáticamente"""
+        """Override create para generar secuencia"""
         if vals.get('name', _('New')) == _('New'):
             vals['name'] = self.env['ir.sequence'].next_by_code('inmoser.equipment.sequence') or _('New')
         
-        equipment = super(ServiceEquipment, self).create(vals)
-        equipment._generate_qr_code()
-        return equipment
+        # El QR se renderiza bajo demanda desde la caché
+        return super(ServiceEquipment, self).create(vals)
 
-    def write(self, vals):
-        """Override write para regenerar QR si cambian datos relevantes"""
-        result = super(ServiceEquipment, self).write(vals)
-        
-        # Regenerar QR si cambian datos que afectan el código
-        qr_fields = ['partner_id', 'name']
-        if any(field in vals for field in qr_fields):
-            for equipment in self:
-                equipment._generate_qr_code()
-        
-        return result
+    def _compute_qr_code(self):
+        """
+        QR de los equipos desde la caché con una sola búsqueda
+
+        Solo lectura: los que faltan se renderizan sin guardarlos en la caché.
+        """
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        payloads = {equipment: equipment._get_qr_payload(base_url) for equipment in self if equipment.id}
+        images = self.env['inmoser.qr.cache']._get_encoded_images(list(payloads.values()), store=False)
+        for equipment in self:
+            equipment.qr_code = images.get(payloads.get(equipment), False)
+
+    def _compute_qr_code_text(self):
+        """Mismo texto que codifica el QR"""
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        for equipment in self:
+            equipment.qr_code_text = equipment._get_qr_payload(base_url) if equipment.id else False
 
     def _generate_qr_code(self):
-        """Genera el código QR para el equipo"""
+        """Asegura el código QR del equipo en la caché"""
+        qr_cache = self.env['inmoser.qr.cache']
         for equipment in self:
-            if equipment.qr_code_text:
-                try:
-                    # Crear código QR
-                    qr = qrcode.QRCode(
-                        version=1,
-                        error_correction=qrcode.constants.ERROR_CORRECT_L,
-                        box_size=10,
-                        border=4,
-                    )
-                    
-                    # URL del portal del cliente para este equipo
-                    base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
-                    qr_url = f"{base_url}/equipment/{equipment.qr_code_text}"
-                    
-                    qr.add_data(qr_url)
-                    qr.make(fit=True)
-                    
-                    # Crear imagen
-                    img = qr.make_image(fill_color="black", back_color="white")
-                    
-                    # Convertir a base64
-                    buffer = io.BytesIO()
-                    img.save(buffer, format='PNG')
-                    qr_image = base64.b64encode(buffer.getvalue())
-                    
-                    equipment.qr_code = qr_image
-                    
-                except Exception as e:
-                    raise UserError(_('Error generating QR code: %s') % str(e))
+            qr_cache._get_entry(equipment._get_qr_payload())
 
     def action_generate_qr_code(self):
         """Acción manual para regenerar el código QR"""
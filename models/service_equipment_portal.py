@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, tools
+import hashlib
+
+# Campos de las órdenes que muestra la página pública del equipo
+PORTAL_ORDER_FIELDS = [
+    'name', 'state', 'service_type_id', 'assigned_technician_id',
+    'scheduled_date', 'reported_fault', 'total_amount', 'currency_id',
+]
+
+PORTAL_EQUIPMENT_FIELDS = [
+    'name', 'partner_id', 'equipment_type', 'brand', 'model',
+    'location', 'state', 'warranty_expiry',
+]
+
+
+class ServiceEquipmentPortal(models.Model):
+    """
+    Página pública del equipo (escaneo del QR) con caché del contenido renderizado
+
+    El contenido se cachea por versión: cualquier cambio del equipo, su cliente
+    o sus órdenes cambia la versión, por lo que no hace falta vaciar la caché;
+    las entradas antiguas salen por LRU.
+    """
+    _inherit = 'inmoser.service.equipment'
+
+    def _get_portal_version(self):
+        """
+        Versión del contenido público del equipo, en una sola consulta
+
+        Returns:
+            str: Huella de las fechas de modificación, o None si el equipo no existe
+        """
+        self.ensure_one()
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT e.write_date, p.write_date, COUNT(o.id), MAX(o.write_date)
+            FROM inmoser_service_equipment e
+            LEFT JOIN res_partner p ON p.id = e.partner_id
+            LEFT JOIN inmoser_service_order o ON o.equipment_id = e.id
+            WHERE e.id = %s
+            GROUP BY e.write_date, p.write_date
+        """, (self.id,))
+        row = self.env.cr.fetchone()
+        return row and hashlib.sha1(repr(row).encode()).hexdigest()
+
+    def _get_portal_values(self):
+        """Datos de la página con lecturas agrupadas de solo los campos usados"""
+        self.ensure_one()
+        equipment = self.sudo()
+        equipment.fetch(PORTAL_EQUIPMENT_FIELDS)
+        equipment.partner_id.fetch(['name'])
+
+        Order = self.env['inmoser.service.order'].sudo()
+        service_orders = Order.search_fetch(
+            [('equipment_id', '=', equipment.id)], PORTAL_ORDER_FIELDS,
+            order='create_date desc, id desc', limit=10
+        )
+        service_orders.service_type_id.fetch(['name'])
+        service_orders.assigned_technician_id.fetch(['name'])
+        service_orders.currency_id.fetch(['name', 'symbol', 'position', 'rounding'])
+
+        # Estadísticas con una consulta agregada, sin cargar todas las órdenes
+        service_order_count = 0
+        last_service_date = False
+        for state, count, last_date in Order._read_group(
+            [('equipment_id', '=', equipment.id)], groupby=['state'],
+            aggregates=['__count', 'scheduled_date:max']
+        ):
+            service_order_count += count
+            if state == 'done':
+                last_service_date = last_date
+
+        return {
+            'equipment': equipment,
+            'service_orders': service_orders,
+            'current_order': service_orders.filtered(lambda o: o.state not in ['done', 'cancelled'])[:1],
+            'service_order_count': service_order_count,
+            'last_service_date': last_service_date,
+        }
+
+    def _get_portal_content(self, version):
+        """Contenido HTML de la página del equipo para la versión indicada"""
+        return self._render_portal_content(version, fields.Date.context_today(self))
+
+    @tools.ormcache('self.id', 'version', 'self.env.lang', "self.env.context.get('tz')", 'today')
+    def _render_portal_content(self, version, today):
+        """Renderizar el contenido (cacheado por equipo, versión, idioma, zona horaria y día)"""
+        return self.env['ir.qweb']._render(
+            'inmoser_service_order.equipment_portal_content', self._get_portal_values()
+        )
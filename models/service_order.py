@@ -3,10 +3,18 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 from datetime import datetime, timedelta
+import copy
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Caché de corta duración para la matriz de carga de trabajo (tablero de despacho)
+WORKLOAD_CACHE_TTL = 30
+WORKLOAD_CACHE_SIZE = 256
+WORKLOAD_FIELDS = ('assigned_technician_id', 'scheduled_date', 'state', 'service_type_id')
+_workload_cache = {}
+
 
 class ServiceOrder(models.Model):
     _name = 'inmoser.service.order'
@@ -39,6 +47,7 @@ class ServiceOrder(models.Model):
         'inmoser.service.equipment',
         string='Equipment',
         required=True,
+        index=True,
         tracking=True
     )
     
@@ -115,6 +124,7 @@ class ServiceOrder(models.Model):
     
     customer_signature = fields.Binary(
         string='Customer Signature',
+        attachment=True,
         help='Firma digital del cliente'
     )
     
@@ -123,17 +133,42 @@ class ServiceOrder(models.Model):
         help='Motivo del rechazo por parte del cliente'
     )
     
-    # Evidencias fotográficas
-    photo_before = fields.Binary(
+    # Evidencias fotográficas (adjuntos en el filestore, deduplicados por checksum;
+    # las variantes las genera el procesamiento en segundo plano)
+    photo_before = fields.Image(
         string='Photo Before',
         help='Evidencia fotográfica antes del servicio'
     )
     
-    photo_after = fields.Binary(
+    photo_before_1024 = fields.Image(
+        string='Photo Before 1024',
+        readonly=True,
+        help='Variante de 1024 px generada en segundo plano'
+    )
+    
+    photo_before_128 = fields.Image(
+        string='Photo Before 128',
+        readonly=True,
+        help='Variante de 128 px generada en segundo plano'
+    )
+    
+    photo_after = fields.Image(
         string='Photo After',
         help='Evidencia fotográfica después del servicio'
     )
     
+    photo_after_1024 = fields.Image(
+        string='Photo After 1024',
+        readonly=True,
+        help='Variante de 1024 px generada en segundo plano'
+    )
+    
+    photo_after_128 = fields.Image(
+        string='Photo After 128',
+        readonly=True,
+        help='Variante de 128 px generada en segundo plano'
+    )
+    
     # Información financiera
     total_amount = fields.Float(
         string='Total Amount',
@@ -187,7 +222,16 @@ class ServiceOrder(models.Model):
     is_overdue = fields.Boolean(
         string='Is Overdue',
         compute='_compute_is_overdue',
-        help='Indica si el servicio está atrasado'
+        store=True,
+        index=True,
+        help='Indica si el servicio está atrasado (el cron lo actualiza con el paso del tiempo)'
+    )
+    
+    overdue_notified_date = fields.Datetime(
+        string='Overdue Notified For',
+        readonly=True,
+        copy=False,
+        help='Fecha programada cuyo vencimiento ya se notificó en el chatter'
     )
     
     can_start = fields.Boolean(
@@ -275,6 +319,7 @@ class ServiceOrder(models.Model):
             vals['name'] = self.env['ir.sequence'].next_by_code('inmoser.service.order.sequence') or _('New')
         
         order = super(ServiceOrder, self).create(vals)
+        _workload_cache.clear()
         
         # Crear actividad de seguimiento
         order.activity_schedule(
@@ -288,8 +333,8 @@ class ServiceOrder(models.Model):
 
     def write(self, vals):
         """Override write para tracking de cambios importantes"""
-        # Tracking de cambios de estado
-        if 'state' in vals:
+        # Tracking de cambios de estado (en modo resumen ya lo cubre el seguimiento)
+        if 'state' in vals and not self._is_tracking_digest():
             for order in self:
                 old_state = order.state
                 new_state = vals['state']
@@ -301,8 +346,16 @@ class ServiceOrder(models.Model):
                         )
                     )
         
+        if any(field in vals for field in WORKLOAD_FIELDS):
+            _workload_cache.clear()
+        
         return super(ServiceOrder, self).write(vals)
 
+    def unlink(self):
+        """Override unlink para invalidar la caché de carga de trabajo"""
+        _workload_cache.clear()
+        return super(ServiceOrder, self).unlink()
+
     @api.onchange('partner_id')
     def _onchange_partner_id(self):
         """Filtra equipos por cliente seleccionado"""
@@ -650,22 +703,68 @@ Reported Fault: {self.reported_fault}
         Returns:
             dict: Información de carga de trabajo
         """
-        orders = self.search([
-            ('assigned_technician_id', '=', technician_id),
-            ('scheduled_date', '>=', date_from),
-            ('scheduled_date', '<=', date_to),
-            ('state', 'not in', ['cancelled', 'done'])
-        ])
+        matrix = self.get_workload_matrix([technician_id], date_from, date_to)
+        
+        orders_by_state = dict.fromkeys(['assigned', 'in_progress', 'pending_approval', 'accepted'], 0)
+        total_orders = 0
+        total_hours = 0.0
+        for states in matrix.get(technician_id, {}).values():
+            for state, cell in states.items():
+                if state in orders_by_state:
+                    orders_by_state[state] += cell['count']
+                total_orders += cell['count']
+                total_hours += cell['hours']
         
         return {
-            'total_orders': len(orders),
-            'orders_by_state': {
-                state: len(orders.filtered(lambda o: o.state == state))
-                for state in ['assigned', 'in_progress', 'pending_approval', 'accepted']
-            },
-            'total_estimated_hours': sum(
-                order.service_type_id.estimated_duration or 2.0
-                for order in orders
-            )
+            'total_orders': total_orders,
+            'orders_by_state': orders_by_state,
+            'total_estimated_hours': total_hours,
         }
 
+    @api.model
+    def get_workload_matrix(self, technician_ids, date_from, date_to):
+        """
+        Matriz de carga técnico × día × estado con un solo agregado SQL
+        
+        Args:
+            technician_ids (list): IDs de los técnicos
+            date_from (datetime): Fecha de inicio
+            date_to (datetime): Fecha de fin
+            
+        Returns:
+            dict: {técnico: {'YYYY-MM-DD': {estado: {'count': n, 'hours': h}}}}
+        """
+        technician_ids = sorted(set(technician_ids))
+        date_from = fields.Datetime.to_datetime(date_from)
+        date_to = fields.Datetime.to_datetime(date_to)
+        
+        key = (self.env.cr.dbname, self.env.uid, tuple(technician_ids), date_from, date_to)
+        cached = _workload_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return copy.deepcopy(cached[1])
+        
+        matrix = {technician_id: {} for technician_id in technician_ids}
+        if technician_ids:
+            # Días en UTC, igual que el motor de disponibilidad
+            groups = self.with_context(tz='UTC')._read_group(
+                [
+                    ('assigned_technician_id', 'in', technician_ids),
+                    ('scheduled_date', '>=', date_from),
+                    ('scheduled_date', '<=', date_to),
+                    ('state', 'not in', ['cancelled', 'done']),
+                ],
+                groupby=['assigned_technician_id', 'scheduled_date:day', 'state', 'service_type_id'],
+                aggregates=['__count'],
+            )
+            for technician, day, state, service_type, count in groups:
+                cell = matrix[technician.id].setdefault(
+                    fields.Date.to_string(day), {}
+                ).setdefault(state, {'count': 0, 'hours': 0.0})
+                cell['count'] += count
+                cell['hours'] += count * (service_type.estimated_duration or 2.0)
+        
+        if len(_workload_cache) >= WORKLOAD_CACHE_SIZE:
+            _workload_cache.clear()
+        _workload_cache[key] = (time.monotonic() + WORKLOAD_CACHE_TTL, matrix)
+        return copy.deepcopy(matrix)
+
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from datetime import datetime, timedelta
+
+# Límites de la consulta masiva de estados
+MAX_BATCH_IDS = 5000
+MAX_BATCH_LIMIT = 2000
+DEFAULT_BATCH_LIMIT = 500
+
+BATCH_FIELDS = ['name', 'state', 'scheduled_date', 'assigned_technician_id', 'write_date']
+
+# Margen (segundos) por detrás del momento actual que no se entrega todavía
+DEFAULT_SAFETY_LAG = 60
+
+
+class ServiceOrderAPI(models.Model):
+    """
+    Consulta masiva de estados de órdenes para centro de llamadas e integraciones
+
+    Las páginas se recorren por clave (write_date, id) en lugar de OFFSET, de
+    modo que una sincronización completa cuesta lo mismo en cada página y no
+    pierde ni repite órdenes modificadas durante el recorrido.
+
+    write_date es el inicio de la transacción que modificó la orden: una
+    transacción larga puede confirmar después de que el cursor haya pasado su
+    fecha. Por eso, al sincronizar, cada página solo llega hasta "ahora - margen
+    de seguridad"; las órdenes más recientes se entregan en una consulta
+    posterior. Las consultas solo por IDs no aplican el margen.
+    """
+    _inherit = 'inmoser.service.order'
+
+    def init(self):
+        """Índice para recorrer las órdenes por fecha de modificación"""
+        super().init()
+        tools.create_index(
+            self.env.cr, 'inmoser_service_order_write_date_id_index',
+            self._table, ['write_date', 'id']
+        )
+
+    @api.model
+    def _get_status_batch(self, order_ids=None, updated_since=None, cursor=None, limit=None):
+        """
+        Estados compactos de varias órdenes con una búsqueda y una lectura
+
+        Args:
+            order_ids (list, optional): IDs de las órdenes (máximo MAX_BATCH_IDS)
+            updated_since (str, optional): Solo órdenes modificadas desde esta fecha
+            cursor (str, optional): Cursor devuelto por la página anterior
+            limit (int, optional): Órdenes por página (máximo MAX_BATCH_LIMIT)
+
+        Returns:
+            dict: {'orders': [...], 'next': cursor de la siguiente página o None}
+        """
+        limit = min(max(int(limit or DEFAULT_BATCH_LIMIT), 1), MAX_BATCH_LIMIT)
+        domain = []
+        if order_ids is not None:
+            if len(order_ids) > MAX_BATCH_IDS:
+                raise UserError(_('At most %s orders can be requested at once.') % MAX_BATCH_IDS)
+            domain.append(('id', 'in', [int(order_id) for order_id in order_ids]))
+        if updated_since:
+            domain.append(('write_date', '>=', self._parse_api_datetime(updated_since)))
+        if order_ids is None or updated_since or cursor:
+            # Solo al sincronizar: una consulta por IDs devuelve el estado actual
+            domain.append(('write_date', '<', self._get_status_batch_cutoff()))
+
+        # Búsqueda con reglas de acceso; la clave se compara como fila para usar el índice
+        query = self._search(domain, order='write_date, id', limit=limit)
+        if cursor:
+            last_date, last_id = self._parse_cursor(cursor)
+            query.add_where(
+                '("inmoser_service_order"."write_date", "inmoser_service_order"."id") > (%s, %s)',
+                [last_date, last_id]
+            )
+        records = self.browse(query).read(BATCH_FIELDS)
+        orders = [{
+            'id': record['id'],
+            'name': record['name'],
+            'state': record['state'],
+            'scheduled_date': record['scheduled_date'] and record['scheduled_date'].isoformat(),
+            'technician': record['assigned_technician_id'] and record['assigned_technician_id'][1],
+            'write_date': record['write_date'].isoformat(),
+        } for record in records]
+
+        next_cursor = None
+        if len(records) == limit:
+            last = records[-1]
+            # Con microsegundos: la página siguiente empieza justo después
+            next_cursor = '%s,%s' % (last['write_date'].isoformat(), last['id'])
+        return {'orders': orders, 'next': next_cursor}
+
+    @api.model
+    def _get_status_batch_cutoff(self):
+        """Fecha de modificación máxima entregada: ahora menos el margen de seguridad"""
+        lag = int(self.env['ir.config_parameter'].sudo().get_param(
+            'inmoser_service_order.status_api_safety_lag', DEFAULT_SAFETY_LAG))
+        return self.env.cr.now() - timedelta(seconds=lag)
+
+    @api.model
+    def _parse_api_datetime(self, value):
+        """Fecha UTC de la API: formato de Odoo o ISO 8601"""
+        try:
+            return fields.Datetime.to_datetime(value.replace('T', ' ').rstrip('Z')[:19])
+        except ValueError:
+            raise UserError(_('Invalid date: %s') % value)
+
+    @api.model
+    def _parse_cursor(self, cursor):
+        """Separar el cursor 'write_date,id' de la página anterior"""
+        try:
+            last_date, last_id = cursor.rsplit(',', 1)
+            return datetime.fromisoformat(last_date), int(last_id)
+        except ValueError:
+            raise UserError(_('Invalid cursor: %s') % cursor)
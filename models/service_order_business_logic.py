@@ -2,11 +2,23 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from collections import defaultdict
 import logging
+import threading
+import time as timer
+
+from ..tools.availability import TechnicianAvailability, build_slot_grid, is_hour_in_masks
+from ..tools.ranking import TechnicianRanker, geo_point, tokenize
 
 _logger = logging.getLogger(__name__)
 
+# Mensajes de chatter y actividades creados por lote (con commit entre lotes) en los crons
+CRON_CHUNK_SIZE = 500
+
+# Cursor de la última ejecución del cron de recordatorios ("fecha:técnico")
+REMINDER_CURSOR_PARAM = 'inmoser_service_order.reminder_cursor'
+
 class ServiceOrderBusinessLogic(models.Model):
     """
     Extensión del modelo de órdenes de servicio con lógica de negocio avanzada
@@ -19,21 +31,41 @@ class ServiceOrderBusinessLogic(models.Model):
     
     def action_assign_technician(self):
         """Asignar técnico a la orden de servicio"""
+        # Un motor de disponibilidad por día, compartido por todas las órdenes
+        technicians = self._get_candidate_technicians() | self.mapped('assigned_technician_id')
+        availability_by_day = {}
+        dates = [record.scheduled_date.date() for record in self if record.scheduled_date]
+        ranker = dates and self._get_technician_ranker(technicians, min(dates), max(dates))
+        order_features = self._get_ranking_features()
+        
         for record in self:
             if record.state != 'draft':
                 raise UserError(_('Only draft orders can be assigned to technicians.'))
             
+            availability = False
+            if record.scheduled_date:
+                day = record.scheduled_date.date()
+                if day not in availability_by_day:
+                    availability_by_day[day] = self._get_technician_availability(day, technicians)
+                availability = availability_by_day[day]
+            
             if not record.assigned_technician_id:
-                # Buscar técnico disponible automáticamente
-                available_technician = record._find_available_technician()
-                if available_technician:
-                    record.assigned_technician_id = available_technician
+                # Buscar el técnico disponible mejor puntuado
+                technician_id = availability and record._rank_available_technician(
+                    availability, ranker, order_features[record.id], record.scheduled_date
+                )
+                if technician_id:
+                    record.assigned_technician_id = self.env['hr.employee'].browse(technician_id)
                 else:
                     raise UserError(_('No available technicians found for the scheduled date and time.'))
             
             # Validar disponibilidad del técnico
-            if not record._validate_technician_availability():
-                raise UserError(_('The selected technician is not available at the scheduled time.'))
+            if availability:
+                duration = record._get_estimated_duration()
+                if not availability.is_available(record.assigned_technician_id.id, record.scheduled_date, duration):
+                    raise UserError(_('The selected technician is not available at the scheduled time.'))
+                availability.book(record.assigned_technician_id.id, record.scheduled_date, duration)
+                ranker.add_location(record.assigned_technician_id.id, day, order_features[record.id][3])
             
             record.state = 'assigned'
             record._send_assignment_notification()
@@ -161,67 +193,122 @@ class ServiceOrderBusinessLogic(models.Model):
     # MÉTODOS DE LÓGICA DE NEGOCIO
     # ==========================================
     
-    def _find_available_technician(self):
-        """Encontrar técnico disponible para la fecha programada"""
-        if not self.scheduled_date:
-            return False
-        
-        # Buscar técnicos activos
-        technicians = self.env['hr.employee'].search([
+    def _get_candidate_technicians(self):
+        """Técnicos activos candidatos a recibir órdenes"""
+        return self.env['hr.employee'].search([
             ('x_inmoser_is_technician', '=', True),
             ('active', '=', True)
         ])
+    
+    def _get_estimated_duration(self):
+        """Duración estimada de la orden en horas"""
+        if len(self) != 1:
+            return 2.0
+        return self.service_type_id.estimated_duration or 2.0
+    
+    def _load_booked_intervals(self, technicians, date_from, date_to):
+        """
+        Intervalos reservados de los técnicos entre dos días (ambos incluidos)
         
-        for technician in technicians:
-            if self._is_technician_available(technician, self.scheduled_date):
-                return technician
+        Se cargan con una sola consulta agrupada por técnico y tipo de servicio;
+        cada reserva ocupa [scheduled_date, scheduled_date + duración estimada).
+        Las órdenes de self se excluyen para que una orden no se bloquee a sí
+        misma al validar su propia asignación.
         
-        return False
-    
-    def _is_technician_available(self, technician, scheduled_date):
-        """Verificar si un técnico está disponible en una fecha específica"""
-        if not scheduled_date or not technician:
-            return False
+        Returns:
+            dict: {technician_id: [(inicio, fin), ...]}
+        """
+        bookings = defaultdict(list)
+        if not technicians:
+            return bookings
         
-        # Verificar horarios disponibles del técnico
-        if not self._check_technician_schedule(technician, scheduled_date):
-            return False
+        groups = self.read_group([
+            ('assigned_technician_id', 'in', technicians.ids),
+            ('scheduled_date', '>=', datetime.combine(date_from, time.min)),
+            ('scheduled_date', '<', datetime.combine(date_to, time.min) + timedelta(days=1)),
+            ('state', 'not in', ['done', 'cancelled']),
+            ('id', 'not in', self._origin.ids),
+        ], ['scheduled_date:array_agg'], ['assigned_technician_id', 'service_type_id'], lazy=False)
         
-        # Verificar órdenes existentes del técnico
-        existing_orders = self.search([
-            ('assigned_technician_id', '=', technician.id),
-            ('scheduled_date', '=', scheduled_date),
-            ('state', 'not in', ['done', 'cancelled'])
-        ])
+        service_types = self.env['inmoser.service.type'].browse(
+            {group['service_type_id'][0] for group in groups if group['service_type_id']}
+        )
+        durations = {service_type.id: service_type.estimated_duration or 2.0 for service_type in service_types}
         
-        # Verificar límite diario de órdenes
-        daily_orders = self.search_count([
-            ('assigned_technician_id', '=', technician.id),
-            ('scheduled_date', '>=', scheduled_date.replace(hour=0, minute=0, second=0)),
-            ('scheduled_date', '<=', scheduled_date.replace(hour=23, minute=59, second=59)),
-            ('state', 'not in', ['done', 'cancelled'])
-        ])
+        for group in groups:
+            duration = timedelta(hours=durations.get(group['service_type_id'] and group['service_type_id'][0], 2.0))
+            bookings[group['assigned_technician_id'][0]].extend(
+                (start, start + duration) for start in group['scheduled_date'] if start
+            )
+        return bookings
+    
+    def _get_technician_availability(self, target_date, technicians=None):
+        """
+        Construir el motor de disponibilidad para el día de una fecha
+        
+        Args:
+            target_date (datetime|date): Fecha a consultar
+            technicians (recordset, optional): Técnicos candidatos
+            
+        Returns:
+            TechnicianAvailability: Motor de disponibilidad del día
+        """
+        if technicians is None:
+            technicians = self._get_candidate_technicians()
         
-        max_daily = technician.x_inmoser_max_daily_orders or 8
+        day = target_date.date() if isinstance(target_date, datetime) else target_date
         
-        return len(existing_orders) == 0 and daily_orders < max_daily
+        return TechnicianAvailability(
+            day,
+            technicians.ids,
+            self._load_booked_intervals(technicians, day, day),
+            {technician.id: technician.x_inmoser_max_daily_orders or 8 for technician in technicians},
+            technicians._get_working_hours(),
+        )
     
-    def _check_technician_schedule(self, technician, scheduled_date):
-        """Verificar si la fecha está dentro del horario del técnico"""
-        if not technician.x_inmoser_available_hours:
-            return True  # Sin restricciones de horario
+    def _get_free_slot_grid(self, date_from, days, technicians=None):
+        """
+        Rejilla de inicios libres (técnico × franja de 30 minutos) para varios días
         
-        # Parsear horarios disponibles (formato: "10-12,12-14,15-17")
-        available_hours = technician.x_inmoser_available_hours.split(',')
-        scheduled_hour = scheduled_date.hour
+        Args:
+            date_from (date): Primer día de la rejilla
+            days (int): Número de días
+            technicians (recordset, optional): Técnicos candidatos
+            
+        Returns:
+            dict: {technician_id: [máscara de inicios por día]}
+        """
+        if technicians is None:
+            technicians = self._get_candidate_technicians() | self.assigned_technician_id
+        
+        return build_slot_grid(
+            date_from,
+            days,
+            technicians._get_working_hours(),
+            self._load_booked_intervals(technicians, date_from, date_from + timedelta(days=days - 1)),
+            {technician.id: technician.x_inmoser_max_daily_orders or 8 for technician in technicians},
+            self._get_estimated_duration(),
+        )
+    
+    def _find_available_technician(self):
+        """Encontrar técnico disponible para la fecha programada"""
+        if not self.scheduled_date:
+            return False
         
-        for time_slot in available_hours:
-            if '-' in time_slot:
-                start_hour, end_hour = map(int, time_slot.strip().split('-'))
-                if start_hour <= scheduled_hour < end_hour:
-                    return True
+        return self._find_available_technician_for_date(self.scheduled_date)
+    
+    def _is_technician_available(self, technician, scheduled_date):
+        """Verificar si un técnico está disponible en una fecha específica"""
+        if not scheduled_date or not technician:
+            return False
         
-        return False
+        availability = self._get_technician_availability(scheduled_date, technician)
+        return availability.is_available(technician.id, scheduled_date, self._get_estimated_duration())
+    
+    def _check_technician_schedule(self, technician, scheduled_date):
+        """Verificar si la fecha está dentro del horario del técnico"""
+        working_hours = technician._get_working_hours()
+        return is_hour_in_masks(working_hours[technician.id], scheduled_date)
     
     def _validate_technician_availability(self):
         """Validar disponibilidad del técnico asignado"""
@@ -309,23 +396,88 @@ class ServiceOrderBusinessLogic(models.Model):
             self.state = 'assigned'
             
             # Notificar reagendamiento
-            self.message_post(
-                body=_('Service automatically rescheduled to %s due to parts availability.') % new_date,
-                message_type='notification'
+            self._post_digest_note(
+                _('Service automatically rescheduled to %s due to parts availability.') % new_date
             )
     
     def _find_available_technician_for_date(self, target_date):
-        """Encontrar técnico disponible para una fecha específica"""
-        technicians = self.env['hr.employee'].search([
-            ('x_inmoser_is_technician', '=', True),
-            ('active', '=', True)
-        ])
+        """Encontrar el técnico disponible mejor puntuado para una fecha específica"""
+        technicians = self._get_candidate_technicians()
+        day = target_date.date()
+        availability = self._get_technician_availability(day, technicians)
+        features = self._get_ranking_features()[self.id]
+        # Evaluar la orden en la nueva fecha
+        features = features[:2] + (day,) + features[3:]
+        technician_id = self._rank_available_technician(
+            availability, self._get_technician_ranker(technicians, day, day), features, target_date
+        )
         
-        for technician in technicians:
-            if self._is_technician_available(technician, target_date):
-                return technician
+        return self.env['hr.employee'].browse(technician_id) if technician_id else False
+    
+    # ==========================================
+    # RANKING DE TÉCNICOS
+    # ==========================================
+    
+    def _get_ranking_features(self):
+        """
+        Rasgos de las órdenes para el ranking, en una sola pasada por el lote
+        
+        Returns:
+            dict: {order_id: (palabras, prioridad, día, punto_cliente)}
+        """
+        return {
+            order.id: (
+                tokenize(' '.join(filter(None, [
+                    order.service_type_id.name,
+                    order.equipment_id.equipment_type,
+                    order.equipment_id.brand,
+                ]))),
+                order.priority,
+                order.scheduled_date.date() if order.scheduled_date else None,
+                geo_point(order.partner_id.partner_latitude, order.partner_id.partner_longitude),
+            )
+            for order in self
+        }
+    
+    def _get_technician_ranker(self, technicians, date_from, date_to):
+        """
+        Ranking de técnicos con sus rasgos y las rutas ya programadas del período
+        
+        Los clientes de cada técnico por día se cargan con una sola consulta
+        agrupada; las órdenes de self no cuentan como parte de la ruta.
+        """
+        groups = self.read_group([
+            ('assigned_technician_id', 'in', technicians.ids),
+            ('scheduled_date', '>=', datetime.combine(date_from, time.min)),
+            ('scheduled_date', '<', datetime.combine(date_to, time.min) + timedelta(days=1)),
+            ('state', 'not in', ['done', 'cancelled']),
+            ('id', 'not in', self._origin.ids),
+        ], ['scheduled_date:array_agg'], ['assigned_technician_id', 'partner_id'], lazy=False)
+        
+        partners = self.env['res.partner'].browse(
+            {group['partner_id'][0] for group in groups if group['partner_id']}
+        )
+        points = {
+            partner.id: geo_point(partner.partner_latitude, partner.partner_longitude)
+            for partner in partners
+        }
+        
+        ranker = TechnicianRanker(technicians._get_ranking_features())
+        for group in groups:
+            location = group['partner_id'] and points.get(group['partner_id'][0])
+            for start in group['scheduled_date']:
+                if start:
+                    ranker.add_location(group['assigned_technician_id'][0], start.date(), location)
+        return ranker
+    
+    def _rank_available_technician(self, availability, ranker, features, scheduled_date):
+        """Mejor técnico libre a la hora indicada según el ranking, o False"""
+        candidates = availability.available_technicians(scheduled_date, self._get_estimated_duration())
+        if not candidates:
+            return False
         
-        return False
+        load_ratios = {technician_id: availability.load_ratio(technician_id) for technician_id in candidates}
+        return ranker.best(candidates, features, load_ratios)
     
     # ==========================================
     # MÉTODOS DE NOTIFICACIONES
@@ -333,49 +485,31 @@ class ServiceOrderBusinessLogic(models.Model):
     
     def _send_assignment_notification(self):
         """Enviar notificación de asignación"""
-        template = self.env.ref('inmoser_service_order.email_template_service_assigned', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        self.env['inmoser.notification.outbox']._enqueue('inmoser_service_order.email_template_service_assigned', self)
     
     def _send_service_started_notification(self):
         """Enviar notificación de inicio de servicio"""
-        self.message_post(
-            body=_('Service started by technician %s') % self.assigned_technician_id.name,
-            message_type='notification'
-        )
+        self._post_digest_note(_('Service started by technician %s') % self.assigned_technician_id.name)
     
     def _send_approval_request_notification(self):
         """Enviar notificación de solicitud de aprobación"""
-        template = self.env.ref('inmoser_service_order.email_template_approval_request', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        self.env['inmoser.notification.outbox']._enqueue('inmoser_service_order.email_template_approval_request', self)
     
     def _send_acceptance_notification(self):
         """Enviar notificación de aceptación"""
-        self.message_post(
-            body=_('Service approved by customer'),
-            message_type='notification'
-        )
+        self._post_digest_note(_('Service approved by customer'))
     
     def _send_rejection_notification(self):
         """Enviar notificación de rechazo"""
-        self.message_post(
-            body=_('Service rejected by customer. Reason: %s') % self.rejection_reason,
-            message_type='notification'
-        )
+        self._post_digest_note(_('Service rejected by customer. Reason: %s') % self.rejection_reason)
     
     def _send_completion_notification(self):
         """Enviar notificación de finalización"""
-        template = self.env.ref('inmoser_service_order.email_template_service_completed', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        self.env['inmoser.notification.outbox']._enqueue('inmoser_service_order.email_template_service_completed', self)
     
     def _send_cancellation_notification(self):
         """Enviar notificación de cancelación"""
-        self.message_post(
-            body=_('Service order cancelled'),
-            message_type='notification'
-        )
+        self._post_digest_note(_('Service order cancelled'))
     
     # ==========================================
     # VALIDACIONES
@@ -384,15 +518,31 @@ class ServiceOrderBusinessLogic(models.Model):
     @api.constrains('scheduled_date', 'assigned_technician_id')
     def _check_technician_availability_constraint(self):
         """Validar disponibilidad del técnico al guardar"""
-        for record in self:
-            if record.assigned_technician_id and record.scheduled_date:
-                if not record._validate_technician_availability():
-                    raise ValidationError(
-                        _('Technician %s is not available on %s') % (
-                            record.assigned_technician_id.name,
-                            record.scheduled_date
-                        )
+        if self.env.context.get('inmoser_defer_availability_check'):
+            # Reprogramación por lotes: se valida todo el lote al final
+            return
+        records = self.filtered(lambda r: r.assigned_technician_id and r.scheduled_date)
+        technicians = records.mapped('assigned_technician_id')
+        availability_by_day = {}
+        
+        # Un motor por día para todo el lote; las órdenes del lote se reservan
+        # en memoria para detectar también conflictos entre ellas
+        for record in records.sorted('scheduled_date'):
+            day = record.scheduled_date.date()
+            if day not in availability_by_day:
+                availability_by_day[day] = records._get_technician_availability(day, technicians)
+            availability = availability_by_day[day]
+            duration = record._get_estimated_duration()
+            
+            if not availability.is_available(record.assigned_technician_id.id, record.scheduled_date, duration):
+                raise ValidationError(
+                    _('Technician %s is not available on %s') % (
+                        record.assigned_technician_id.name,
+                        record.scheduled_date
                     )
+                )
+            if record.state not in ['done', 'cancelled']:
+                availability.book(record.assigned_technician_id.id, record.scheduled_date, duration)
     
     @api.constrains('refaction_line_ids')
     def _check_refaction_lines(self):
@@ -411,39 +561,183 @@ class ServiceOrderBusinessLogic(models.Model):
     
     @api.model
     def _cron_check_overdue_orders(self):
-        """Cron job para marcar órdenes vencidas"""
-        overdue_orders = self.search([
-            ('scheduled_date', '<', fields.Datetime.now()),
-            ('state', 'in', ['draft', 'assigned']),
-            ('is_overdue', '=', False)
-        ])
+        """
+        Cron job para marcar y notificar órdenes vencidas
         
-        for order in overdue_orders:
-            order.is_overdue = True
-            order.message_post(
-                body=_('Service order is now overdue'),
-                message_type='notification'
-            )
+        La notificación se registra aparte del campo calculado is_overdue (que
+        ya se activa al crear o reprogramar una orden en el pasado): se guarda la
+        fecha programada notificada, de modo que cada vencimiento se notifica una
+        sola vez, también tras reprogramar. Cada lote se marca y recibe sus
+        mensajes de chatter en la misma transacción, con commit al final.
+        """
+        started = timer.monotonic()
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        now = fields.Datetime.now()
+        
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT id FROM inmoser_service_order
+            WHERE scheduled_date < %s
+              AND state NOT IN ('done', 'cancelled')
+              AND overdue_notified_date IS DISTINCT FROM scheduled_date
+            ORDER BY id
+        """, (now,))
+        candidate_ids = [row[0] for row in self.env.cr.fetchall()]
+        
+        author_id = self.env.user.partner_id.id
+        note_subtype_id = self.env.ref('mail.mt_note').id
+        body = _('Service order is now overdue')
+        flagged = notified = 0
+        for index in range(0, len(candidate_ids), CRON_CHUNK_SIZE):
+            # Las condiciones se repiten por si la orden cambió tras la selección
+            self.env.cr.execute("""
+                UPDATE inmoser_service_order
+                SET is_overdue = TRUE, overdue_notified_date = scheduled_date
+                WHERE id IN %s
+                  AND scheduled_date < %s
+                  AND state NOT IN ('done', 'cancelled')
+                  AND overdue_notified_date IS DISTINCT FROM scheduled_date
+                RETURNING id, state
+            """, (tuple(candidate_ids[index:index + CRON_CHUNK_SIZE]), now))
+            rows = self.env.cr.fetchall()
+            self.invalidate_model(['is_overdue', 'overdue_notified_date'])
+            
+            # Solo las órdenes aún sin atender se notifican en el chatter
+            order_ids = sorted(order_id for order_id, state in rows if state in ['draft', 'assigned'])
+            if order_ids:
+                self.env['mail.message'].sudo().create([{
+                    'model': self._name,
+                    'res_id': order_id,
+                    'body': body,
+                    'message_type': 'notification',
+                    'subtype_id': note_subtype_id,
+                    'author_id': author_id,
+                } for order_id in order_ids])
+            flagged += len(rows)
+            notified += len(order_ids)
+            if auto_commit:
+                self.env.cr.commit()
+        
+        _logger.info(
+            "Overdue check: %s orders flagged, %s chatter messages in %.2fs",
+            flagged, notified, timer.monotonic() - started
+        )
+        return flagged
     
     @api.model
     def _cron_send_daily_reminders(self):
-        """Cron job para enviar recordatorios diarios"""
+        """
+        Cron job para enviar recordatorios diarios
+        
+        Las actividades se crean en lotes (un create por lote) con commit entre
+        lotes. El último técnico procesado se guarda como cursor, de modo que una
+        ejecución interrumpida continúa desde él; al terminar la ejecución el
+        cursor se borra. Las órdenes y técnicos que ya tienen el recordatorio
+        del día se omiten, así que repetir la ejecución no lo duplica. Los
+        técnicos con más órdenes que el umbral reciben una sola actividad resumen.
+        """
+        started = timer.monotonic()
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        params = self.env['ir.config_parameter'].sudo()
         tomorrow = fields.Date.today() + timedelta(days=1)
+        threshold = int(params.get_param('inmoser_service_order.reminder_digest_threshold', 10))
+        
+        # Cursor "fecha:técnico" de la última ejecución
+        cursor_date, __, cursor_technician = (params.get_param(REMINDER_CURSOR_PARAM) or '').partition(':')
+        last_technician_id = int(cursor_technician) if cursor_date == str(tomorrow) else 0
         
         # Recordatorios para técnicos
         orders_tomorrow = self.search([
             ('scheduled_date', '>=', tomorrow),
             ('scheduled_date', '<', tomorrow + timedelta(days=1)),
-            ('state', '=', 'assigned')
-        ])
+            ('state', '=', 'assigned'),
+            ('assigned_technician_id', '>', last_technician_id),
+        ], order='assigned_technician_id, scheduled_date, id')
         
+        orders_by_technician = defaultdict(lambda: self.browse())
         for order in orders_tomorrow:
-            order.activity_schedule(
-                'mail.mail_activity_data_todo',
-                user_id=order.assigned_technician_id.user_id.id,
-                summary=_('Service Order Tomorrow: %s') % order.name,
-                note=_('You have a service scheduled for tomorrow: %s at %s') % (
-                    order.partner_id.name, order.scheduled_date
-                )
+            orders_by_technician[order.assigned_technician_id] |= order
+        
+        # Tipo de actividad, modelos y fecha límite se resuelven una sola vez
+        activity_type = self.env.ref('mail.mail_activity_data_todo')
+        date_deadline = activity_type._get_date_deadline()
+        order_model_id = self.env['ir.model']._get_id(self._name)
+        employee_model_id = self.env['ir.model']._get_id('hr.employee')
+        
+        # Recordatorios ya creados hoy (ejecución repetida): una sola búsqueda
+        reminded = set()
+        prefixes = (_('Service Order Tomorrow: %s') % '', _('Service Orders Tomorrow: %s') % '')
+        existing = self.env['mail.activity'].search_fetch([
+            ('activity_type_id', '=', activity_type.id),
+            ('date_deadline', '=', date_deadline),
+            '|',
+            '&', ('res_model', '=', self._name), ('res_id', 'in', orders_tomorrow.ids),
+            '&', ('res_model', '=', 'hr.employee'), ('res_id', 'in', orders_tomorrow.assigned_technician_id.ids),
+        ], ['res_model', 'res_id', 'summary'])
+        for activity in existing:
+            if (activity.summary or '').startswith(prefixes):
+                reminded.add((activity.res_model, activity.res_id))
+        for technician in list(orders_by_technician):
+            if ('hr.employee', technician.id) in reminded:
+                del orders_by_technician[technician]
+                continue
+            orders = orders_by_technician[technician].filtered(
+                lambda order: (self._name, order.id) not in reminded
             )
+            if orders:
+                orders_by_technician[technician] = orders
+            else:
+                del orders_by_technician[technician]
+        
+        values = []
+        created = 0
+        technicians = sorted(orders_by_technician, key=lambda technician: technician.id)
+        for technician in technicians:
+            orders = orders_by_technician[technician]
+            common = {
+                'activity_type_id': activity_type.id,
+                'user_id': technician.user_id.id or self.env.uid,
+                'date_deadline': date_deadline,
+            }
+            if len(orders) > threshold:
+                values.append(dict(
+                    common,
+                    res_model_id=employee_model_id,
+                    res_id=technician.id,
+                    summary=_('Service Orders Tomorrow: %s') % len(orders),
+                    note='<br/>'.join(
+                        _('%s: %s at %s') % (order.name, order.partner_id.name, order.scheduled_date)
+                        for order in orders
+                    ),
+                ))
+            else:
+                values.extend(dict(
+                    common,
+                    res_model_id=order_model_id,
+                    res_id=order.id,
+                    summary=_('Service Order Tomorrow: %s') % order.name,
+                    note=_('You have a service scheduled for tomorrow: %s at %s') % (
+                        order.partner_id.name, order.scheduled_date
+                    ),
+                ) for order in orders)
+            
+            # Los lotes se cierran entre técnicos para que el cursor sea exacto
+            if len(values) >= CRON_CHUNK_SIZE or technician == technicians[-1]:
+                self.env['mail.activity'].create(values)
+                created += len(values)
+                values = []
+                params.set_param(REMINDER_CURSOR_PARAM, '%s:%s' % (tomorrow, technician.id))
+                if auto_commit:
+                    self.env.cr.commit()
+        
+        # Ejecución completa: el cursor solo sirve para retomar una interrumpida
+        params.set_param(REMINDER_CURSOR_PARAM, False)
+        if auto_commit:
+            self.env.cr.commit()
+        
+        _logger.info(
+            "Daily reminders: %s activities for %s technicians in %.2fs",
+            created, len(technicians), timer.monotonic() - started
+        )
+        return created
 
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from datetime import datetime, time, timedelta
+from collections import defaultdict
+import logging
+import time as timer
+
+from ..tools.dispatch import solve_dispatch
+
+_logger = logging.getLogger(__name__)
+
+class ServiceOrderDispatch(models.Model):
+    """
+    Despacho masivo de órdenes de servicio en borrador
+    """
+    _inherit = 'inmoser.service.order'
+    
+    # ==========================================
+    # ACCIONES Y CRON
+    # ==========================================
+    
+    def action_batch_dispatch(self):
+        """Despachar las órdenes seleccionadas en una sola pasada"""
+        result = self.filtered(lambda o: o.state == 'draft')._batch_dispatch()
+        
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Batch Dispatch'),
+                'message': _('%(dispatched)s orders dispatched, %(unassigned)s without technician, '
+                             'in %(seconds).2fs (%(throughput).0f orders/s).') % result,
+                'type': 'success' if not result['unassigned'] else 'warning',
+                'sticky': bool(result['unassigned']),
+            }
+        }
+    
+    @api.model
+    def _cron_batch_dispatch(self):
+        """Cron job para despachar las órdenes en borrador del horizonte configurado"""
+        horizon_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'inmoser_service_order.dispatch_horizon_days', 2
+        ))
+        now = fields.Datetime.now()
+        
+        orders = self.search([
+            ('state', '=', 'draft'),
+            ('assigned_technician_id', '=', False),
+            ('scheduled_date', '>=', now),
+            ('scheduled_date', '<', datetime.combine(now.date(), time.min) + timedelta(days=horizon_days + 1)),
+        ])
+        
+        result = orders._batch_dispatch()
+        _logger.info(
+            "Batch dispatch: %(dispatched)s orders dispatched, %(unassigned)s unassigned "
+            "in %(seconds).2fs (%(throughput).0f orders/s)", result
+        )
+        return result
+    
+    # ==========================================
+    # LÓGICA DE DESPACHO
+    # ==========================================
+    
+    def _batch_dispatch(self):
+        """
+        Asignar técnicos a un conjunto de órdenes en borrador
+        
+        Las reservas existentes se cargan en una sola lectura, la asignación se
+        resuelve en memoria y los resultados se escriben con un write por técnico.
+        Las notificaciones se encolan en lugar de enviarse en la transacción.
+        
+        Returns:
+            dict: Órdenes despachadas, sin asignar, segundos y órdenes por segundo
+        """
+        started = timer.monotonic()
+        
+        orders = self.filtered(lambda o: o.state == 'draft' and o.scheduled_date and not o.assigned_technician_id)
+        assignments = {}
+        unassigned = []
+        
+        if orders:
+            technicians = self._get_candidate_technicians()
+            working_hours = technicians._get_working_hours()
+            
+            order_data = [
+                (order.id, order.scheduled_date, order._get_estimated_duration(), order.priority)
+                for order in orders
+            ]
+            
+            date_from = min(data[1] for data in order_data).date()
+            date_to = max(data[1] for data in order_data).date()
+            
+            # Puntajes de todas las órdenes contra todos los técnicos en una pasada
+            ranker = orders._get_technician_ranker(technicians, date_from, date_to)
+            scores = ranker.score_matrix(orders._get_ranking_features(), technicians.ids)
+            
+            assignments, unassigned = solve_dispatch(
+                order_data,
+                [
+                    (technician.id, technician.x_inmoser_max_daily_orders or 8, working_hours[technician.id])
+                    for technician in technicians
+                ],
+                orders._load_booked_intervals(technicians, date_from, date_to),
+                scores,
+            )
+            
+            # Un write por técnico
+            orders_by_technician = defaultdict(list)
+            for order_id, technician_id in assignments.items():
+                orders_by_technician[technician_id].append(order_id)
+            
+            for technician_id, order_ids in orders_by_technician.items():
+                self.browse(order_ids).write({
+                    'assigned_technician_id': technician_id,
+                    'state': 'assigned',
+                })
+            
+            dispatched = self.browse(list(assignments))
+            dispatched._schedule_assignment_activities()
+            dispatched._queue_assignment_notifications()
+        
+        seconds = timer.monotonic() - started
+        return {
+            'dispatched': len(assignments),
+            'unassigned': len(unassigned) + len(self) - len(orders),
+            'seconds': seconds,
+            'throughput': len(assignments) / seconds if seconds else 0.0,
+        }
+    
+    @api.model
+    def _write_scheduled_dates(self, schedule, reason=None):
+        """
+        Escribir nuevas fechas programadas por el ORM
+        
+        Cada orden pasa por write (seguimiento en el chatter, aviso al portal,
+        cachés y resumen diario). Un write validaría cada cambio contra las
+        fechas aún no movidas del resto del lote (por ejemplo, al intercambiar
+        dos horarios), por eso la validación de solapes se pospone y se hace
+        una sola vez al final.
+        
+        Args:
+            schedule (dict): {orden: nueva scheduled_date}
+            reason (str, optional): Motivo comunicado al cliente y al técnico
+        """
+        orders = self.browse([order.id for order in schedule])
+        deferred = self.with_context(inmoser_defer_availability_check=True)
+        for order, scheduled_date in schedule.items():
+            deferred.browse(order.id).write({'scheduled_date': scheduled_date})
+        
+        orders._validate_fields(['scheduled_date'])
+        orders._notify_rescheduled(reason or _('Route optimization'))
+    
+    def _notify_rescheduled(self, reason):
+        """Avisar al cliente (correo en la bandeja) y al técnico (actividad) de la nueva hora"""
+        if not self:
+            return
+        self.env['inmoser.notification.outbox']._enqueue(
+            'inmoser_service_order.email_template_service_rescheduled', self, {'reason': reason}
+        )
+        
+        activity_type = self.env.ref('mail.mail_activity_data_todo')
+        res_model_id = self.env['ir.model']._get_id(self._name)
+        date_deadline = activity_type._get_date_deadline()
+        self.env['mail.activity'].create([{
+            'activity_type_id': activity_type.id,
+            'res_model_id': res_model_id,
+            'res_id': order.id,
+            'user_id': order.assigned_technician_id.user_id.id,
+            'date_deadline': date_deadline,
+            'summary': _('Service Order Rescheduled: %s') % order.name,
+            'note': _('Service order %s has been rescheduled to %s. Reason: %s') % (
+                order.name, order.scheduled_date.strftime('%Y-%m-%d %H:%M'), reason
+            ),
+        } for order in self if order.assigned_technician_id.user_id])
+    
+    def _schedule_assignment_activities(self):
+        """Crear las actividades de asignación de todas las órdenes en un solo create"""
+        if not self:
+            return self.env['mail.activity']
+        
+        activity_type = self.env.ref('mail.mail_activity_data_todo')
+        res_model_id = self.env['ir.model']._get_id(self._name)
+        date_deadline = activity_type._get_date_deadline()
+        
+        return self.env['mail.activity'].create([{
+            'activity_type_id': activity_type.id,
+            'res_model_id': res_model_id,
+            'res_id': order.id,
+            'user_id': order.assigned_technician_id.user_id.id or self.env.uid,
+            'date_deadline': date_deadline,
+            'summary': _('Service Order Assigned: %s') % order.name,
+            'note': _('You have been assigned to service order %s for customer %s. Equipment: %s') % (
+                order.name, order.partner_id.name, order.equipment_id.name
+            ),
+        } for order in self])
+    
+    def _queue_assignment_notifications(self):
+        """Encolar las notificaciones de asignación sin esperar al servidor de correo"""
+        self.env['inmoser.notification.outbox']._enqueue('inmoser_service_order.email_template_service_assigned', self)
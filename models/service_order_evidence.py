@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools.mimetypes import guess_mimetype
+from datetime import timedelta
+import hashlib
+import logging
+import os
+import uuid
+
+_logger = logging.getLogger(__name__)
+
+# Bloque de lectura/escritura al recibir y verificar archivos
+BLOCK_SIZE = 1024 * 1024
+
+
+class ServiceOrderEvidence(models.Model):
+    """
+    Galería de fotos de evidencia de una orden de servicio
+    """
+    _name = 'inmoser.service.order.evidence'
+    _description = 'Service Order Evidence'
+    _order = 'order_id, kind, id'
+
+    order_id = fields.Many2one(
+        'inmoser.service.order',
+        string='Service Order',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    name = fields.Char(
+        string='File Name',
+        required=True
+    )
+
+    kind = fields.Selection([
+        ('before', 'Before Service'),
+        ('after', 'After Service'),
+        ('other', 'Other')
+    ], string='Kind', default='other', required=True)
+
+    attachment_id = fields.Many2one(
+        'ir.attachment',
+        string='Attachment',
+        ondelete='set null',
+        readonly=True
+    )
+
+    mimetype = fields.Char(
+        string='Mime Type',
+        related='attachment_id.mimetype'
+    )
+
+    file_size = fields.Integer(
+        string='File Size',
+        readonly=True
+    )
+
+    checksum = fields.Char(
+        string='SHA-256',
+        readonly=True,
+        help='Suma SHA-256 verificada al terminar la subida'
+    )
+
+    @api.constrains('order_id')
+    def _check_photo_limit(self):
+        """Validar que el tipo de servicio admite fotos y su límite por orden"""
+        for order in self.mapped('order_id'):
+            service_type = order.service_type_id
+            if not service_type.allow_photos:
+                raise ValidationError(_('Service type %s does not allow photos.') % service_type.name)
+            if service_type.max_photos and order.evidence_count > service_type.max_photos:
+                raise ValidationError(_(
+                    'Service order %s already has the maximum of %s evidence photos.'
+                ) % (order.name, service_type.max_photos))
+
+    def unlink(self):
+        """Eliminar también los archivos adjuntos"""
+        attachments = self.mapped('attachment_id')
+        result = super().unlink()
+        attachments.sudo().unlink()
+        return result
+
+
+class EvidenceUpload(models.Model):
+    """
+    Subida por partes y reanudable de una foto de evidencia
+
+    Las partes se escriben en un archivo temporal dentro del filestore; al
+    terminar se verifica la suma SHA-256 leyendo el archivo por bloques y se
+    mueve a su ubicación definitiva sin cargarlo completo en memoria.
+    """
+    _name = 'inmoser.evidence.upload'
+    _description = 'Evidence Upload Session'
+
+    token = fields.Char(
+        string='Token',
+        required=True,
+        index=True,
+        copy=False,
+        default=lambda self: uuid.uuid4().hex
+    )
+
+    order_id = fields.Many2one(
+        'inmoser.service.order',
+        string='Service Order',
+        required=True,
+        ondelete='cascade'
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='User',
+        required=True,
+        default=lambda self: self.env.user
+    )
+
+    filename = fields.Char(
+        string='File Name',
+        required=True
+    )
+
+    kind = fields.Selection([
+        ('before', 'Before Service'),
+        ('after', 'After Service'),
+        ('other', 'Other')
+    ], string='Kind', default='other', required=True)
+
+    total_size = fields.Integer(
+        string='Total Size',
+        required=True
+    )
+
+    checksum = fields.Char(
+        string='Expected SHA-256',
+        required=True
+    )
+
+    received = fields.Integer(
+        string='Received Bytes',
+        default=0
+    )
+
+    _sql_constraints = [
+        ('token_unique', 'unique(token)', 'The upload token must be unique.'),
+    ]
+
+    @api.model
+    def _start(self, order, filename, total_size, checksum, kind='other'):
+        """
+        Abrir (o reanudar) una subida para la orden
+
+        Una sesión abierta del mismo usuario con el mismo archivo se reanuda
+        desde los bytes ya recibidos.
+
+        Returns:
+            record: Sesión de subida
+        """
+        order.check_access_rights('write')
+        order.check_access_rule('write')
+        checksum = (checksum or '').lower()
+        if len(checksum) != 64:
+            raise UserError(_('A SHA-256 checksum of the file is required.'))
+
+        max_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'inmoser_service_order.evidence_max_size_mb', 25
+        )) * 1024 * 1024
+        if total_size <= 0 or total_size > max_size:
+            raise UserError(_('The file must be between 1 byte and %s MB.') % (max_size // 1048576))
+
+        uploads = self.sudo()
+        session = uploads.search([
+            ('order_id', '=', order.id),
+            ('user_id', '=', self.env.uid),
+            ('checksum', '=', checksum),
+            ('total_size', '=', total_size),
+        ], limit=1)
+        if session:
+            return session
+
+        # Rechazar antes de recibir datos si la orden ya no admite más fotos
+        service_type = order.service_type_id
+        if not service_type.allow_photos:
+            raise UserError(_('Service type %s does not allow photos.') % service_type.name)
+        open_sessions = uploads.search_count([('order_id', '=', order.id)])
+        if service_type.max_photos and order.evidence_count + open_sessions >= service_type.max_photos:
+            raise UserError(_('Service order %s already has the maximum of %s evidence photos.') % (
+                order.name, service_type.max_photos
+            ))
+
+        session = uploads.create({
+            'order_id': order.id,
+            'filename': os.path.basename(filename or 'photo'),
+            'kind': kind if kind in ('before', 'after', 'other') else 'other',
+            'total_size': total_size,
+            'checksum': checksum,
+        })
+        open(session._temp_path(), 'wb').close()
+        return session
+
+    def _temp_path(self):
+        """Archivo temporal de la subida, en el mismo sistema de archivos que el filestore"""
+        self.ensure_one()
+        folder = os.path.join(self.env['ir.attachment']._filestore(), 'evidence_uploads')
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, '%s.part' % self.token)
+
+    def _lock(self):
+        """
+        Bloquear la sesión: dos partes de la misma subida no se escriben a la vez
+
+        El bloqueo se pide en un savepoint: si otra petición lo tiene, solo se
+        revierte el savepoint y el cursor sigue utilizable para responder.
+        """
+        with self.env.cr.savepoint():
+            self.env.cr.execute(
+                "SELECT received FROM inmoser_evidence_upload WHERE id = %s FOR UPDATE NOWAIT", (self.id,)
+            )
+        self.invalidate_recordset(['received'])
+
+    def _write_chunk(self, offset, stream, chunk_checksum=None):
+        """
+        Escribir una parte a partir del desplazamiento indicado
+
+        Las partes deben llegar en orden; una parte repetida (ya recibida) se
+        ignora, lo que permite reintentar sin riesgo.
+
+        Args:
+            offset (int): Posición de la parte en el archivo
+            stream: Flujo de lectura con el contenido de la parte
+            chunk_checksum (str, optional): SHA-256 de la parte
+
+        Returns:
+            int: Bytes recibidos en total
+        """
+        self.ensure_one()
+        self._lock()
+        if offset < self.received:
+            return self.received
+        if offset > self.received:
+            raise UserError(_('Unexpected chunk offset %s, expected %s.') % (offset, self.received))
+
+        digest = hashlib.sha256()
+        written = 0
+        with open(self._temp_path(), 'r+b') as part:
+            part.seek(offset)
+            while True:
+                block = stream.read(BLOCK_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                if offset + written > self.total_size:
+                    part.truncate(offset)
+                    raise UserError(_('The chunk exceeds the declared file size.'))
+                digest.update(block)
+                part.write(block)
+
+            if chunk_checksum and digest.hexdigest() != chunk_checksum.lower():
+                part.truncate(offset)
+                raise UserError(_('Chunk checksum mismatch; please resend it.'))
+            part.truncate(offset + written)
+
+        self.received = offset + written
+        return self.received
+
+    def _finish(self):
+        """
+        Verificar la suma del archivo completo y guardarlo en la galería
+
+        Returns:
+            record: Evidencia creada (vacío si la suma no coincide y la subida se reinició)
+        """
+        self.ensure_one()
+        self._lock()
+        if self.received != self.total_size:
+            raise UserError(_('The upload is incomplete: %s of %s bytes received.') % (
+                self.received, self.total_size
+            ))
+
+        path = self._temp_path()
+        sha256 = hashlib.sha256()
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as part:
+            head = part.read(1024)
+            part.seek(0)
+            for block in iter(lambda: part.read(BLOCK_SIZE), b''):
+                sha256.update(block)
+                sha1.update(block)
+
+        if sha256.hexdigest() != self.checksum:
+            # Archivo dañado: se reinicia la subida (sin excepción, para conservar el reinicio)
+            _logger.warning("Checksum mismatch on evidence upload %s, restarting", self.token)
+            open(path, 'wb').close()
+            self.received = 0
+            return self.env['inmoser.service.order.evidence']
+
+        mimetype = guess_mimetype(head)
+        if not mimetype.startswith('image/'):
+            raise UserError(_('Only image files can be uploaded as evidence.'))
+
+        # Límite de fotos antes de crear la evidencia: la sesión ya no puede terminar
+        order = self.order_id
+        service_type = order.service_type_id
+        if not service_type.allow_photos or (
+                service_type.max_photos and order.evidence_count >= service_type.max_photos):
+            self.unlink()
+            raise UserError(_('Service order %s does not accept more evidence photos.') % order.name)
+
+        # En un savepoint: si una validación falla no queda evidencia sin adjunto
+        with self.env.cr.savepoint():
+            evidence = self.env['inmoser.service.order.evidence'].sudo().create({
+                'order_id': order.id,
+                'name': self.filename,
+                'kind': self.kind,
+                'file_size': self.total_size,
+                'checksum': self.checksum,
+            })
+            evidence.attachment_id = self._store_attachment(evidence, path, sha1.hexdigest(), mimetype)
+
+        _logger.info("Evidence %s uploaded for service order %s (%s bytes)",
+                     self.filename, order.name, self.total_size)
+        self.unlink()
+        return evidence
+
+    def _store_attachment(self, evidence, path, sha1, mimetype):
+        """Mover el archivo verificado al filestore y crear su adjunto"""
+        Attachment = self.env['ir.attachment'].sudo()
+        attachment = Attachment.create({
+            'name': self.filename,
+            'res_model': evidence._name,
+            'res_id': evidence.id,
+            'type': 'binary',
+            'mimetype': mimetype,
+        })
+
+        if Attachment._storage() != 'file':
+            # Adjuntos en base de datos: no es posible evitar cargar el archivo
+            with open(path, 'rb') as part:
+                attachment.raw = part.read()
+            os.unlink(path)
+            return attachment
+
+        fname = '%s/%s' % (sha1[:2], sha1)
+        full_path = Attachment._full_path(fname)
+        if os.path.exists(full_path):
+            # Mismo contenido ya en el filestore: se reutiliza
+            os.unlink(path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(path, full_path)
+        # Si la transacción se revierte, el recolector de basura eliminará el archivo
+        Attachment._mark_for_gc(fname)
+
+        self.env.flush_all()
+        self.env.cr.execute("""
+            UPDATE ir_attachment SET store_fname = %s, checksum = %s, file_size = %s
+            WHERE id = %s
+        """, (fname, sha1, self.total_size, attachment.id))
+        attachment.invalidate_recordset(['store_fname', 'checksum', 'file_size', 'raw', 'datas'])
+        return attachment
+
+    def unlink(self):
+        """Eliminar también los archivos temporales"""
+        for session in self:
+            path = session._temp_path()
+            if os.path.exists(path):
+                os.unlink(path)
+        return super().unlink()
+
+    @api.autovacuum
+    def _gc_stale_uploads(self):
+        """Eliminar subidas abandonadas hace más de dos días"""
+        self.sudo().search([
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=2)),
+        ]).unlink()
+
+
+class ServiceOrderEvidenceGallery(models.Model):
+    """
+    Galería de evidencias en la orden de servicio
+    """
+    _inherit = 'inmoser.service.order'
+
+    evidence_ids = fields.One2many(
+        'inmoser.service.order.evidence',
+        'order_id',
+        string='Evidence Gallery'
+    )
+
+    evidence_count = fields.Integer(
+        string='Evidence Photos',
+        compute='_compute_evidence_count'
+    )
+
+    @api.depends('evidence_ids')
+    def _compute_evidence_count(self):
+        """Número de fotos en la galería"""
+        counts = dict(self.env['inmoser.service.order.evidence']._read_group(
+            [('order_id', 'in', self.ids)], groupby=['order_id'], aggregates=['__count']
+        ))
+        for order in self:
+            order.evidence_count = counts.get(order, 0)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import logging
+import time as timer
+
+_logger = logging.getLogger(__name__)
+
+# Campos de la plantilla renderizados para el correo
+RENDER_FIELDS = ['subject', 'body_html', 'email_from', 'email_to', 'email_cc', 'partner_to', 'reply_to',
+                 'mail_server_id']
+
+
+class ServiceOrderNotification(models.Model):
+    """
+    Notificaciones masivas a clientes de órdenes de servicio
+    """
+    _inherit = 'inmoser.service.order'
+
+    def notify_customers(self, template_xmlid, render_context=None, force_send=False):
+        """
+        Notificar a los clientes de todas las órdenes con una sola pasada de renderizado
+
+        La plantilla se renderiza para todo el recordset a la vez; los
+        destinatarios se deduplican, de modo que un cliente con varias órdenes
+        recibe un solo correo con el contenido de todas. Los correos se crean con
+        un solo create; el correo queda ligado a la primera orden y las demás
+        órdenes del mismo correo reciben una nota en el chatter.
+
+        Args:
+            template_xmlid (str): XML ID de la plantilla de correo
+            render_context (dict, optional): Contexto adicional para la plantilla
+            force_send (bool): Enviar de inmediato en lugar de dejar en cola
+
+        Returns:
+            recordset: Correos (mail.mail) creados
+        """
+        template = self.env.ref(template_xmlid, raise_if_not_found=False)
+        if not template:
+            raise UserError(_('Mail template %s not found.') % template_xmlid)
+        if not self:
+            return self.env['mail.mail']
+
+        started = timer.monotonic()
+        rendered = template.with_context(**(render_context or {}))._generate_template(
+            self.ids, RENDER_FIELDS, find_or_create_partners=True
+        )
+
+        # Agrupar por destinatarios: un correo por cliente
+        groups = {}
+        for order in self:
+            values = rendered[order.id]
+            key = (
+                tuple(sorted(values.get('partner_ids') or [])),
+                (values.get('email_to') or '').strip().lower(),
+                (values.get('email_cc') or '').strip().lower(),
+            )
+            groups.setdefault(key, []).append((order, values))
+
+        mail_values = []
+        note_values = []
+        for key, entries in groups.items():
+            order, values = entries[0]
+            subject = values.get('subject')
+            if len(entries) > 1:
+                subject = _('%s (and %s more)') % (subject, len(entries) - 1)
+            mail_values.append({
+                'subject': subject,
+                'body_html': '<hr/>'.join(entry_values.get('body_html') or '' for __, entry_values in entries),
+                'email_from': values.get('email_from'),
+                'email_to': values.get('email_to'),
+                'email_cc': values.get('email_cc'),
+                'reply_to': values.get('reply_to'),
+                'mail_server_id': values.get('mail_server_id'),
+                'recipient_ids': [(4, partner_id) for partner_id in key[0]],
+                'model': self._name,
+                'res_id': order.id,
+                'auto_delete': template.auto_delete,
+            })
+            note_values.extend({
+                'model': self._name,
+                'res_id': merged_order.id,
+                'body': _('Notification "%s" sent together with order %s.') % (
+                    merged_values.get('subject'), order.name
+                ),
+                'message_type': 'notification',
+                'subtype_id': self.env.ref('mail.mt_note').id,
+                'author_id': self.env.user.partner_id.id,
+            } for merged_order, merged_values in entries[1:])
+
+        mails = self.env['mail.mail'].sudo().create(mail_values)
+        if note_values:
+            self.env['mail.message'].sudo().create(note_values)
+        if force_send:
+            mails.send(raise_exception=False)
+
+        _logger.info(
+            "Bulk notification %s: %s orders, %s mails in %.2fs",
+            template_xmlid, len(self), len(mails), timer.monotonic() - started
+        )
+        return mails
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from functools import partial
+import base64
+import logging
+import threading
+import time as timer
+
+from ..tools.images import process_photo
+
+_logger = logging.getLogger(__name__)
+
+# Tiempo máximo (segundos) de una ejecución del cron; lo pendiente sigue en otra
+PHOTO_TIME_BUDGET = 240
+
+# Fotos de evidencia procesadas en segundo plano y sus variantes
+PHOTO_FIELDS = {
+    'photo_before': ('photo_before_1024', 'photo_before_128'),
+    'photo_after': ('photo_after_1024', 'photo_after_128'),
+}
+
+
+class ServiceOrderPhoto(models.Model):
+    """
+    Procesamiento en segundo plano de las fotos de evidencia
+
+    Las fotos se guardan tal como se suben, sin trabajo de imagen en la
+    petición; un cron las normaliza con Pillow (orientación, sin EXIF, tamaño
+    máximo, JPEG progresivo o WebP) y genera las miniaturas, por lotes
+    acotados y en el propio proceso del cron.
+    """
+    _inherit = 'inmoser.service.order'
+
+    photo_pending = fields.Boolean(
+        string='Photos Pending Processing',
+        copy=False,
+        index=True
+    )
+
+    @api.model
+    def create(self, vals):
+        """Encolar las fotos subidas al crear la orden"""
+        if any(vals.get(field) for field in PHOTO_FIELDS):
+            vals['photo_pending'] = True
+        record = super().create(vals)
+        if record.photo_pending:
+            record._trigger_photo_processing()
+        return record
+
+    def write(self, vals):
+        """Encolar las fotos subidas; las variantes se generan en segundo plano"""
+        uploaded = False
+        if not self.env.context.get('inmoser_photo_processed') and any(field in vals for field in PHOTO_FIELDS):
+            vals = dict(vals)
+            for field, variants in PHOTO_FIELDS.items():
+                if field in vals:
+                    # Variantes anteriores fuera hasta procesar la nueva foto
+                    vals.update(dict.fromkeys(variants, False))
+                    uploaded = uploaded or bool(vals[field])
+            if uploaded:
+                vals['photo_pending'] = True
+        result = super().write(vals)
+        if uploaded:
+            self._trigger_photo_processing()
+        return result
+
+    def _trigger_photo_processing(self):
+        """Procesar las fotos en cuanto termine la transacción actual"""
+        cron = self.env.ref('inmoser_service_order.cron_process_photos', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def _claim_pending_photos(self, limit):
+        """Tomar y bloquear órdenes con fotos pendientes; otros procesos saltan las bloqueadas"""
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT id FROM inmoser_service_order
+            WHERE photo_pending
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (limit,))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _get_photo_settings(self):
+        """Tamaño máximo, formato y calidad configurados para las fotos"""
+        params = self.env['ir.config_parameter'].sudo()
+        return {
+            'max_size': int(params.get_param('inmoser_service_order.photo_max_size', 1600)),
+            'output_format': (params.get_param('inmoser_service_order.photo_format', 'JPEG') or 'JPEG').upper(),
+            'quality': int(params.get_param('inmoser_service_order.photo_quality', 80)),
+        }
+
+    @api.model
+    def _cron_process_photos(self):
+        """
+        Cron job que normaliza las fotos pendientes por lotes
+
+        Cada lote se procesa en el proceso del cron y se confirma con commit;
+        al agotar el tiempo de la ejecución el resto queda para una nueva.
+        """
+        started = timer.monotonic()
+        testing = getattr(threading.current_thread(), 'testing', False)
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'inmoser_service_order.photo_batch_size', 20))
+        process = partial(process_photo, **self._get_photo_settings())
+
+        processed = saved = 0
+        orders = self.sudo().with_context(inmoser_photo_processed=True, tracking_disable=True)
+        while True:
+            batch = orders._claim_pending_photos(batch_size)
+            if not batch:
+                break
+            processed += len(batch)
+            saved += batch._process_photos(process)
+            if not testing:
+                self.env.cr.commit()
+            batch.invalidate_recordset()
+            if timer.monotonic() - started > PHOTO_TIME_BUDGET:
+                self._trigger_photo_processing()
+                break
+
+        _logger.info(
+            "Photo pipeline: %s orders processed, %.1f MB saved in %.2fs",
+            processed, saved / 1048576.0, timer.monotonic() - started
+        )
+        return processed
+
+    def _process_photos(self, process):
+        """
+        Procesar las fotos de un lote de órdenes
+
+        Returns:
+            int: Bytes ahorrados respecto a las fotos originales
+        """
+        values = {order: {'photo_pending': False} for order in self}
+        saved = 0
+        for order in self:
+            for field, (large, small) in PHOTO_FIELDS.items():
+                # Solo las fotos nuevas: las ya procesadas conservan sus variantes
+                if not order[field] or order[small]:
+                    continue
+                data = base64.b64decode(order[field])
+                variants = _safe_process(process, data)
+                if not variants:
+                    _logger.warning("Could not process %s of service order %s", field, order.name)
+                    continue
+                values[order].update({
+                    field: base64.b64encode(variants[0]),
+                    large: base64.b64encode(variants[1024]),
+                    small: base64.b64encode(variants[128]),
+                })
+                saved += len(data) - len(variants[0])
+
+        for order, vals in values.items():
+            order.write(vals)
+        return saved
+
+
+def _safe_process(process, data):
+    """Procesar una foto; None si no es una imagen válida"""
+    try:
+        return process(data)
+    except Exception:
+        return None
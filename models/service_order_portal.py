@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, tools, _
+from odoo.exceptions import UserError
+from datetime import datetime
+import base64
+import json
+import time
+
+# Ordenamientos del listado del portal: (campo, descendente)
+PORTAL_SORTINGS = {
+    'date': ('create_date', True),
+    'scheduled': ('scheduled_date', True),
+    'name': ('name', False),
+}
+
+# Caché de corta duración de los totales del listado del portal
+PORTAL_COUNT_TTL = 60
+PORTAL_COUNT_CACHE_SIZE = 1024
+_portal_count_cache = {}
+
+
+class ServiceOrderPortal(models.Model):
+    """
+    Listado de órdenes del portal paginado por clave
+
+    Cada página continúa desde la clave (campo de orden, id) de la última fila
+    de la anterior en lugar de usar OFFSET, de modo que una página profunda
+    cuesta lo mismo que la primera.
+    """
+    _inherit = 'inmoser.service.order'
+
+    def init(self):
+        """Índices compuestos por cliente para cada ordenamiento del portal"""
+        super().init()
+        for fname, descending in PORTAL_SORTINGS.values():
+            direction = ' DESC' if descending else ''
+            nulls = ' NULLS LAST' if fname == 'scheduled_date' else ''
+            tools.create_index(
+                self.env.cr, 'inmoser_service_order_portal_%s_index' % fname, self._table,
+                ['partner_id', '%s%s%s' % (fname, direction, nulls), 'id%s' % direction]
+            )
+
+    @api.model
+    def create(self, vals):
+        """Los totales del portal cambian con las nuevas órdenes"""
+        _portal_count_cache.clear()
+        return super().create(vals)
+
+    def write(self, vals):
+        """Los totales del portal cambian si la orden pasa a otro cliente o estado"""
+        if 'partner_id' in vals or 'state' in vals:
+            _portal_count_cache.clear()
+        return super().write(vals)
+
+    def unlink(self):
+        """Los totales del portal cambian al eliminar órdenes"""
+        _portal_count_cache.clear()
+        return super().unlink()
+
+    @api.model
+    def _portal_count(self, domain):
+        """
+        Total de órdenes del dominio, cacheado unos segundos por usuario y filtro
+
+        La caché es local al proceso: otros workers ven el cambio al expirar.
+        """
+        key = (self.env.cr.dbname, self.env.uid, repr(domain))
+        cached = _portal_count_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        count = self.search_count(domain)
+        if len(_portal_count_cache) >= PORTAL_COUNT_CACHE_SIZE:
+            _portal_count_cache.clear()
+        _portal_count_cache[key] = (time.monotonic() + PORTAL_COUNT_TTL, count)
+        return count
+
+    @api.model
+    def _portal_search_page(self, domain, sortby, limit, after=None, before=None, offset=0):
+        """
+        Una página del listado del portal
+
+        Args:
+            domain (list): Dominio del listado
+            sortby (str): Clave de PORTAL_SORTINGS
+            limit (int): Órdenes por página
+            after (str, optional): Cursor de la última fila de la página anterior
+            before (str, optional): Cursor de la primera fila de la página siguiente
+            offset (int, optional): Desplazamiento, solo sin cursor (salto a una página)
+
+        Returns:
+            tuple: (órdenes, cursor de la primera fila, cursor de la última fila)
+        """
+        fname, descending = PORTAL_SORTINGS.get(sortby) or PORTAL_SORTINGS['date']
+        # Hacia atrás se recorre en orden inverso y luego se invierte el resultado
+        backward = bool(before) and not after
+        reverse = descending != backward
+        direction = 'desc' if reverse else 'asc'
+        nulls = ''
+        if fname == 'scheduled_date':
+            nulls = ' nulls last' if not backward else ' nulls first'
+        order = '%s %s%s, id %s' % (fname, direction, nulls, direction)
+
+        query = self._search(domain, order=order, limit=limit, offset=0 if (after or before) else offset)
+        cursor = after or before
+        if cursor:
+            value, last_id = self._decode_portal_cursor(cursor, fname)
+            query.add_where(*self._portal_keyset_condition(fname, reverse, backward, value, last_id))
+
+        orders = self.browse(query)
+        if backward:
+            orders = orders[::-1]
+        if not orders:
+            return orders, None, None
+        return orders, orders[0]._portal_cursor(fname), orders[-1]._portal_cursor(fname)
+
+    @api.model
+    def _portal_keyset_condition(self, fname, descending, backward, value, last_id):
+        """Condición SQL de las filas posteriores a la clave en el orden recorrido"""
+        column = '"%s"."%s"' % (self._table, fname)
+        row = '(%s, "%s"."id")' % (column, self._table)
+        operator = '<' if descending else '>'
+        if fname != 'scheduled_date':
+            return '%s %s (%%s, %%s)' % (row, operator), [value, last_id]
+
+        # Fecha programada: los vacíos van al final de la lista (al principio hacia atrás)
+        if value is None:
+            if backward:
+                return '((%s IS NULL AND "%s"."id" > %%s) OR %s IS NOT NULL)' % (
+                    column, self._table, column), [last_id]
+            return '(%s IS NULL AND "%s"."id" < %%s)' % (column, self._table), [last_id]
+        if backward:
+            return '%s %s (%%s, %%s)' % (row, operator), [value, last_id]
+        return '(%s %s (%%s, %%s) OR %s IS NULL)' % (row, operator, column), [value, last_id]
+
+    def _portal_cursor(self, fname):
+        """Cursor opaco (valor del campo de orden, id) de la orden"""
+        self.ensure_one()
+        value = self[fname]
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([value or None, self.id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @api.model
+    def _decode_portal_cursor(self, cursor, fname):
+        """Valor del campo de orden e id del cursor"""
+        try:
+            value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if value is not None and self._fields[fname].type == 'datetime':
+                value = datetime.fromisoformat(value)
+            return value, int(last_id)
+        except (ValueError, TypeError):
+            raise UserError(_('Invalid page cursor.'))
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+from odoo.tools.misc import consteq, hmac
+import hashlib
+
+# Campos cuyo cambio se envía al portal del cliente
+STATUS_FIELDS = ['state', 'scheduled_date', 'assigned_technician_id']
+
+STATUS_NOTIFICATION = 'inmoser.order_status'
+
+# Avance mostrado al cliente por estado
+PROGRESS_BY_STATE = {
+    'draft': 0,
+    'assigned': 25,
+    'rescheduled': 25,
+    'in_progress': 50,
+    'pending_approval': 60,
+    'accepted': 75,
+    'done': 100,
+    'cancelled': 0,
+}
+
+
+class ServiceOrderStatus(models.Model):
+    """
+    Estado de la orden para el portal: avisos por el bus en lugar de consultas periódicas
+
+    Al cambiar el estado, la fecha programada o el técnico se envía por el bus
+    un aviso con los campos cambiados al canal de la orden; el reparto a las
+    conexiones abiertas lo hace el servidor de websockets, sin ocupar workers
+    HTTP. Los clientes sin bus consultan /poll con el token del canal.
+    """
+    _inherit = 'inmoser.service.order'
+
+    def write(self, vals):
+        """Avisar al portal de los campos de estado cambiados tras guardar"""
+        changed_fields = [field for field in STATUS_FIELDS if field in vals]
+        if not changed_fields:
+            return super().write(vals)
+
+        old_values = {order.id: [order[field] for field in changed_fields] for order in self}
+        result = super().write(vals)
+
+        notifications = []
+        for order in self:
+            diff = [
+                field for field, old in zip(changed_fields, old_values[order.id])
+                if order[field] != old
+            ]
+            if diff:
+                notifications.append((
+                    order._get_status_channel(),
+                    STATUS_NOTIFICATION,
+                    {'order_id': order.id, 'changed': diff},
+                ))
+        if notifications:
+            self.env['bus.bus'].sudo()._sendmany(notifications)
+        return result
+
+    def _get_progress_percentage(self):
+        """Porcentaje de avance de la orden según su estado"""
+        self.ensure_one()
+        return PROGRESS_BY_STATE.get(self.state, 0)
+
+    def _get_status_token(self):
+        """Token firmado de la orden; solo lo conoce quien ve la página de la orden"""
+        self.ensure_one()
+        return hmac(self.env(su=True), 'inmoser-order-status', self.id)
+
+    @api.model
+    def _check_status_token(self, order_id, token):
+        """Verificar el token de estado de una orden sin cargarla"""
+        expected = hmac(self.env(su=True), 'inmoser-order-status', order_id)
+        return bool(token) and consteq(expected, token)
+
+    def _get_status_channel(self):
+        """Canal del bus de la orden, firmado con el token de estado"""
+        self.ensure_one()
+        return 'inmoser_order_status_%s_%s' % (self.id, self._get_status_token())
+
+    def _get_status_values(self):
+        """
+        Valores compactos de estado de la orden
+
+        Returns:
+            dict: Valores serializables en JSON
+        """
+        self.ensure_one()
+        return {
+            'state': self.state,
+            'state_display': dict(self._fields['state']._description_selection(self.env))[self.state],
+            'progress_percentage': self._get_progress_percentage(),
+            'scheduled_date': self.scheduled_date.isoformat() if self.scheduled_date else None,
+            'assigned_technician': self.assigned_technician_id.name or None,
+        }
+
+    @api.model
+    def _get_status_etag(self, order_id):
+        """
+        ETag del estado de una orden con una sola consulta, sin cargar la orden
+
+        Returns:
+            str: ETag entre comillas, o None si la orden no existe
+        """
+        self.env.cr.execute(
+            "SELECT state, scheduled_date, assigned_technician_id FROM inmoser_service_order WHERE id = %s",
+            (order_id,)
+        )
+        row = self.env.cr.fetchone()
+        # El idioma cambia el texto del estado
+        return row and '"%s"' % hashlib.sha1(repr((row, self.env.lang)).encode()).hexdigest()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+from markupsafe import Markup
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Clave de las notas pendientes del resumen dentro de cr.precommit.data
+DIGEST_NOTES_KEY = 'inmoser.tracking.digest.notes'
+TRACKING_DIGEST_PARAM = 'inmoser_service_order.tracking_digest'
+
+
+class ServiceOrderTracking(models.Model):
+    """
+    Modo resumen del seguimiento de órdenes de servicio
+
+    Con el modo activo, las notas de flujo de trabajo de una transacción se
+    acumulan y se escriben junto con los valores de seguimiento en una sola
+    entrada del chatter por orden, al confirmar la transacción.
+    """
+    _inherit = 'inmoser.service.order'
+
+    @api.model
+    def _is_tracking_digest(self):
+        """Indica si el modo resumen del seguimiento está activo"""
+        value = self.env['ir.config_parameter'].sudo().get_param(TRACKING_DIGEST_PARAM, 'False')
+        return value.strip().lower() in ('1', 'true', 'yes')
+
+    def _post_digest_note(self, body):
+        """
+        Registrar una nota de flujo de trabajo en el chatter
+
+        En modo resumen la nota se acumula y se une al mensaje de seguimiento
+        de la transacción; si no hay cambios seguidos, se escribe una sola nota
+        con todas las acumuladas.
+        """
+        if not self._is_tracking_digest():
+            for record in self:
+                record.message_post(body=body, message_type='notification')
+            return
+
+        precommit = self.env.cr.precommit
+        if DIGEST_NOTES_KEY not in precommit.data:
+            precommit.add(self._flush_digest_notes)
+        notes = precommit.data.setdefault(DIGEST_NOTES_KEY, {})
+        for record in self:
+            notes.setdefault(record.id, []).append(body)
+
+    def _flush_digest_notes(self):
+        """Escribir las notas acumuladas que no se unieron a un mensaje de seguimiento"""
+        # El seguimiento se finaliza aquí para que absorba las notas pendientes
+        self.env.flush_all()
+        self._track_finalize()
+
+        notes = self.env.cr.precommit.data.pop(DIGEST_NOTES_KEY, {})
+        for record in self.browse(list(notes)).exists().sudo():
+            record._message_log(body=Markup('<br/>').join(notes[record.id]))
+
+    def _message_track(self, fields_iter, initial_values_dict):
+        """Unir las notas acumuladas al mensaje de seguimiento de cada orden"""
+        notes = self.env.cr.precommit.data.get(DIGEST_NOTES_KEY, {})
+        noted = self.filtered(lambda record: record.id in notes)
+        for record in noted:
+            record._track_set_log_message(Markup('<br/>').join(notes[record.id]))
+
+        tracking = super()._message_track(fields_iter, initial_values_dict)
+
+        for record in noted:
+            changes = tracking.get(record.id, (None, None))[0]
+            if changes:
+                notes.pop(record.id)
+        return tracking
@@ -73,6 +73,12 @@ class ServiceType(models.Model):
         default=True
     )
     
+    max_photos = fields.Integer(
+        string='Max Evidence Photos',
+        help='Número máximo de fotos de evidencia por orden (0 = sin límite)',
+        default=20
+    )
+    
     # Configuración de precios
     base_price = fields.Float(
         string='Base Price',
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from datetime import datetime, time, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Campos de la orden que afectan la carga diaria del técnico
+DAILY_LOAD_FIELDS = ('assigned_technician_id', 'scheduled_date', 'state')
+
+
+class TechnicianDailyLoad(models.Model):
+    """
+    Libro de capacidad: órdenes y horas activas por técnico y día
+
+    Se mantiene desde create/write/unlink de las órdenes para que las
+    verificaciones de capacidad no recorran el historial del técnico. Las
+    líneas afectadas se bloquean (FOR UPDATE) antes de recalcularse, así dos
+    despachos concurrentes no pueden sobrepasar la capacidad diaria.
+    """
+    _name = 'inmoser.technician.daily.load'
+    _description = 'Technician Daily Load'
+    _rec_name = 'technician_id'
+    _order = 'date desc, technician_id'
+
+    technician_id = fields.Many2one(
+        'hr.employee',
+        string='Technician',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    date = fields.Date(
+        string='Date',
+        required=True,
+        index=True
+    )
+
+    order_count = fields.Integer(
+        string='Booked Orders',
+        default=0,
+        help='Órdenes no canceladas ni terminadas programadas en el día'
+    )
+
+    booked_hours = fields.Float(
+        string='Booked Hours',
+        default=0.0,
+        help='Horas estimadas de las órdenes activas del día'
+    )
+
+    _sql_constraints = [
+        ('technician_date_unique', 'unique(technician_id, date)',
+         'Only one load line per technician and day is allowed.'),
+    ]
+
+    def init(self):
+        """Construir el resumen al instalar; luego lo mantienen las órdenes"""
+        self.env.cr.execute("SELECT 1 FROM inmoser_technician_daily_load LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Reconstruir el resumen completo a partir de las órdenes existentes"""
+        self.env['inmoser.service.order'].flush_model()
+        self.env.cr.execute("""
+            DELETE FROM inmoser_technician_daily_load;
+            INSERT INTO inmoser_technician_daily_load
+                (technician_id, date, order_count, booked_hours,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT
+                o.assigned_technician_id,
+                o.scheduled_date::date,
+                COUNT(*),
+                SUM(COALESCE(NULLIF(t.estimated_duration, 0), 2.0)),
+                %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM inmoser_service_order o
+            LEFT JOIN inmoser_service_type t ON t.id = o.service_type_id
+            WHERE o.assigned_technician_id IS NOT NULL
+              AND o.scheduled_date IS NOT NULL
+              AND o.state NOT IN ('cancelled', 'done')
+            GROUP BY o.assigned_technician_id, o.scheduled_date::date
+        """, {'uid': self.env.uid})
+        self.invalidate_model()
+        _logger.info("Rebuilt technician daily load summary")
+
+    @api.model
+    def _lock(self, keys):
+        """
+        Crear si falta y bloquear las líneas de los pares (técnico, día)
+
+        Args:
+            keys (set): Conjunto de tuplas (technician_id, date)
+        """
+        keys = sorted(keys)
+        self.env.cr.execute("""
+            INSERT INTO inmoser_technician_daily_load
+                (technician_id, date, order_count, booked_hours,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT key.technician_id, key.date, 0, 0.0,
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM unnest(%(technician_ids)s::int[], %(dates)s::date[]) AS key(technician_id, date)
+            ON CONFLICT (technician_id, date) DO NOTHING
+        """, {
+            'uid': self.env.uid,
+            'technician_ids': [key[0] for key in keys],
+            'dates': [key[1] for key in keys],
+        })
+        self.env.cr.execute("""
+            SELECT id FROM inmoser_technician_daily_load
+            WHERE (technician_id, date) IN %s
+            ORDER BY technician_id, date
+            FOR UPDATE
+        """, (tuple(keys),))
+        return self.sudo().browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _refresh(self, keys):
+        """
+        Recalcular bajo bloqueo las líneas de los pares (técnico, día) afectados
+
+        Args:
+            keys (set): Conjunto de tuplas (technician_id, date)
+
+        Returns:
+            recordset: Líneas cuya cantidad de órdenes aumentó
+        """
+        if not keys:
+            return self.browse()
+
+        lines = self._lock(keys)
+        # Las líneas se modificaron por SQL: descartar valores en caché
+        lines.invalidate_recordset(['order_count', 'booked_hours'])
+
+        technician_ids = list({technician_id for technician_id, day in keys})
+        days = {day for technician_id, day in keys}
+
+        # Días en UTC, igual que el motor de disponibilidad
+        groups = self.env['inmoser.service.order'].sudo().with_context(tz='UTC')._read_group(
+            [
+                ('assigned_technician_id', 'in', technician_ids),
+                ('scheduled_date', '>=', datetime.combine(min(days), time.min)),
+                ('scheduled_date', '<', datetime.combine(max(days) + timedelta(days=1), time.min)),
+                ('state', 'not in', ['cancelled', 'done']),
+            ],
+            groupby=['assigned_technician_id', 'scheduled_date:day', 'service_type_id'],
+            aggregates=['__count'],
+        )
+        totals = {}
+        for technician, day, service_type, count in groups:
+            total = totals.setdefault((technician.id, day.date()), [0, 0.0])
+            total[0] += count
+            total[1] += count * (service_type.estimated_duration or 2.0)
+
+        increased = self.browse()
+        for line in lines:
+            count, hours = totals.get((line.technician_id.id, line.date), (0, 0.0))
+            if count > line.order_count:
+                increased |= line
+            if (count, hours) != (line.order_count, line.booked_hours):
+                line.write({'order_count': count, 'booked_hours': hours})
+        return increased
+
+    def _check_capacity(self):
+        """Impedir que una línea supere la capacidad diaria del técnico"""
+        for line in self:
+            max_orders = line.technician_id.x_inmoser_max_daily_orders or 8
+            if line.order_count > max_orders:
+                raise ValidationError(
+                    _('Technician %s has reached the maximum number of orders (%s) for %s.') % (
+                        line.technician_id.name, max_orders, line.date
+                    )
+                )
+
+    @api.model
+    def get_booked_count(self, technician_id, date):
+        """Órdenes activas del técnico en la fecha, con una sola búsqueda indexada"""
+        line = self.sudo().search_read(
+            [('technician_id', '=', technician_id), ('date', '=', date)],
+            ['order_count'],
+            limit=1
+        )
+        return line[0]['order_count'] if line else 0
+
+    @api.model
+    def get_range_load(self, technician_ids, date_from, date_to):
+        """
+        Carga de varios técnicos en un rango de fechas con una sola lectura
+
+        Args:
+            technician_ids (list): IDs de los técnicos
+            date_from (datetime.date): Fecha inicial
+            date_to (datetime.date): Fecha final (incluida)
+
+        Returns:
+            dict: {técnico: {fecha: {'count': n, 'hours': h}}}
+        """
+        result = {technician_id: {} for technician_id in technician_ids}
+        lines = self.sudo().search_read(
+            [
+                ('technician_id', 'in', list(technician_ids)),
+                ('date', '>=', date_from),
+                ('date', '<=', date_to),
+                ('order_count', '>', 0),
+            ],
+            ['technician_id', 'date', 'order_count', 'booked_hours'],
+        )
+        for line in lines:
+            result[line['technician_id'][0]][fields.Date.to_string(line['date'])] = {
+                'count': line['order_count'],
+                'hours': line['booked_hours'],
+            }
+        return result
+
+
+class ServiceOrderDailyLoad(models.Model):
+    """
+    Mantenimiento del resumen diario desde las órdenes de servicio
+    """
+    _inherit = 'inmoser.service.order'
+
+    def _get_daily_load_keys(self):
+        """Pares (técnico, día) que ocupan las órdenes"""
+        return {
+            (order.assigned_technician_id.id, order.scheduled_date.date())
+            for order in self
+            if order.assigned_technician_id and order.scheduled_date
+        }
+
+    @api.model
+    def create(self, vals):
+        order = super(ServiceOrderDailyLoad, self).create(vals)
+        self.env['inmoser.technician.daily.load']._refresh(order._get_daily_load_keys())._check_capacity()
+        return order
+
+    def write(self, vals):
+        if not any(field in vals for field in DAILY_LOAD_FIELDS):
+            return super(ServiceOrderDailyLoad, self).write(vals)
+
+        keys = self._get_daily_load_keys()
+        result = super(ServiceOrderDailyLoad, self).write(vals)
+        keys |= self._get_daily_load_keys()
+        self.env['inmoser.technician.daily.load']._refresh(keys)._check_capacity()
+        return result
+
+    def unlink(self):
+        keys = self._get_daily_load_keys()
+        result = super(ServiceOrderDailyLoad, self).unlink()
+        self.env['inmoser.technician.daily.load']._refresh(keys)
+        return result
@@ -0,0 +1,31 @@
+/** @odoo-module **/
+
+import { registry } from "@web/core/registry";
+
+/**
+ * Estado de la orden en el portal del cliente
+ *
+ * Se suscribe al canal de la orden en el bus y recarga la página solo cuando
+ * el servidor avisa de un cambio de estado, fecha programada o técnico. El
+ * aviso solo indica los campos cambiados: la página se vuelve a renderizar en
+ * el servidor con los valores actuales.
+ */
+export const inmoserOrderStatusService = {
+    dependencies: ["bus_service"],
+
+    start(env, { bus_service }) {
+        const element = document.querySelector("[data-inmoser-status-channel]");
+        if (!element) {
+            return;
+        }
+        const orderId = parseInt(element.dataset.inmoserOrderId);
+        bus_service.subscribe("inmoser.order_status", (payload) => {
+            if (payload.order_id === orderId) {
+                window.location.reload();
+            }
+        });
+        bus_service.addChannel(element.dataset.inmoserStatusChannel);
+    },
+};
+
+registry.category("services").add("inmoser_order_status", inmoserOrderStatusService);
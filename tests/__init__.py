@@ -4,4 +4,15 @@ from . import test_service_order
 from . import test_service_equipment
 from . import test_service_workflows
 from . import test_integrations
-
+from . import test_technician_availability
+from . import test_service_order_crons
+from . import test_notification_outbox
+from . import test_tracking_digest
+from . import test_qr_cache
+from . import test_photo_evidence
+from . import test_evidence_upload
+from . import test_equipment_portal
+from . import test_order_status
+from . import test_order_status_api
+from . import test_portal_pagination
+from . import test_portal_counters
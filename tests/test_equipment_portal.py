@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from unittest.mock import patch
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TestEquipmentPortal(TransactionCase):
+    """
+    Tests para la página pública del equipo y su caché
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Portal Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'Portal Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Portal Service',
+        })
+
+        self.orders = self.env['inmoser.service.order']
+        for index in range(5):
+            self.orders |= self.env['inmoser.service.order'].create({
+                'partner_id': self.partner.id,
+                'equipment_id': self.equipment.id,
+                'service_type_id': self.service_type.id,
+                'reported_fault': 'Portal test %s' % index,
+            })
+
+    def test_version_changes_with_orders(self):
+        """Test la versión cambia al crear o modificar órdenes y no sin cambios"""
+        version = self.equipment._get_portal_version()
+        self.assertEqual(self.equipment._get_portal_version(), version)
+
+        self.env.cr.execute("SELECT now() + interval '1 second'")
+        later = self.env.cr.fetchone()[0]
+        self.env.cr.execute(
+            "UPDATE inmoser_service_order SET write_date = %s WHERE id = %s", (later, self.orders[0].id)
+        )
+        self.assertNotEqual(self.equipment._get_portal_version(), version)
+
+        missing = self.env['inmoser.service.equipment'].browse(0)
+        self.assertFalse(missing._get_portal_version())
+
+    def test_content_rendered_once_per_version(self):
+        """Test el contenido se renderiza una vez por versión"""
+        self.env.registry.clear_cache()
+        version = self.equipment._get_portal_version()
+        qweb = type(self.env['ir.qweb'])
+        with patch.object(qweb, '_render', autospec=True, side_effect=qweb._render) as render:
+            first = self.equipment._get_portal_content(version)
+            second = self.equipment._get_portal_content(version)
+            self.equipment._get_portal_content('other-version')
+
+        self.assertEqual(first, second)
+        self.assertIn('Portal Equipment', first)
+        self.assertEqual(render.call_count, 2)
+
+    def test_values_batched(self):
+        """Test número de consultas independiente del número de órdenes"""
+        self.env.invalidate_all()
+        with self.assertQueryCount(__system__=8):
+            values = self.equipment._get_portal_values()
+            for order in values['service_orders']:
+                order.service_type_id.name
+                order.assigned_technician_id.name
+                order.currency_id.symbol
+
+        self.assertEqual(values['service_order_count'], 5)
+        self.assertEqual(values['current_order'], self.orders[-1])
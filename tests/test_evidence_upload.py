@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from odoo.exceptions import UserError
+from io import BytesIO
+from PIL import Image
+import hashlib
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def make_jpeg(width=640, height=480):
+    """Foto JPEG de prueba con ruido, en bytes"""
+    noise = Image.effect_noise((width, height), 40)
+    buffer = BytesIO()
+    Image.merge('RGB', (noise, noise, noise)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class TestEvidenceUpload(TransactionCase):
+    """
+    Tests para la subida por partes de la galería de evidencias
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Evidence Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'Evidence Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Evidence Service',
+            'allow_photos': True,
+            'max_photos': 2,
+        })
+
+        self.order = self.env['inmoser.service.order'].create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Evidence test',
+        })
+
+        self.Upload = self.env['inmoser.evidence.upload']
+        self.photo = make_jpeg()
+        self.checksum = hashlib.sha256(self.photo).hexdigest()
+
+    def _upload(self, data, chunk_size=4096):
+        """Subir un archivo completo por partes"""
+        session = self.Upload._start(self.order, 'photo.jpg', len(data), hashlib.sha256(data).hexdigest())
+        for offset in range(session.received, len(data), chunk_size):
+            session._write_chunk(offset, BytesIO(data[offset:offset + chunk_size]))
+        return session
+
+    def test_chunked_upload(self):
+        """Test subida por partes: el adjunto conserva el contenido exacto"""
+        session = self._upload(self.photo)
+        evidence = session._finish()
+
+        self.assertFalse(session.exists())
+        self.assertEqual(evidence.order_id, self.order)
+        self.assertEqual(evidence.checksum, self.checksum)
+        self.assertEqual(evidence.mimetype, 'image/jpeg')
+        self.assertEqual(evidence.attachment_id.raw, self.photo)
+        self.assertEqual(evidence.attachment_id.file_size, len(self.photo))
+        self.assertEqual(self.order.evidence_count, 1)
+
+    def test_resume_upload(self):
+        """Test reanudar: start devuelve los bytes ya recibidos y las partes repetidas se ignoran"""
+        half = len(self.photo) // 2
+        session = self.Upload._start(self.order, 'photo.jpg', len(self.photo), self.checksum)
+        session._write_chunk(0, BytesIO(self.photo[:half]))
+
+        resumed = self.Upload._start(self.order, 'photo.jpg', len(self.photo), self.checksum)
+        self.assertEqual(resumed, session)
+        self.assertEqual(resumed.received, half)
+
+        # Reintento de una parte ya recibida
+        self.assertEqual(resumed._write_chunk(0, BytesIO(self.photo[:half])), half)
+        resumed._write_chunk(half, BytesIO(self.photo[half:]))
+        self.assertEqual(resumed._finish().attachment_id.raw, self.photo)
+
+    def test_chunk_errors(self):
+        """Test parte fuera de orden o con suma incorrecta se rechaza sin avanzar"""
+        session = self.Upload._start(self.order, 'photo.jpg', len(self.photo), self.checksum)
+        with self.assertRaises(UserError):
+            session._write_chunk(100, BytesIO(self.photo[100:200]))
+        with self.assertRaises(UserError):
+            session._write_chunk(0, BytesIO(self.photo[:100]), chunk_checksum='0' * 64)
+        self.assertEqual(session.received, 0)
+
+    def test_checksum_mismatch_restarts(self):
+        """Test archivo dañado: la subida se reinicia y no se crea evidencia"""
+        damaged = bytearray(self.photo)
+        damaged[-10] ^= 0xFF
+        session = self.Upload._start(self.order, 'photo.jpg', len(self.photo), self.checksum)
+        session._write_chunk(0, BytesIO(bytes(damaged)))
+
+        self.assertFalse(session._finish())
+        self.assertEqual(session.received, 0)
+        self.assertEqual(self.order.evidence_count, 0)
+
+    def test_photo_limit(self):
+        """Test límite de fotos por orden del tipo de servicio"""
+        self._upload(self.photo)._finish()
+        self._upload(make_jpeg(320, 240))._finish()
+
+        with self.assertRaises(UserError):
+            self.Upload._start(self.order, 'third.jpg', len(self.photo), '1' * 64)
+
+    def test_photo_limit_on_finish(self):
+        """Test límite alcanzado al terminar: sin evidencia huérfana ni sesión abierta"""
+        self._upload(self.photo)._finish()
+        session = self._upload(make_jpeg(320, 240))
+        self.service_type.max_photos = 1
+
+        with self.assertRaises(UserError):
+            session._finish()
+        self.assertFalse(session.exists())
+        self.assertEqual(self.order.evidence_count, 1)
+        self.assertEqual(self.env['inmoser.service.order.evidence'].search_count([
+            ('order_id', '=', self.order.id), ('attachment_id', '=', False),
+        ]), 0)
+
+    def test_size_limit(self):
+        """Test tamaño máximo configurable"""
+        self.env['ir.config_parameter'].sudo().set_param('inmoser_service_order.evidence_max_size_mb', 1)
+        with self.assertRaises(UserError):
+            self.Upload._start(self.order, 'big.jpg', 2 * 1024 * 1024, self.checksum)
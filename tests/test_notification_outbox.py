@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from odoo import fields
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class TestNotificationOutbox(TransactionCase):
+    """
+    Tests para la bandeja de salida de notificaciones
+    """
+    
+    def setUp(self):
+        super().setUp()
+        
+        self.partner = self.env['res.partner'].create({
+            'name': 'Outbox Customer',
+            'email': 'outbox@customer.com',
+        })
+        
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+            'brand': 'Test Brand',
+        })
+        
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Outbox Service',
+            'estimated_duration': 2.0,
+        })
+        
+        self.order = self.env['inmoser.service.order'].create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Outbox test',
+        })
+        
+        self.Outbox = self.env['inmoser.notification.outbox']
+    
+    def test_notification_is_queued_not_sent(self):
+        """Test que la transición solo registra la notificación"""
+        mails_before = self.env['mail.mail'].search_count([])
+        
+        self.order._send_assignment_notification()
+        
+        entry = self.Outbox.search([('model', '=', self.order._name), ('res_id', '=', self.order.id)])
+        self.assertEqual(len(entry), 1)
+        self.assertEqual(entry.state, 'pending')
+        self.assertEqual(self.env['mail.mail'].search_count([]), mails_before)
+    
+    def test_worker_sends_in_batch(self):
+        """Test que el cron renderiza y envía las notificaciones pendientes"""
+        self.order._send_assignment_notification()
+        self.order._send_completion_notification()
+        
+        totals = self.Outbox._cron_process_outbox()
+        
+        self.assertEqual(totals['sent'], 2)
+        entries = self.Outbox.search([('res_id', '=', self.order.id), ('model', '=', self.order._name)])
+        self.assertEqual(set(entries.mapped('state')), {'sent'})
+    
+    def test_retry_with_backoff(self):
+        """Test reintento con espera exponencial y fallo definitivo"""
+        self.env['ir.config_parameter'].sudo().set_param('inmoser_service_order.outbox_max_attempts', 2)
+        entry = self.Outbox._enqueue('inmoser_service_order.email_template_service_assigned', self.order)
+        
+        entry._record_results({entry.id: 'Connection refused'})
+        self.assertEqual(entry.state, 'pending')
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.next_attempt, fields.Datetime.now())
+        self.assertEqual(self.Outbox._claim_due(10), self.Outbox)
+        
+        entry._record_results({entry.id: 'Connection refused'})
+        self.assertEqual(entry.state, 'failed')
+        self.assertEqual(entry.last_error, 'Connection refused')
+    
+    def test_bulk_customer_notification(self):
+        """Test notificación masiva con deduplicación de destinatarios"""
+        other_partner = self.env['res.partner'].create({
+            'name': 'Outbox Customer 2',
+            'email': 'outbox2@customer.com',
+        })
+        orders = self.order
+        orders |= self.order.copy({'reported_fault': 'Second order'})
+        orders |= self.order.copy({'partner_id': other_partner.id})
+        
+        mails = orders.notify_customers('inmoser_service_order.email_template_service_completed')
+        
+        self.assertEqual(len(mails), 2)
+        self.assertEqual(set(mails.mapped('state')), {'outgoing'})
+        
+        # La orden incluida en el correo de otra queda registrada en su chatter
+        self.assertEqual(set(mails.mapped('res_id')), {orders[0].id, orders[2].id})
+        self.assertIn(orders[0].name, orders[1].message_ids[0].body)
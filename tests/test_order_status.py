@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TestOrderStatus(TransactionCase):
+    """
+    Tests para los avisos de estado de la orden por el bus
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Status Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'Status Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Status Service',
+        })
+
+        self.order = self.env['inmoser.service.order'].create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Status test',
+        })
+
+    def _status_messages(self):
+        """Avisos enviados al canal de la orden"""
+        notifications = self.env['bus.bus'].sudo().search([
+            ('channel', 'like', self.order._get_status_channel()),
+        ], order='id')
+        return [json.loads(notification.message)['payload'] for notification in notifications]
+
+    def test_notice_sent_on_status_change(self):
+        """Test se avisa solo del campo cambiado"""
+        self.order.state = 'assigned'
+
+        messages = self._status_messages()
+        self.assertEqual(messages, [{'order_id': self.order.id, 'changed': ['state']}])
+
+    def test_no_notification_without_change(self):
+        """Test sin aviso para otros campos o valores iguales"""
+        self.order.write({'reported_fault': 'Other fault'})
+        self.order.write({'state': 'draft'})
+
+        self.assertFalse(self._status_messages())
+
+    def test_status_etag(self):
+        """Test el ETag cambia solo con los campos de estado"""
+        Order = self.env['inmoser.service.order']
+        etag = Order._get_status_etag(self.order.id)
+
+        self.order.write({'reported_fault': 'Other fault'})
+        self.env.flush_all()
+        self.assertEqual(Order._get_status_etag(self.order.id), etag)
+
+        self.order.write({'state': 'assigned'})
+        self.env.flush_all()
+        self.assertNotEqual(Order._get_status_etag(self.order.id), etag)
+        self.assertIsNone(Order._get_status_etag(0))
+
+    def test_status_token(self):
+        """Test el token de estado es propio de cada orden"""
+        Order = self.env['inmoser.service.order']
+        token = self.order._get_status_token()
+        other = Order.create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Other status test',
+        })
+
+        self.assertTrue(Order._check_status_token(self.order.id, token))
+        self.assertIn(token, self.order._get_status_channel())
+        self.assertFalse(Order._check_status_token(other.id, token))
+        self.assertFalse(Order._check_status_token(self.order.id, None))
+        self.assertFalse(Order._check_status_token(self.order.id, token[:-1]))
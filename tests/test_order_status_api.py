@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from odoo.exceptions import UserError
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TestOrderStatusAPI(TransactionCase):
+    """
+    Tests para la consulta masiva de estados de órdenes
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'API Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'API Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'API Service',
+        })
+
+        self.Order = self.env['inmoser.service.order']
+        self.orders = self.Order
+        for index in range(7):
+            self.orders |= self.Order.create({
+                'partner_id': self.partner.id,
+                'equipment_id': self.equipment.id,
+                'service_type_id': self.service_type.id,
+                'reported_fault': 'API test %s' % index,
+            })
+        self._set_write_date(self.orders, minutes=10)
+
+    def _set_write_date(self, orders, minutes=0, seconds=0):
+        """Fecha de modificación en el pasado, fuera del margen de seguridad"""
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE inmoser_service_order SET write_date = %s WHERE id IN %s",
+            (self.env.cr.now() - timedelta(minutes=minutes, seconds=seconds), tuple(orders.ids))
+        )
+        self.env.invalidate_all()
+
+    def test_batch_by_ids(self):
+        """Test estados compactos de las órdenes pedidas"""
+        result = self.Order._get_status_batch(order_ids=self.orders[:3].ids)
+
+        self.assertEqual({order['id'] for order in result['orders']}, set(self.orders[:3].ids))
+        self.assertEqual(set(result['orders'][0]), {'id', 'name', 'state', 'scheduled_date', 'technician', 'write_date'})
+        self.assertIsNone(result['next'])
+
+    def test_keyset_pagination(self):
+        """Test recorrer por cursor sin repetir ni perder órdenes"""
+        seen = []
+        cursor = None
+        while True:
+            result = self.Order._get_status_batch(order_ids=self.orders.ids, cursor=cursor, limit=3)
+            seen += [order['id'] for order in result['orders']]
+            cursor = result['next']
+            if not cursor:
+                break
+
+        self.assertEqual(sorted(seen), sorted(self.orders.ids))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_updated_since(self):
+        """Test solo órdenes modificadas desde la fecha"""
+        self.env.cr.execute(
+            "UPDATE inmoser_service_order SET write_date = write_date - interval '1 day' WHERE id IN %s",
+            (tuple(self.orders[1:].ids),)
+        )
+        self.env.invalidate_all()
+        since = self.orders[0].write_date.isoformat()
+
+        result = self.Order._get_status_batch(order_ids=self.orders.ids, updated_since=since)
+        self.assertEqual([order['id'] for order in result['orders']], self.orders[:1].ids)
+
+    def test_safety_lag(self):
+        """Test órdenes recientes se entregan después del margen, sin perderlas"""
+        late = self.orders[-1]
+        self._set_write_date(late, seconds=5)
+
+        # Consulta por IDs: estado actual, sin margen
+        result = self.Order._get_status_batch(order_ids=self.orders.ids)
+        self.assertIn(late.id, [order['id'] for order in result['orders']])
+
+        # Sincronización: la orden reciente queda para la siguiente consulta
+        since = self.orders[0].write_date.isoformat()
+        result = self.Order._get_status_batch(order_ids=self.orders.ids, updated_since=since)
+        self.assertNotIn(late.id, [order['id'] for order in result['orders']])
+        since = result['orders'][-1]['write_date']
+
+        # Pasado el margen, una transacción que confirmó tarde sigue por delante del cursor
+        self._set_write_date(late, minutes=2)
+        result = self.Order._get_status_batch(order_ids=self.orders.ids, updated_since=since)
+        self.assertIn(late.id, [order['id'] for order in result['orders']])
+
+    def test_limits(self):
+        """Test demasiados IDs o cursor inválido"""
+        with self.assertRaises(UserError):
+            self.Order._get_status_batch(order_ids=list(range(1, 5002)))
+        with self.assertRaises(UserError):
+            self.Order._get_status_batch(cursor='not-a-cursor')
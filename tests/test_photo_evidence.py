@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from io import BytesIO
+from PIL import Image
+import base64
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def make_photo(width=2400, height=1800, fmt='JPEG', orientation=None):
+    """Foto de prueba en base64, con ruido como una foto real y EXIF opcional"""
+    noise = Image.effect_noise((width, height), 40)
+    image = Image.merge('RGB', (noise, noise.transpose(Image.FLIP_LEFT_RIGHT), noise))
+    buffer = BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(buffer, format=fmt, quality=95, exif=exif.tobytes())
+    else:
+        image.save(buffer, format=fmt)
+    return base64.b64encode(buffer.getvalue())
+
+
+class TestPhotoEvidence(TransactionCase):
+    """
+    Tests para las evidencias fotográficas de las órdenes
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Photo Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'Photo Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Photo Service',
+            'allow_photos': True,
+        })
+
+        self.order = self.env['inmoser.service.order'].create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Photo test',
+        })
+
+    def test_photos_stored_as_attachments(self):
+        """Test fotos y firma en adjuntos, fuera de la tabla de órdenes"""
+        self.order.write({
+            'photo_before': make_photo(),
+            'customer_signature': make_photo(200, 100, 'PNG'),
+        })
+        self.env['inmoser.service.order']._cron_process_photos()
+        self.env.flush_all()
+
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'inmoser.service.order'),
+            ('res_id', '=', self.order.id),
+            ('res_field', 'in', ['photo_before', 'photo_before_128', 'customer_signature']),
+        ])
+        self.assertEqual(set(attachments.mapped('res_field')),
+                         {'photo_before', 'photo_before_128', 'customer_signature'})
+
+        self.env.cr.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'inmoser_service_order'
+              AND column_name IN ('photo_before', 'photo_after', 'customer_signature')
+        """)
+        self.assertFalse(self.env.cr.fetchall())
+
+    def test_upload_does_no_image_work(self):
+        """Test la foto se guarda tal cual y queda pendiente de procesar"""
+        photo = make_photo()
+        self.order.photo_after = photo
+
+        self.assertTrue(self.order.photo_pending)
+        self.assertEqual(self.order.photo_after, photo)
+        self.assertFalse(self.order.photo_after_128)
+
+    def test_pipeline_resizes_and_strips_exif(self):
+        """Test pipeline: orientación aplicada, sin EXIF, tamaño máximo y JPEG progresivo"""
+        # Orientación 6: la foto se giró 90° en el teléfono
+        original = make_photo(orientation=6)
+        self.order.photo_after = original
+
+        self.env['inmoser.service.order']._cron_process_photos()
+
+        self.assertFalse(self.order.photo_pending)
+        photo = Image.open(BytesIO(base64.b64decode(self.order.photo_after)))
+        self.assertEqual(photo.format, 'JPEG')
+        self.assertEqual(photo.size, (1200, 1600))
+        self.assertFalse(photo.getexif())
+        self.assertTrue(photo.info.get('progressive') or photo.info.get('progression'))
+        self.assertLess(len(self.order.photo_after), len(original) / 2)
+
+        thumbnail = Image.open(BytesIO(base64.b64decode(self.order.photo_after_128)))
+        self.assertLessEqual(max(thumbnail.size), 128)
+        preview = Image.open(BytesIO(base64.b64decode(self.order.photo_after_1024)))
+        self.assertLessEqual(max(preview.size), 1024)
+
+    def test_pipeline_webp_output(self):
+        """Test formato de salida WebP configurable"""
+        self.env['ir.config_parameter'].sudo().set_param('inmoser_service_order.photo_format', 'WEBP')
+        self.order.photo_before = make_photo(800, 600, 'PNG')
+
+        self.env['inmoser.service.order']._cron_process_photos()
+
+        photo = Image.open(BytesIO(base64.b64decode(self.order.photo_before)))
+        self.assertEqual(photo.format, 'WEBP')
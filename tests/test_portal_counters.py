@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TestPortalCounters(TransactionCase):
+    """
+    Tests para los contadores almacenados del cliente usados en el portal
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Counter Customer',
+        })
+        self.other_partner = self.env['res.partner'].create({
+            'name': 'Other Counter Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'Counter Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Counter Service',
+        })
+
+    def _create_order(self):
+        return self.env['inmoser.service.order'].create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Counter test',
+        })
+
+    def test_counters_follow_orders(self):
+        """Test contador de órdenes al crear, reasignar y eliminar"""
+        first = self._create_order()
+        second = self._create_order()
+        self.assertEqual(self.partner.x_inmoser_service_order_count, 2)
+
+        second.partner_id = self.other_partner
+        self.assertEqual(self.partner.x_inmoser_service_order_count, 1)
+        self.assertEqual(self.other_partner.x_inmoser_service_order_count, 1)
+
+        first.unlink()
+        self.assertEqual(self.partner.x_inmoser_service_order_count, 0)
+
+    def test_counters_follow_equipment(self):
+        """Test contador de equipos al crear y archivar"""
+        self.assertEqual(self.partner.x_inmoser_equipment_count, 1)
+
+        self.env['inmoser.service.equipment'].create({
+            'name': 'Counter Equipment 2',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+        self.assertEqual(self.partner.x_inmoser_equipment_count, 2)
+
+        self.equipment.active = False
+        self.assertEqual(self.partner.x_inmoser_equipment_count, 1)
+
+    def test_counters_read_without_counting(self):
+        """Test leer los contadores no ejecuta consultas de conteo"""
+        self._create_order()
+        self.env.flush_all()
+        self.env.invalidate_all()
+
+        with self.assertQueryCount(__system__=1):
+            self.partner.x_inmoser_service_order_count
+            self.partner.x_inmoser_equipment_count
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from datetime import datetime, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TestPortalPagination(TransactionCase):
+    """
+    Tests para la paginación por clave del listado de órdenes del portal
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Pagination Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'Pagination Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Pagination Service',
+        })
+
+        self.Order = self.env['inmoser.service.order']
+        base_date = datetime(2024, 1, 1, 9, 0)
+        for index in range(11):
+            self.Order.create({
+                'partner_id': self.partner.id,
+                'equipment_id': self.equipment.id,
+                'service_type_id': self.service_type.id,
+                'reported_fault': 'Pagination test %s' % index,
+                # Fechas repetidas y vacías para probar el desempate y los nulos
+                'scheduled_date': base_date + timedelta(days=index // 3) if index % 4 else False,
+            })
+        self.domain = [('partner_id', '=', self.partner.id)]
+
+    def _walk(self, sortby, limit=4):
+        """Recorrer todas las páginas hacia adelante y de vuelta hacia atrás"""
+        forward = []
+        pages = []
+        orders, first, last = self.Order._portal_search_page(self.domain, sortby, limit)
+        while orders:
+            pages.append(orders.ids)
+            forward += orders.ids
+            cursor_first, cursor_last = first, last
+            orders, first, last = self.Order._portal_search_page(self.domain, sortby, limit, after=last)
+
+        backward = []
+        orders, first, last = self.Order._portal_search_page(self.domain, sortby, limit, before=cursor_first)
+        while orders:
+            backward = orders.ids + backward
+            orders, first, last = self.Order._portal_search_page(self.domain, sortby, limit, before=first)
+        return forward, pages, backward
+
+    def test_keyset_matches_offset_order(self):
+        """Test cada ordenamiento recorre las mismas órdenes en el mismo orden que OFFSET"""
+        expected_orders = {
+            'date': 'create_date desc, id desc',
+            'scheduled': 'scheduled_date desc nulls last, id desc',
+            'name': 'name asc, id asc',
+        }
+        for sortby, order in expected_orders.items():
+            expected = self.Order.search(self.domain, order=order).ids
+            forward, pages, backward = self._walk(sortby)
+
+            self.assertEqual(forward, expected, sortby)
+            self.assertEqual([len(page) for page in pages], [4, 4, 3], sortby)
+            # Hacia atrás desde la última página: todas menos la última
+            self.assertEqual(backward, expected[:8], sortby)
+
+    def test_count_cache(self):
+        """Test total cacheado e invalidado al crear órdenes"""
+        count = self.Order._portal_count(self.domain)
+        self.assertEqual(count, 11)
+
+        self.env.cr.execute("DELETE FROM inmoser_service_order WHERE id = %s", (self.Order.search(self.domain, limit=1).id,))
+        self.assertEqual(self.Order._portal_count(self.domain), 11)
+
+        self.Order.create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Pagination count',
+        })
+        self.assertEqual(self.Order._portal_count(self.domain), 11)
+
+    def test_indexes_created(self):
+        """Test los init del portal y de la API crean sus índices"""
+        self.env.cr.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'inmoser_service_order'"
+        )
+        indexes = {row[0] for row in self.env.cr.fetchall()}
+        self.assertIn('inmoser_service_order_write_date_id_index', indexes)
+        self.assertIn('inmoser_service_order_portal_create_date_index', indexes)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from unittest.mock import patch
+from io import BytesIO
+import logging
+
+from odoo.addons.inmoser_service_order.tools.qr import render_qr_pngs
+
+RENDER = 'odoo.addons.inmoser_service_order.models.qr_cache.render_qr_pngs'
+
+_logger = logging.getLogger(__name__)
+
+
+class TestQRCache(TransactionCase):
+    """
+    Tests para la caché de imágenes QR
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'QR Cache Customer',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'QR Cache Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'QR Cache Service',
+        })
+
+        self.qr_cache = self.env['inmoser.qr.cache']
+
+    def test_cache_renders_once_per_payload(self):
+        """Test el mismo texto y tamaño no se vuelve a renderizar"""
+        generator = type(self.env['inmoser.qr.generator'])
+        with patch.object(generator, 'generate_qr_code', autospec=True,
+                          side_effect=generator.generate_qr_code) as render:
+            first = self.qr_cache._get_entry('https://example.com/qr/1')
+            second = self.qr_cache._get_entry('https://example.com/qr/1')
+            other_size = self.qr_cache._get_entry('https://example.com/qr/1', box_size=5)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other_size)
+        self.assertEqual(render.call_count, 2)
+        self.assertTrue(first.image)
+
+    def test_cache_lru_limit(self):
+        """Test se eliminan las entradas menos usadas al superar el límite"""
+        self.env['ir.config_parameter'].sudo().set_param('inmoser_service_order.qr_cache_size', 2)
+        self.qr_cache.sudo().search([]).unlink()
+
+        oldest = self.qr_cache._get_entry('https://example.com/qr/a')
+        oldest.last_used = '2000-01-01 00:00:00'
+        self.qr_cache._get_entry('https://example.com/qr/b')
+        self.qr_cache._get_entry('https://example.com/qr/c')
+        self.assertEqual(self.qr_cache.sudo().search_count([]), 3)
+
+        self.qr_cache._gc_least_used()
+        self.assertFalse(oldest.exists())
+        self.assertEqual(self.qr_cache.sudo().search_count([]), 2)
+
+    def test_order_write_does_no_image_work(self):
+        """Test cambiar estado o cliente de la orden no renderiza QR"""
+        order = self.env['inmoser.service.order'].create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'QR cache test',
+        })
+
+        generator = type(self.env['inmoser.qr.generator'])
+        with patch.object(generator, 'generate_qr_code', autospec=True) as render:
+            order.write({'state': 'cancelled'})
+            self.equipment.write({'name': 'QR Cache Equipment 2'})
+        render.assert_not_called()
+
+        # Se renderiza bajo demanda al leer el campo
+        self.assertTrue(order.qr_code_order)
+        self.assertIn('/inmoser/service-order/%s' % order.id, order.qr_code_order_text)
+        self.assertTrue(self.equipment.qr_code)
+
+    def test_compute_batches_lookups(self):
+        """Test leer el QR de varios equipos: una búsqueda y un solo renderizado por lote"""
+        equipments = self.equipment
+        for index in range(4):
+            equipments |= self.env['inmoser.service.equipment'].create({
+                'name': 'QR Batch Equipment %s' % index,
+                'partner_id': self.partner.id,
+                'equipment_type': 'computer',
+            })
+        equipments.invalidate_recordset(['qr_code'])
+
+        entries = self.qr_cache.sudo().search_count([])
+        with patch(RENDER, side_effect=render_qr_pngs) as render:
+            self.assertTrue(all(equipments.mapped('qr_code')))
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(len(render.call_args[0][0]), 5)
+        # Leer el campo no escribe en la caché
+        self.assertEqual(self.qr_cache.sudo().search_count([]), entries)
+        self.assertEqual(equipments[0].qr_code_text, equipments[0]._get_qr_payload())
+
+        # Ya en caché: sin renderizar
+        self.qr_cache._get_encoded_images([equipment._get_qr_payload() for equipment in equipments])
+        equipments.invalidate_recordset(['qr_code'])
+        with patch(RENDER) as render:
+            equipments.mapped('qr_code')
+        render.assert_not_called()
+
+    def test_label_sheet_reuses_cache(self):
+        """Test hoja de etiquetas: PDF válido y QR reutilizados de la caché"""
+        equipments = self.equipment
+        for index in range(29):
+            equipments |= self.env['inmoser.service.equipment'].create({
+                'name': 'Label Equipment %s' % index,
+                'partner_id': self.partner.id,
+                'equipment_type': 'computer',
+            })
+        sheet = self.env['inmoser.qr.label.sheet'].create({
+            'equipment_ids': [(6, 0, equipments.ids)],
+        })
+
+        first = BytesIO()
+        self.assertEqual(sheet._write_pdf(first), 30)
+        self.assertTrue(first.getvalue().startswith(b'%PDF-1.4'))
+        self.assertTrue(first.getvalue().rstrip().endswith(b'%%EOF'))
+        # 24 etiquetas por página: dos páginas
+        self.assertEqual(first.getvalue().count(b'/Type /Page '), 2)
+
+        with patch(RENDER) as render:
+            second = BytesIO()
+            sheet._write_pdf(second)
+        render.assert_not_called()
+        self.assertEqual(first.getvalue(), second.getvalue())
+
+    def test_print_labels_action(self):
+        """Test acción de impresión de etiquetas"""
+        action = self.equipment.action_print_qr_labels()
+        self.assertEqual(action['type'], 'ir.actions.act_url')
+        self.assertTrue(action['url'].endswith('.pdf'))
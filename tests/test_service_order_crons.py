@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from datetime import datetime, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class TestServiceOrderCrons(TransactionCase):
+    """
+    Tests para los crons de órdenes de servicio
+    """
+    
+    def setUp(self):
+        super().setUp()
+        
+        self.partner = self.env['res.partner'].create({
+            'name': 'Cron Customer',
+            'email': 'cron@customer.com',
+        })
+        
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+            'brand': 'Test Brand',
+        })
+        
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Cron Service',
+            'estimated_duration': 2.0,
+        })
+    
+    def _create_order(self, scheduled_date, **vals):
+        values = {
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Cron test',
+            'scheduled_date': scheduled_date,
+        }
+        values.update(vals)
+        return self.env['inmoser.service.order'].create(values)
+    
+    def _move_to_past(self, orders, hours=1):
+        """Simular el paso del tiempo sin recalcular is_overdue"""
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE inmoser_service_order SET scheduled_date = %s WHERE id IN %s",
+            (datetime.now() - timedelta(hours=hours), tuple(orders.ids))
+        )
+        orders.invalidate_recordset(['scheduled_date'])
+    
+    def test_overdue_cron_flags_in_bulk(self):
+        """Test cron de órdenes vencidas con un solo UPDATE"""
+        future = datetime.now() + timedelta(days=1)
+        draft = self._create_order(future)
+        done = self._create_order(future, state='done')
+        late = self._create_order(future)
+        self._move_to_past(draft | done)
+        
+        self.assertFalse(draft.is_overdue)
+        self.assertEqual(self.env['inmoser.service.order']._cron_check_overdue_orders(), 1)
+        
+        self.assertTrue(draft.is_overdue)
+        self.assertFalse(done.is_overdue)
+        self.assertFalse(late.is_overdue)
+        self.assertIn('overdue', draft.message_ids[0].body)
+        
+        # Una segunda pasada no vuelve a marcar ni notificar
+        self.assertEqual(self.env['inmoser.service.order']._cron_check_overdue_orders(), 0)
+        
+        # Reprogramar la orden recalcula el campo almacenado
+        draft.scheduled_date = future
+        self.assertFalse(draft.is_overdue)
+        
+        # Un nuevo vencimiento de la orden reprogramada se vuelve a notificar
+        self._move_to_past(draft, hours=2)
+        self.assertEqual(self.env['inmoser.service.order']._cron_check_overdue_orders(), 1)
+        self.assertEqual(len(draft.message_ids.filtered(lambda m: 'overdue' in (m.body or ''))), 2)
+    
+    def test_overdue_cron_notifies_computed_flag(self):
+        """Test órdenes ya vencidas al crearse también reciben el mensaje"""
+        order = self._create_order(datetime.now() - timedelta(hours=1))
+        self.assertTrue(order.is_overdue)
+        
+        self.assertEqual(self.env['inmoser.service.order']._cron_check_overdue_orders(), 1)
+        self.assertIn('overdue', order.message_ids[0].body)
+        self.assertEqual(order.message_ids[0].subtype_id, self.env.ref('mail.mt_note'))
+        self.assertEqual(order.overdue_notified_date, order.scheduled_date)
+        self.assertEqual(self.env['inmoser.service.order']._cron_check_overdue_orders(), 0)
+    
+    def test_daily_reminders_digest_and_cursor(self):
+        """Test recordatorios diarios por lotes con resumen y cursor"""
+        self.env['ir.config_parameter'].sudo().set_param('inmoser_service_order.reminder_digest_threshold', 1)
+        technicians = self.env['hr.employee'].create([{
+            'name': 'Reminder Technician %s' % index,
+            'x_inmoser_is_technician': True,
+            'x_inmoser_available_hours': '10-12,12-14,15-17',
+        } for index in range(2)])
+        tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+        busy_orders = self._create_order(tomorrow, state='assigned', assigned_technician_id=technicians[0].id)
+        busy_orders |= self._create_order(tomorrow.replace(hour=12), state='assigned',
+                                          assigned_technician_id=technicians[0].id)
+        single_order = self._create_order(tomorrow, state='assigned', assigned_technician_id=technicians[1].id)
+        
+        ServiceOrder = self.env['inmoser.service.order']
+        self.assertEqual(ServiceOrder._cron_send_daily_reminders(), 2)
+        
+        digest = self.env['mail.activity'].search([
+            ('res_model', '=', 'hr.employee'),
+            ('res_id', '=', technicians[0].id),
+        ])
+        self.assertEqual(len(digest), 1)
+        for order in busy_orders:
+            self.assertIn(order.name, digest.note)
+        self.assertTrue(single_order.activity_ids.filtered(lambda a: 'Tomorrow' in a.summary))
+        
+        # La ejecución completa borra el cursor
+        params = self.env['ir.config_parameter'].sudo()
+        self.assertFalse(params.get_param('inmoser_service_order.reminder_cursor'))
+        
+        # Repetir la ejecución el mismo día no duplica recordatorios
+        self.assertEqual(ServiceOrder._cron_send_daily_reminders(), 0)
+        
+        # Una orden nueva sí recibe su recordatorio
+        new_order = self._create_order(tomorrow.replace(hour=15), state='assigned',
+                                       assigned_technician_id=technicians[1].id)
+        self.assertEqual(ServiceOrder._cron_send_daily_reminders(), 1)
+        
+        # Una ejecución interrumpida tras el primer técnico continúa desde el cursor
+        self.env['mail.activity'].search([
+            ('res_model', '=', 'inmoser.service.order'),
+            ('res_id', 'in', (single_order | new_order).ids),
+        ]).unlink()
+        params.set_param('inmoser_service_order.reminder_cursor', '%s:%s' % (tomorrow.date(), technicians[0].id))
+        self.assertEqual(ServiceOrder._cron_send_daily_reminders(), 1)
+        self.assertFalse(params.get_param('inmoser_service_order.reminder_cursor'))
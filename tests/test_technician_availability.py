@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from odoo.exceptions import ValidationError
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class TestTechnicianAvailability(TransactionCase):
+    """
+    Tests para el motor de disponibilidad de técnicos
+    """
+    
+    def setUp(self):
+        super().setUp()
+        
+        self.partner = self.env['res.partner'].create({
+            'name': 'Availability Customer',
+        })
+        
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+            'brand': 'Test Brand',
+        })
+        
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Availability Service',
+            'estimated_duration': 2.0,
+        })
+        
+        self.technician_1 = self.env['hr.employee'].create({
+            'name': 'Availability Technician 1',
+            'x_inmoser_is_technician': True,
+            'x_inmoser_available_hours': '10-12,12-14,15-17',
+            'x_inmoser_max_daily_orders': 2,
+        })
+        
+        self.technician_2 = self.env['hr.employee'].create({
+            'name': 'Availability Technician 2',
+            'x_inmoser_is_technician': True,
+            'x_inmoser_available_hours': '10-12,12-14,15-17',
+            'x_inmoser_max_daily_orders': 2,
+        })
+        
+        tomorrow = datetime.now() + timedelta(days=1)
+        self.slot = tomorrow.replace(hour=10, minute=0, second=0, microsecond=0)
+    
+    def _create_order(self, technician, scheduled_date, **vals):
+        values = {
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Availability test',
+            'assigned_technician_id': technician.id if technician else False,
+            'scheduled_date': scheduled_date,
+        }
+        values.update(vals)
+        return self.env['inmoser.service.order'].create(values)
+    
+    def test_engine_answers_without_queries(self):
+        """Test que el motor responde sin consultas adicionales"""
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        technicians = self.technician_1 | self.technician_2
+        
+        availability = self.env['inmoser.service.order']._get_technician_availability(self.slot, technicians)
+        
+        with self.assertQueryCount(0):
+            self.assertFalse(availability.is_available(self.technician_1.id, self.slot))
+            self.assertTrue(availability.is_available(self.technician_2.id, self.slot))
+            self.assertEqual(availability.first_available(self.slot), self.technician_2.id)
+    
+    def test_daily_capacity(self):
+        """Test límite diario de órdenes en el motor"""
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        self._create_order(self.technician_1, self.slot.replace(hour=12), state='assigned')
+        
+        availability = self.env['inmoser.service.order']._get_technician_availability(self.slot, self.technician_1)
+        
+        self.assertFalse(availability.has_capacity(self.technician_1.id))
+        self.assertFalse(availability.is_available(self.technician_1.id, self.slot.replace(hour=15)))
+    
+    def test_overlapping_duration_blocks_slot(self):
+        """Test que una orden larga bloquea las horas que ocupa"""
+        long_service = self.env['inmoser.service.type'].create({
+            'name': 'Long Availability Service',
+            'estimated_duration': 3.0,
+        })
+        self._create_order(self.technician_1, self.slot, service_type_id=long_service.id, state='assigned')
+        
+        availability = self.env['inmoser.service.order']._get_technician_availability(self.slot, self.technician_1)
+        
+        self.assertFalse(availability.is_available(self.technician_1.id, self.slot.replace(hour=11)))
+        self.assertFalse(availability.is_available(self.technician_1.id, self.slot.replace(hour=12)))
+        self.assertTrue(availability.is_available(self.technician_1.id, self.slot.replace(hour=15)))
+        self.assertEqual(
+            availability.next_free_slot(self.technician_1.id, 2.0, self.slot),
+            self.slot.replace(hour=15))
+    
+    def test_available_time_slots_respect_duration(self):
+        """Test slots libres según la duración del trabajo"""
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        
+        slots = self.technician_1.get_available_time_slots(self.slot.date())
+        self.assertEqual(slots, [(12.0, 14.0), (15.0, 17.0)])
+        
+        slots = self.technician_1.get_available_time_slots(self.slot.date(), duration=3.0)
+        self.assertEqual(slots, [])
+    
+    def test_order_does_not_block_itself(self):
+        """Test que la orden no se bloquea a sí misma"""
+        order = self._create_order(self.technician_1, self.slot)
+        
+        self.assertTrue(order._is_technician_available(self.technician_1, self.slot))
+    
+    def test_auto_assign_uses_first_free_technician(self):
+        """Test asignación automática con el motor de disponibilidad"""
+        busy = self._create_order(self.technician_1, self.slot, state='assigned')
+        order = self._create_order(False, self.slot)
+        
+        technician = order._find_available_technician()
+        
+        self.assertTrue(technician)
+        self.assertNotEqual(technician, busy.assigned_technician_id)
+    
+    def test_get_available_technicians(self):
+        """Test técnicos disponibles para una fecha"""
+        available = self.env['hr.employee'].get_available_technicians(self.slot.date())
+        
+        self.assertIn(self.technician_1, available)
+        self.assertIn(self.technician_2, available)
+    
+    def test_working_hours_index(self):
+        """Test índice precompilado de horas de trabajo"""
+        self.assertEqual(self.technician_1.x_inmoser_hours_mask, sum(1 << hour for hour in [10, 11, 12, 13, 15, 16]))
+        
+        working_hours = self.technician_1._get_working_hours()
+        # Las máscaras están almacenadas en el técnico: sin consultas adicionales
+        with self.assertQueryCount(0):
+            working_hours = self.technician_1._get_working_hours()
+        
+        masks = working_hours[self.technician_1.id]
+        self.assertTrue(masks[0] >> 10 & 1)
+        self.assertFalse(masks[0] >> 14 & 1)
+        
+        # Una fila de horario reemplaza las horas disponibles para ese día
+        self.env['inmoser.technician.schedule'].create({
+            'technician_id': self.technician_1.id,
+            'day_of_week': '0',
+            'start_time': 8.0,
+            'end_time': 10.0,
+        })
+        masks = self.technician_1._get_working_hours()[self.technician_1.id]
+        self.assertTrue(masks[0] >> 8 & 1)
+        self.assertFalse(masks[0] >> 10 & 1)
+        self.assertTrue(masks[1] >> 10 & 1)
+    
+    def test_working_hours_index_sync_on_write(self):
+        """Test que el índice se actualiza al modificar las horas"""
+        self.technician_1._get_working_hours()
+        self.technician_1.x_inmoser_available_hours = '8-9'
+        
+        masks = self.technician_1._get_working_hours()[self.technician_1.id]
+        self.assertEqual(masks[2], 1 << 8)
+    
+    def test_batch_dispatch(self):
+        """Test despacho masivo con capacidad diaria"""
+        self.env['hr.employee'].search([
+            ('x_inmoser_is_technician', '=', True),
+            ('id', 'not in', (self.technician_1 | self.technician_2).ids),
+        ]).write({'active': False})
+        
+        orders = self.env['inmoser.service.order']
+        for hour in [10, 10, 12, 12, 15]:
+            orders |= self._create_order(False, self.slot.replace(hour=hour))
+        
+        result = orders._batch_dispatch()
+        
+        self.assertEqual(result['dispatched'], 4)
+        self.assertEqual(result['unassigned'], 1)
+        dispatched = orders.filtered(lambda o: o.state == 'assigned')
+        self.assertEqual(len(dispatched), 4)
+        
+        # Ningún técnico supera su capacidad ni tiene dos órdenes a la misma hora
+        for technician in self.technician_1 | self.technician_2:
+            technician_orders = dispatched.filtered(lambda o: o.assigned_technician_id == technician)
+            self.assertLessEqual(len(technician_orders), technician.x_inmoser_max_daily_orders)
+            self.assertEqual(len(technician_orders), len(set(technician_orders.mapped('scheduled_date'))))
+    
+    def test_workload_matrix(self):
+        """Test matriz de carga técnico × día × estado"""
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        in_progress = self._create_order(self.technician_1, self.slot.replace(hour=12), state='in_progress')
+        self._create_order(self.technician_2, self.slot, state='done')
+        date_from = self.slot.replace(hour=0)
+        date_to = date_from + timedelta(days=1)
+        technicians = self.technician_1 | self.technician_2
+        
+        ServiceOrder = self.env['inmoser.service.order']
+        matrix = ServiceOrder.get_workload_matrix(technicians.ids, date_from, date_to)
+        day = self.slot.strftime('%Y-%m-%d')
+        
+        self.assertEqual(matrix[self.technician_1.id][day]['assigned'], {'count': 1, 'hours': 2.0})
+        self.assertEqual(matrix[self.technician_1.id][day]['in_progress'], {'count': 1, 'hours': 2.0})
+        self.assertEqual(matrix[self.technician_2.id], {})
+        
+        workload = ServiceOrder.get_technician_workload(self.technician_1.id, date_from, date_to)
+        with self.assertQueryCount(0):
+            self.assertEqual(ServiceOrder.get_technician_workload(self.technician_1.id, date_from, date_to), workload)
+        self.assertEqual(workload['total_orders'], 2)
+        self.assertEqual(workload['orders_by_state']['in_progress'], 1)
+        self.assertEqual(workload['total_estimated_hours'], 4.0)
+        
+        # Eliminar una orden invalida la caché
+        in_progress.unlink()
+        workload = ServiceOrder.get_technician_workload(self.technician_1.id, date_from, date_to)
+        self.assertEqual(workload['total_orders'], 1)
+        matrix = ServiceOrder.get_workload_matrix(technicians.ids, date_from, date_to)
+        self.assertNotIn('in_progress', matrix[self.technician_1.id][day])
+    
+    def test_stored_order_counters(self):
+        """Test contadores almacenados de órdenes del técnico"""
+        order = self._create_order(self.technician_1, self.slot, state='assigned')
+        self.assertEqual(self.technician_1.x_inmoser_active_orders_count, 1)
+        self.assertEqual(self.technician_1.x_inmoser_completed_orders_count, 0)
+        
+        order.write({'state': 'done'})
+        self.assertEqual(self.technician_1.x_inmoser_active_orders_count, 0)
+        self.assertEqual(self.technician_1.x_inmoser_completed_orders_count, 1)
+        
+        order.write({'assigned_technician_id': self.technician_2.id})
+        self.assertEqual(self.technician_1.x_inmoser_completed_orders_count, 0)
+        self.assertEqual(self.technician_2.x_inmoser_completed_orders_count, 1)
+    
+    def test_daily_load_summary(self):
+        """Test resumen diario usado por check_daily_capacity"""
+        DailyLoad = self.env['inmoser.technician.daily.load']
+        day = self.slot.date()
+        
+        order_1 = self._create_order(self.technician_1, self.slot, state='assigned')
+        order_2 = self._create_order(self.technician_1, self.slot.replace(hour=12), state='assigned')
+        self.assertEqual(DailyLoad.get_booked_count(self.technician_1.id, day), 2)
+        self.assertFalse(self.technician_1.check_daily_capacity(day))
+        
+        order_1.write({'state': 'cancelled'})
+        self.assertEqual(DailyLoad.get_booked_count(self.technician_1.id, day), 1)
+        self.assertTrue(self.technician_1.check_daily_capacity(day))
+        
+        order_2.write({'scheduled_date': self.slot + timedelta(days=1)})
+        self.assertEqual(DailyLoad.get_booked_count(self.technician_1.id, day), 0)
+        self.assertEqual(DailyLoad.get_booked_count(self.technician_1.id, day + timedelta(days=1)), 1)
+        
+        order_2.unlink()
+        self.assertEqual(DailyLoad.get_booked_count(self.technician_1.id, day + timedelta(days=1)), 0)
+    
+    def test_capacity_ledger_range_load(self):
+        """Test lectura semanal del libro de capacidad"""
+        DailyLoad = self.env['inmoser.technician.daily.load']
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        self._create_order(self.technician_2, self.slot + timedelta(days=2), state='assigned')
+        technicians = self.technician_1 | self.technician_2
+        
+        with self.assertQueryCount(1):
+            load = DailyLoad.get_range_load(technicians.ids, self.slot.date(), self.slot.date() + timedelta(days=6))
+        
+        self.assertEqual(load[self.technician_1.id], {
+            self.slot.strftime('%Y-%m-%d'): {'count': 1, 'hours': 2.0},
+        })
+        self.assertEqual(load[self.technician_2.id], {
+            (self.slot + timedelta(days=2)).strftime('%Y-%m-%d'): {'count': 1, 'hours': 2.0},
+        })
+    
+    def test_capacity_ledger_rebuild(self):
+        """Test reconstrucción explícita del libro de capacidad"""
+        DailyLoad = self.env['inmoser.technician.daily.load']
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        day = self.slot.date()
+        self.env.flush_all()
+        self.env.cr.execute("DELETE FROM inmoser_technician_daily_load")
+        DailyLoad.invalidate_model()
+        self.assertEqual(DailyLoad.get_booked_count(self.technician_1.id, day), 0)
+        
+        # La acción explícita reconstruye el libro desde las órdenes
+        DailyLoad._rebuild()
+        self.assertEqual(DailyLoad.get_booked_count(self.technician_1.id, day), 1)
+    
+    def test_capacity_ledger_blocks_overbooking(self):
+        """Test que el libro de capacidad impide sobrepasar el máximo diario"""
+        DailyLoad = self.env['inmoser.technician.daily.load']
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        self._create_order(self.technician_1, self.slot.replace(hour=12), state='assigned')
+        self.technician_1.x_inmoser_max_daily_orders = 1
+        
+        line = DailyLoad.search([('technician_id', '=', self.technician_1.id), ('date', '=', self.slot.date())])
+        with self.assertRaises(ValidationError):
+            line._check_capacity()
+    
+    def test_reprogram_wizard_slot_grid(self):
+        """Test rejilla de huecos libres del wizard de reagendamiento"""
+        self.env['hr.employee'].search([
+            ('x_inmoser_is_technician', '=', True),
+            ('id', 'not in', (self.technician_1 | self.technician_2).ids),
+        ]).write({'active': False})
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        order = self._create_order(self.technician_2, self.slot.replace(hour=15), state='assigned')
+        
+        wizard = self.env['inmoser.service.reprogram.wizard'].with_context(
+            default_service_order_id=order.id
+        ).create({'reason': 'Grid test'})
+        self.assertTrue(wizard.slot_grid)
+        self.assertTrue(wizard.soonest_slots)
+        
+        # Cambiar la fecha consulta la rejilla, no la base de datos
+        wizard.invalidate_recordset(['available_technicians'])
+        with self.assertQueryCount(0):
+            technician_ids = wizard._get_available_technicians(self.slot).ids
+        self.assertEqual(technician_ids, [self.technician_2.id])
+        
+        self.assertEqual(wizard._get_available_technicians(self.slot.replace(hour=12)), self.technician_1 | self.technician_2)
+        self.assertFalse(wizard._get_available_technicians(self.slot.replace(hour=13)))
+        self.assertTrue(wizard._is_technician_available(self.technician_2, self.slot.replace(hour=15)))
+    
+    def test_slot_grid_matches_engine(self):
+        """Test la rejilla y el motor aplican la misma regla de horario"""
+        self._create_order(self.technician_1, self.slot, state='assigned')
+        order = self._create_order(False, self.slot)
+        technicians = self.technician_1 | self.technician_2
+        
+        grid = order._get_free_slot_grid(self.slot.date(), 1, technicians)
+        availability = order._get_technician_availability(self.slot, technicians)
+        day_start = self.slot.replace(hour=0)
+        for technician in technicians:
+            for slot in range(48):
+                start = day_start + timedelta(minutes=30 * slot)
+                self.assertEqual(
+                    bool(grid[technician.id][0] >> slot & 1),
+                    availability.is_available(technician.id, start, 2.0),
+                    '%s at %s' % (technician.name, start))
+        
+        # Un trabajo de 2h a las 13:00 cruza el hueco de 14 a 15
+        self.assertFalse(availability.is_available(self.technician_2.id, self.slot.replace(hour=13), 2.0))
+        self.assertTrue(availability.is_available(self.technician_2.id, self.slot.replace(hour=13), 1.0))
+    
+    def test_ranking_prefers_specialty_and_route(self):
+        """Test ranking de técnicos por especialidad y cercanía"""
+        self.technician_2.x_inmoser_specialties = 'Reparación de Computer y laptops'
+        self.assertIn('computer', self.technician_2.x_inmoser_specialty_tokens.split())
+        
+        order = self._create_order(False, self.slot)
+        technicians = self.technician_1 | self.technician_2
+        availability = order._get_technician_availability(self.slot, technicians)
+        ranker = order._get_technician_ranker(technicians, self.slot.date(), self.slot.date())
+        features = order._get_ranking_features()[order.id]
+        
+        self.assertEqual(
+            order._rank_available_technician(availability, ranker, features, self.slot),
+            self.technician_2.id)
+        
+        # Sin especialidades, gana el técnico con un cliente cercano ese día
+        self.technician_2.x_inmoser_specialties = False
+        self.partner.write({'partner_latitude': 19.4326, 'partner_longitude': -99.1332})
+        far_partner = self.env['res.partner'].create({
+            'name': 'Far Customer',
+            'partner_latitude': 20.6597,
+            'partner_longitude': -103.3496,
+        })
+        self._create_order(self.technician_1, self.slot.replace(hour=15), state='assigned', partner_id=far_partner.id)
+        self._create_order(self.technician_2, self.slot.replace(hour=15), state='assigned')
+        
+        availability = order._get_technician_availability(self.slot, technicians)
+        ranker = order._get_technician_ranker(technicians, self.slot.date(), self.slot.date())
+        features = order._get_ranking_features()[order.id]
+        self.assertEqual(
+            order._rank_available_technician(availability, ranker, features, self.slot),
+            self.technician_2.id)
+    
+    def test_route_optimization(self):
+        """Test optimización de ruta diaria del técnico"""
+        self.technician_1.x_inmoser_max_daily_orders = 4
+        short_service = self.env['inmoser.service.type'].create({
+            'name': 'Short Availability Service',
+            'estimated_duration': 1.0,
+        })
+        partners = self.env['res.partner'].create([
+            {'name': 'Route West', 'partner_latitude': 19.4, 'partner_longitude': -99.0},
+            {'name': 'Route Center', 'partner_latitude': 19.4, 'partner_longitude': -98.9},
+            {'name': 'Route East', 'partner_latitude': 19.4, 'partner_longitude': -98.8},
+        ])
+        west = self._create_order(self.technician_1, self.slot.replace(hour=12), state='assigned',
+                                  partner_id=partners[0].id, service_type_id=short_service.id)
+        center = self._create_order(self.technician_1, self.slot.replace(hour=15), state='assigned',
+                                    partner_id=partners[1].id, service_type_id=short_service.id)
+        east = self._create_order(self.technician_1, self.slot, state='assigned',
+                                  partner_id=partners[2].id, service_type_id=short_service.id)
+        
+        rescheduled = self.technician_1._optimize_route(self.slot.date())
+        
+        self.assertEqual(rescheduled, 3)
+        self.assertEqual(west.scheduled_date, self.slot)
+        self.assertEqual(center.scheduled_date, self.slot.replace(hour=11, minute=30))
+        self.assertEqual(east.scheduled_date, self.slot.replace(hour=13))
+        
+        # La reprogramación pasa por el ORM: seguimiento, portal y avisos
+        orders = west | center | east
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+        tracked = self.env['mail.tracking.value'].sudo().search([
+            ('mail_message_id.model', '=', 'inmoser.service.order'),
+            ('mail_message_id.res_id', 'in', orders.ids),
+            ('field_id.name', '=', 'scheduled_date'),
+        ])
+        self.assertEqual(set(tracked.mapped('mail_message_id.res_id')), set(orders.ids))
+        self.assertTrue(self.env['bus.bus'].sudo().search_count([
+            ('channel', 'like', west._get_status_channel()),
+        ]))
+        self.assertEqual(self.env['inmoser.notification.outbox'].search_count([
+            ('template_id', '=', self.env.ref('inmoser_service_order.email_template_service_rescheduled').id),
+            ('res_id', 'in', orders.ids),
+        ]), 3)
+    
+    def test_route_optimization_without_schedule(self):
+        """Test técnicos sin horario: la ruta no se optimiza y se registra"""
+        technician = self.env['hr.employee'].create({
+            'name': 'Route Technician Without Hours',
+            'x_inmoser_is_technician': True,
+        })
+        orders = self._create_order(technician, self.slot, state='assigned')
+        orders |= self._create_order(technician, self.slot.replace(hour=15), state='assigned')
+        
+        with self.assertLogs('odoo.addons.inmoser_service_order.models.hr_employee_route', level='INFO'):
+            self.assertEqual(technician._optimize_route(self.slot.date()), 0)
+        self.assertEqual(orders.mapped('scheduled_date'), [self.slot, self.slot.replace(hour=15)])
+    
+    def test_route_geolocation_failure_remembered(self):
+        """Test una dirección que no se pudo geolocalizar no se reintenta hasta cambiar"""
+        partner = self.env['res.partner'].create({'name': 'Unknown Address', 'street': 'Nowhere 1'})
+        Partner = type(self.env['res.partner'])
+        
+        with patch.object(Partner, 'geo_localize', create=True) as geo_localize:
+            self.assertEqual(partner._get_route_coordinates(), {partner.id: None})
+            self.assertTrue(partner.x_inmoser_geolocation_failed)
+            partner._get_route_coordinates()
+            self.assertEqual(geo_localize.call_count, 1)
+            
+            partner.street = 'Somewhere 2'
+            self.assertFalse(partner.x_inmoser_geolocation_failed)
+            partner._get_route_coordinates()
+            self.assertEqual(geo_localize.call_count, 2)
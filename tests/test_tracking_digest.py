@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from datetime import datetime, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Tablas cuyas filas nuevas se cuentan en cada paso del flujo
+BENCHMARK_TABLES = [
+    'mail_message',
+    'mail_tracking_value',
+    'mail_notification',
+    'mail_followers',
+    'mail_mail',
+    'mail_activity',
+    'ir_attachment',
+    'inmoser_notification_outbox',
+]
+
+
+class TestTrackingDigest(TransactionCase):
+    """
+    Tests y benchmark del modo resumen del seguimiento
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Digest Customer',
+            'email': 'digest@customer.com',
+        })
+
+        self.technician_user = self.env['res.users'].create({
+            'name': 'Digest Technician',
+            'login': 'digest_tech',
+            'email': 'tech@digest.com',
+            'groups_id': [(6, 0, [self.env.ref('inmoser_service_order.group_inmoser_technician').id])]
+        })
+
+        self.technician = self.env['hr.employee'].create({
+            'name': 'Digest Technician',
+            'user_id': self.technician_user.id,
+            'x_inmoser_is_technician': True,
+            'x_inmoser_employee_code': 'DTECH001',
+        })
+
+        self.equipment = self.env['inmoser.service.equipment'].create({
+            'name': 'Digest Equipment',
+            'partner_id': self.partner.id,
+            'equipment_type': 'computer',
+        })
+
+        self.service_type = self.env['inmoser.service.type'].create({
+            'name': 'Digest Service',
+            'base_price': 100.0,
+            'estimated_duration': 2.0,
+            'requires_approval': False,
+        })
+
+    def _set_digest(self, enabled):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'inmoser_service_order.tracking_digest', 'True' if enabled else 'False'
+        )
+
+    def _create_order(self):
+        return self.env['inmoser.service.order'].create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'service_type_id': self.service_type.id,
+            'reported_fault': 'Digest test',
+            'assigned_technician_id': self.technician.id,
+            'scheduled_date': datetime.now() + timedelta(hours=1),
+            'state': 'assigned',
+        })
+
+    def _flush_tracking(self):
+        """Simular el fin de la transacción: finalizar seguimiento y notas"""
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+
+    def _count_rows(self):
+        counts = {}
+        for table in BENCHMARK_TABLES:
+            self.env.cr.execute("SELECT to_regclass(%s)", (table,))
+            if not self.env.cr.fetchone()[0]:
+                continue
+            self.env.cr.execute("SELECT count(*) FROM %s" % table)
+            counts[table] = self.env.cr.fetchone()[0]
+        return counts
+
+    def _run_workflow(self):
+        """
+        Ejecutar el flujo completo de una orden midiendo cada paso
+
+        Returns:
+            list: [(paso, mensajes de la orden, {tabla: filas nuevas})]
+        """
+        order = self._create_order()
+        self._flush_tracking()
+        as_technician = order.with_user(self.technician_user)
+
+        steps = [
+            ('start', lambda: as_technician.action_start_service()),
+            ('request_approval', lambda: (
+                order.write({'diagnosis': 'Digest diagnosis'}), order.action_request_approval()
+            )),
+            ('accept', lambda: order.action_customer_accept()),
+            ('complete', lambda: (
+                order.write({'work_performed': 'Digest work'}), as_technician.action_complete_service()
+            )),
+        ]
+
+        results = []
+        for name, step in steps:
+            rows_before = self._count_rows()
+            messages_before = len(order.message_ids)
+            step()
+            self._flush_tracking()
+            order.invalidate_recordset(['message_ids'])
+            rows_after = self._count_rows()
+            results.append((
+                name,
+                len(order.message_ids) - messages_before,
+                {table: rows_after[table] - rows_before[table] for table in rows_after},
+            ))
+        return results
+
+    def _log_benchmark(self, mode, results):
+        for name, messages, rows in results:
+            _logger.info(
+                "Tracking benchmark [%s] %-16s messages=%s rows=%s",
+                mode, name, messages,
+                ', '.join('%s:%s' % (table, count) for table, count in rows.items() if count)
+            )
+
+    def test_digest_single_entry_per_step(self):
+        """Test modo resumen: una entrada de chatter por paso del flujo"""
+        self._set_digest(True)
+        results = self._run_workflow()
+        self._log_benchmark('digest', results)
+
+        for name, messages, rows in results:
+            self.assertLessEqual(messages, 1, "Step %s wrote %s chatter entries" % (name, messages))
+
+    def test_digest_merges_note_with_tracking(self):
+        """Test nota de flujo unida a los valores de seguimiento"""
+        self._set_digest(True)
+        order = self._create_order()
+        self._flush_tracking()
+        order.invalidate_recordset(['message_ids'])
+        messages_before = order.message_ids
+
+        order.with_user(self.technician_user).action_start_service()
+        self._flush_tracking()
+        order.invalidate_recordset(['message_ids'])
+
+        new_messages = order.message_ids - messages_before
+        self.assertEqual(len(new_messages), 1)
+        self.assertIn('Service started by technician', new_messages.body)
+        self.assertTrue(new_messages.tracking_value_ids)
+        self.assertNotIn('State changed from', new_messages.body)
+
+    def test_digest_note_without_tracking(self):
+        """Test nota sin cambios seguidos: se escribe sola, una vez"""
+        self._set_digest(True)
+        order = self._create_order()
+        self._flush_tracking()
+        order.invalidate_recordset(['message_ids'])
+        messages_before = order.message_ids
+
+        order._post_digest_note('First note')
+        order._post_digest_note('Second note')
+        self._flush_tracking()
+        order.invalidate_recordset(['message_ids'])
+
+        new_messages = order.message_ids - messages_before
+        self.assertEqual(len(new_messages), 1)
+        self.assertIn('First note', new_messages.body)
+        self.assertIn('Second note', new_messages.body)
+
+    def test_benchmark_against_legacy_mode(self):
+        """Benchmark: mensajes y filas por paso con y sin modo resumen"""
+        self._set_digest(False)
+        legacy = self._run_workflow()
+        self._log_benchmark('legacy', legacy)
+
+        self._set_digest(True)
+        digest = self._run_workflow()
+        self._log_benchmark('digest', digest)
+
+        legacy_messages = sum(messages for name, messages, rows in legacy)
+        digest_messages = sum(messages for name, messages, rows in digest)
+        self.assertLess(digest_messages, legacy_messages)
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from . import availability
+from . import dispatch
+from . import ranking
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+# Máscara con las 24 horas del día disponibles
+FULL_DAY_MASK = (1 << 24) - 1
+
+# Resolución por defecto de la rejilla de huecos libres (minutos)
+SLOT_MINUTES = 30
+
+
+class IntervalIndex(object):
+    """
+    Índice de intervalos reservados [inicio, fin) de un técnico en un día.
+
+    Los intervalos se guardan ordenados por inicio junto con el máximo
+    acumulado de los finales, de modo que "¿se solapa [a, b)?" se responde con
+    una búsqueda binaria. Para buscar huecos se mantiene además la lista de
+    intervalos fusionados (disjuntos).
+    """
+
+    def __init__(self, intervals=()):
+        self._rebuild(sorted(intervals))
+
+    def _rebuild(self, intervals):
+        self.intervals = intervals
+        self._starts = [start for start, end in intervals]
+        self._max_ends = []
+        merged = []
+        max_end = None
+        for start, end in intervals:
+            max_end = end if max_end is None or end > max_end else max_end
+            self._max_ends.append(max_end)
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        self._merged = merged
+        self._merged_starts = [start for start, end in merged]
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    @property
+    def booked_hours(self):
+        return sum((end - start).total_seconds() / 3600.0 for start, end in self._merged)
+
+    def overlaps(self, start, end):
+        """Verificar en O(log n) si [start, end) se solapa con alguna reserva"""
+        position = bisect_left(self._starts, end)
+        return position > 0 and self._max_ends[position - 1] > start
+
+    def next_free_gap(self, duration, not_before, not_after=None):
+        """
+        Primer inicio >= not_before con un hueco libre de la duración indicada
+
+        Args:
+            duration (timedelta): Longitud del hueco buscado
+            not_before (datetime): Inicio mínimo del hueco
+            not_after (datetime, optional): Fin máximo del hueco
+
+        Returns:
+            datetime: Inicio del hueco, o None si no hay hueco antes de not_after
+        """
+        candidate = not_before
+        position = bisect_right(self._merged_starts, candidate) - 1
+        if position >= 0 and self._merged[position][1] > candidate:
+            candidate = self._merged[position][1]
+        position += 1
+
+        while position < len(self._merged) and self._merged[position][0] < candidate + duration:
+            candidate = max(candidate, self._merged[position][1])
+            position += 1
+
+        if not_after is not None and candidate + duration > not_after:
+            return None
+        return candidate
+
+    def add(self, start, end):
+        """Añadir una reserva al índice"""
+        intervals = list(self.intervals)
+        insort(intervals, (start, end))
+        self._rebuild(intervals)
+
+
+class TechnicianAvailability(object):
+    """
+    Motor de disponibilidad de técnicos en memoria para un día concreto.
+
+    Se construye con una sola consulta agrupada de las órdenes reservadas del
+    día y responde "quién está libre a la hora T" sin volver a la base de datos.
+    Cada reserva ocupa [scheduled_date, scheduled_date + duración estimada).
+    """
+
+    def __init__(self, day, technician_ids, bookings, max_daily, working_hours):
+        """
+        Args:
+            day (date): Día que cubre el motor
+            technician_ids (list): IDs de técnicos candidatos, en orden de preferencia
+            bookings (dict): {technician_id: [(inicio, fin), ...]} reservas del día
+            max_daily (dict): {technician_id: int} límite diario de órdenes
+            working_hours (dict): {technician_id: (máscara_lunes, ..., máscara_domingo)}
+                o None si el técnico no tiene restricción de horario
+        """
+        self.day = day
+        self.technician_ids = list(technician_ids)
+        self.indexes = {
+            technician_id: IntervalIndex(intervals)
+            for technician_id, intervals in bookings.items()
+        }
+        self.max_daily = max_daily
+        self.working_hours = working_hours
+
+    @property
+    def day_start(self):
+        return datetime.combine(self.day, time.min)
+
+    @property
+    def day_end(self):
+        return self.day_start + timedelta(days=1)
+
+    def get_index(self, technician_id):
+        """Índice de intervalos reservados del técnico"""
+        if technician_id not in self.indexes:
+            self.indexes[technician_id] = IntervalIndex()
+        return self.indexes[technician_id]
+
+    def booked_count(self, technician_id):
+        """Número de órdenes reservadas del técnico en el día"""
+        return len(self.indexes.get(technician_id, ()))
+
+    def load_ratio(self, technician_id):
+        """Fracción ocupada del límite diario del técnico"""
+        max_orders = self.max_daily.get(technician_id) or 0
+        return self.booked_count(technician_id) / max_orders if max_orders else 1.0
+
+    def has_capacity(self, technician_id):
+        """Indica si el técnico no ha alcanzado su límite diario"""
+        return self.booked_count(technician_id) < self.max_daily.get(technician_id, 0)
+
+    def is_within_schedule(self, technician_id, scheduled_date, duration=2.0):
+        """Verificar si el trabajo cabe entero dentro del horario del técnico"""
+        return fits_in_schedule(self.working_hours.get(technician_id), scheduled_date, duration)
+
+    def is_available(self, technician_id, scheduled_date, duration=2.0):
+        """Verificar si un técnico está libre durante [scheduled_date, + duración)"""
+        if scheduled_date.date() != self.day:
+            raise ValueError('Date %s is outside the availability window %s' % (scheduled_date, self.day))
+
+        if technician_id not in self.max_daily:
+            return False
+
+        if not self.is_within_schedule(technician_id, scheduled_date, duration):
+            return False
+
+        if not self.has_capacity(technician_id):
+            return False
+
+        end = scheduled_date + timedelta(hours=duration)
+        return not self.get_index(technician_id).overlaps(scheduled_date, end)
+
+    def available_technicians(self, scheduled_date, duration=2.0):
+        """IDs de los técnicos libres a la hora indicada, en orden de preferencia"""
+        return [
+            technician_id for technician_id in self.technician_ids
+            if self.is_available(technician_id, scheduled_date, duration)
+        ]
+
+    def first_available(self, scheduled_date, duration=2.0):
+        """Primer técnico libre a la hora indicada, o False"""
+        for technician_id in self.technician_ids:
+            if self.is_available(technician_id, scheduled_date, duration):
+                return technician_id
+        return False
+
+    def working_ranges(self, technician_id):
+        """Rangos de trabajo del técnico en el día como tuplas (inicio, fin) datetime"""
+        masks = self.working_hours.get(technician_id)
+        if masks is None:
+            return ()
+        day_start = self.day_start
+        return tuple(
+            (day_start + timedelta(hours=start_hour), day_start + timedelta(hours=end_hour))
+            for start_hour, end_hour in mask_to_ranges(masks[self.day.weekday()])
+        )
+
+    def next_free_slot(self, technician_id, duration=2.0, not_before=None):
+        """
+        Primer inicio libre del técnico para un trabajo de la duración indicada
+
+        Returns:
+            datetime: Inicio del hueco dentro del horario, o None
+        """
+        length = timedelta(hours=duration)
+        index = self.get_index(technician_id)
+        for range_start, range_end in self.working_ranges(technician_id):
+            start = max(range_start, not_before) if not_before else range_start
+            gap = index.next_free_gap(length, start, range_end)
+            if gap is not None:
+                return gap
+        return None
+
+    def free_slots(self, technician_id, duration=2.0):
+        """
+        Huecos libres de la duración indicada dentro del horario del técnico
+
+        Returns:
+            list: Lista de tuplas (hora_inicio, hora_fin) en horas decimales
+        """
+        length = timedelta(hours=duration)
+        index = self.get_index(technician_id)
+        day_start = self.day_start
+
+        free_slots = []
+        for range_start, range_end in self.working_ranges(technician_id):
+            start = range_start
+            while True:
+                gap = index.next_free_gap(length, start, range_end)
+                if gap is None:
+                    break
+                start_hour = (gap - day_start).total_seconds() / 3600.0
+                free_slots.append((start_hour, start_hour + duration))
+                start = gap + length
+        return free_slots
+
+    def technicians_with_free_slots(self, duration=2.0):
+        """IDs de técnicos con capacidad y al menos un hueco libre en el día"""
+        return [
+            technician_id for technician_id in self.technician_ids
+            if self.has_capacity(technician_id) and self.next_free_slot(technician_id, duration)
+        ]
+
+    def book(self, technician_id, scheduled_date, duration=2.0):
+        """Registrar una reserva en memoria (p. ej. durante un despacho masivo)"""
+        self.get_index(technician_id).add(scheduled_date, scheduled_date + timedelta(hours=duration))
+
+
+def parse_available_hours(value):
+    """
+    Parsear horarios disponibles (formato: "10-12,12-14,15-17")
+
+    Returns:
+        list: Lista de tuplas (hora_inicio, hora_fin) o None si no hay restricción
+    """
+    if not value:
+        return None
+
+    hours = []
+    for time_slot in value.split(','):
+        if '-' in time_slot:
+            start_hour, end_hour = map(int, time_slot.strip().split('-'))
+            hours.append((start_hour, end_hour))
+    return hours
+
+
+def format_week_masks(masks):
+    """Serializar las máscaras semanales (lunes a domingo); vacío sin restricciones"""
+    return ','.join(str(mask) for mask in masks) if masks is not None else False
+
+
+@lru_cache(maxsize=1024)
+def parse_week_masks(value):
+    """Máscaras semanales serializadas con format_week_masks, o None sin restricciones"""
+    if not value:
+        return None
+    return tuple(int(mask) for mask in value.split(','))
+
+
+def hours_to_mask(hours):
+    """Convertir rangos (hora_inicio, hora_fin) en una máscara de bits (bit n = hora n)"""
+    mask = 0
+    for start_hour, end_hour in hours:
+        for hour in range(max(start_hour, 0), min(end_hour, 24)):
+            mask |= 1 << hour
+    return mask
+
+
+def float_hours_to_mask(start_time, end_time):
+    """Máscara de las horas completas n tales que start_time <= n < end_time"""
+    mask = 0
+    for hour in range(24):
+        if start_time <= hour < end_time:
+            mask |= 1 << hour
+    return mask
+
+
+@lru_cache(maxsize=1024)
+def mask_to_ranges(mask):
+    """Convertir una máscara de horas en rangos contiguos (hora_inicio, hora_fin)"""
+    ranges = []
+    hour = 0
+    while hour < 24:
+        if mask >> hour & 1:
+            start_hour = hour
+            while hour < 24 and mask >> hour & 1:
+                hour += 1
+            ranges.append((start_hour, hour))
+        else:
+            hour += 1
+    return tuple(ranges)
+
+
+def is_hour_in_masks(masks, scheduled_date):
+    """Verificar la hora de una fecha contra las máscaras semanales de un técnico"""
+    if masks is None:
+        return True  # Sin restricciones de horario
+    return bool(masks[scheduled_date.weekday()] >> scheduled_date.hour & 1)
+
+
+def fits_in_schedule(masks, start, duration, slot_minutes=SLOT_MINUTES):
+    """
+    Verificar que el trabajo [start, start + duración) cabe entero en el horario
+
+    Es la regla de build_slot_grid: todas las franjas que toca el trabajo deben
+    estar dentro del horario de su día, sin pasar de medianoche.
+    """
+    day_start = datetime.combine(start.date(), time.min)
+    end = start + timedelta(hours=duration)
+    if end > day_start + timedelta(days=1):
+        return False
+    day_mask = FULL_DAY_MASK if masks is None else masks[start.weekday()]
+    needed = intervals_to_slot_mask(day_start, [(start, end)], slot_minutes)
+    return not needed & ~hour_mask_to_slot_mask(day_mask, slot_minutes)
+
+
+def round_up_to_slot(value, slot_minutes=SLOT_MINUTES):
+    """Redondear una fecha hacia arriba al inicio de la siguiente franja"""
+    rounded = value.replace(second=0, microsecond=0)
+    if rounded < value:
+        rounded += timedelta(minutes=1)
+    remainder = rounded.minute % slot_minutes
+    return rounded + timedelta(minutes=slot_minutes - remainder) if remainder else rounded
+
+
+@lru_cache(maxsize=256)
+def hour_mask_to_slot_mask(mask, slot_minutes=SLOT_MINUTES):
+    """Expandir una máscara de 24 horas a una máscara de franjas de slot_minutes"""
+    slots_per_hour = 60 // slot_minutes
+    hour_slots = (1 << slots_per_hour) - 1
+    slot_mask = 0
+    for hour in range(24):
+        if mask >> hour & 1:
+            slot_mask |= hour_slots << (hour * slots_per_hour)
+    return slot_mask
+
+
+def intervals_to_slot_mask(day_start, intervals, slot_minutes=SLOT_MINUTES):
+    """Franjas del día tocadas por los intervalos reservados [inicio, fin)"""
+    slots_per_day = 24 * 60 // slot_minutes
+    slot_length = timedelta(minutes=slot_minutes)
+    mask = 0
+    for start, end in intervals:
+        first = max(0, (start - day_start) // slot_length)
+        # Redondear el final hacia arriba: una franja tocada queda ocupada
+        last = min(slots_per_day, -((day_start - end) // slot_length))
+        if last > first:
+            mask |= ((1 << (last - first)) - 1) << first
+    return mask
+
+
+def build_slot_grid(date_from, days, technicians, bookings, max_daily, duration=2.0,
+                    slot_minutes=SLOT_MINUTES):
+    """
+    Rejilla técnico × día de franjas donde puede iniciar un trabajo
+
+    Cada día es un entero cuyo bit i indica que el trabajo de `duration` horas
+    puede empezar en la franja i: cabe entero dentro del horario (la misma
+    regla que fits_in_schedule) y no se solapa con reservas. Se calcula con
+    operaciones de bits sobre el día completo en vez de consultar franja por
+    franja.
+
+    Args:
+        date_from (date): Primer día de la rejilla
+        days (int): Número de días
+        technicians (dict): {technician_id: máscaras semanales o None}
+        bookings (dict): {technician_id: [(inicio, fin)]}
+        max_daily (dict): {technician_id: máximo de órdenes por día}
+        duration (float): Duración en horas del trabajo
+
+    Returns:
+        dict: {technician_id: [máscara de inicios por día]}
+    """
+    slot_length = timedelta(minutes=slot_minutes)
+    length = max(1, -(-int(duration * 60) // slot_minutes))
+    day_starts = [datetime.combine(date_from, time.min) + timedelta(days=offset) for offset in range(days)]
+
+    grid = {}
+    for technician_id, masks in technicians.items():
+        # Repartir las reservas por día una sola vez
+        by_day = [[] for day_start in day_starts]
+        for start, end in bookings.get(technician_id, ()):
+            first = (start - day_starts[0]).days
+            last = (end - slot_length - day_starts[0]).days
+            for offset in range(max(0, first), min(days, last + 1)):
+                by_day[offset].append((start, end))
+
+        limit = max_daily.get(technician_id)
+        rows = []
+        for day_start, intervals in zip(day_starts, by_day):
+            if limit is not None and len([1 for start, end in intervals if start >= day_start]) >= limit:
+                rows.append(0)
+                continue
+            day_mask = FULL_DAY_MASK if masks is None else masks[day_start.weekday()]
+            free = hour_mask_to_slot_mask(day_mask, slot_minutes) & ~intervals_to_slot_mask(
+                day_start, intervals, slot_minutes)
+            # Inicios con `length` franjas libres consecutivas
+            starts = free
+            for shift in range(1, length):
+                starts &= free >> shift
+            rows.append(starts)
+        grid[technician_id] = rows
+    return grid
+
+
+def slot_grid_lookup(grid, date_from, scheduled_date, slot_minutes=SLOT_MINUTES):
+    """
+    Técnicos que pueden iniciar en scheduled_date según la rejilla
+
+    Returns:
+        list: IDs de técnicos, o None si la fecha queda fuera de la rejilla
+    """
+    offset = scheduled_date - datetime.combine(date_from, time.min)
+    minutes = offset.total_seconds() / 60.0
+    if minutes < 0 or minutes % slot_minutes:
+        return None
+    day, slot = divmod(int(minutes) // slot_minutes, 24 * 60 // slot_minutes)
+    result = []
+    for technician_id, rows in grid.items():
+        if day >= len(rows):
+            return None
+        if rows[day] >> slot & 1:
+            result.append(technician_id)
+    return result
+
+
+def slot_grid_soonest(grid, date_from, not_before=None, limit=10, slot_minutes=SLOT_MINUTES):
+    """Primeros inicios libres de la rejilla como lista ordenada de (datetime, technician_id)"""
+    day_start = datetime.combine(date_from, time.min)
+    slot_length = timedelta(minutes=slot_minutes)
+    options = []
+    for technician_id, rows in grid.items():
+        found = 0
+        for day, mask in enumerate(rows):
+            while mask and found < limit:
+                lowest = mask & -mask
+                start = day_start + timedelta(days=day) + slot_length * (lowest.bit_length() - 1)
+                mask ^= lowest
+                if not_before and start < not_before:
+                    continue
+                options.append((start, technician_id))
+                found += 1
+            if found >= limit:
+                break
+    options.sort()
+    return options[:limit]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from .availability import FULL_DAY_MASK, IntervalIndex, fits_in_schedule
+
+# Las órdenes más urgentes se colocan primero
+PRIORITY_RANK = {
+    'urgent': 3,
+    'high': 2,
+    'normal': 1,
+    'low': 0,
+}
+
+
+class TechnicianDay(object):
+    """
+    Contenedor (bin) de un técnico en un día para el empaquetado de órdenes.
+
+    La capacidad se mide en número de órdenes (x_inmoser_max_daily_orders) y en
+    horas de trabajo del día; las reservas se guardan en un IntervalIndex.
+    """
+
+    def __init__(self, technician_id, day, max_orders, masks, intervals=()):
+        self.technician_id = technician_id
+        self.day = day
+        self.max_orders = max_orders
+        self.masks = masks
+        self.index = IntervalIndex(intervals)
+        self.booked_hours = self.index.booked_hours
+        day_mask = FULL_DAY_MASK if masks is None else masks[day.weekday()]
+        self.capacity_hours = bin(day_mask).count('1')
+
+    @property
+    def remaining_hours(self):
+        return self.capacity_hours - self.booked_hours
+
+    def fits(self, start, duration):
+        """Verificar si la orden cabe en el día del técnico"""
+        if len(self.index) >= self.max_orders:
+            return False
+        if duration > self.remaining_hours:
+            return False
+        if not fits_in_schedule(self.masks, start, duration):
+            return False
+        return not self.index.overlaps(start, start + timedelta(hours=duration))
+
+    def add(self, start, duration):
+        self.index.add(start, start + timedelta(hours=duration))
+        self.booked_hours += duration
+
+
+def solve_dispatch(orders, technicians, bookings, scores=None):
+    """
+    Asignar órdenes a técnicos con empaquetado Best-Fit Decreasing
+
+    Las órdenes se ordenan por prioridad y duración descendentes; cada una se
+    coloca en el técnico factible mejor puntuado (especialidad, nivel, ruta) y,
+    a igual puntaje, en el que quede con menos horas libres, de modo que la
+    carga se concentra y quedan técnicos completos para urgencias.
+
+    Args:
+        orders (list): Tuplas (order_id, scheduled_date, duración_horas, prioridad)
+        technicians (list): Tuplas (technician_id, max_orders, máscaras_semanales)
+            en orden de preferencia
+        bookings (dict): {technician_id: [(inicio, fin), ...]} reservas existentes
+        scores (dict, optional): {(order_id, technician_id): puntaje} del ranking
+
+    Returns:
+        tuple: ({order_id: technician_id}, [order_id sin asignar])
+    """
+    bins = {}
+    scores = scores or {}
+    preference = {technician[0]: index for index, technician in enumerate(technicians)}
+
+    def get_bin(technician, day):
+        technician_id, max_orders, masks = technician
+        key = (technician_id, day)
+        if key not in bins:
+            intervals = [
+                interval for interval in bookings.get(technician_id, ())
+                if interval[0].date() == day
+            ]
+            bins[key] = TechnicianDay(technician_id, day, max_orders, masks, intervals)
+        return bins[key]
+
+    assignments = {}
+    unassigned = []
+    ordered = sorted(
+        orders,
+        key=lambda order: (-PRIORITY_RANK.get(order[3], 1), -order[2], order[1], order[0])
+    )
+    for order_id, start, duration, priority in ordered:
+        candidates = [
+            get_bin(technician, start.date()) for technician in technicians
+        ]
+        candidates = [candidate for candidate in candidates if candidate.fits(start, duration)]
+        if not candidates:
+            unassigned.append(order_id)
+            continue
+
+        best = min(candidates, key=lambda candidate: (
+            -round(scores.get((order_id, candidate.technician_id), 0.0), 2),
+            candidate.remaining_hours - duration,
+            len(candidate.index),
+            preference[candidate.technician_id],
+        ))
+        best.add(start, duration)
+        assignments[order_id] = best.technician_id
+
+    return assignments, unassigned
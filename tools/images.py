@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Tamaños (lado mayor, en píxeles) de las variantes de cada foto
+THUMBNAIL_SIZES = (1024, 128)
+
+# Formatos de salida admitidos y su extensión
+OUTPUT_FORMATS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+}
+
+
+def _encode(image, output_format, quality):
+    """Codificar sin metadatos: JPEG progresivo u WebP"""
+    buffer = BytesIO()
+    if output_format == 'WEBP':
+        image.save(buffer, format='WEBP', quality=quality, method=4)
+    else:
+        image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def process_photo(data, max_size=1600, output_format='JPEG', quality=80):
+    """
+    Normalizar una foto de evidencia y generar sus miniaturas
+
+    La foto se orienta según su EXIF y se vuelve a codificar sin metadatos
+    (ubicación, modelo del teléfono...), reducida al tamaño máximo. Función
+    pura para poder ejecutarse en otro proceso.
+
+    Args:
+        data (bytes): Imagen original (cualquier formato que lea Pillow)
+        max_size (int): Lado mayor máximo de la foto
+        output_format (str): 'JPEG' o 'WEBP'
+        quality (int): Calidad de compresión (1-95)
+
+    Returns:
+        dict: {0: foto, 1024: variante, 128: miniatura} en bytes
+    """
+    output_format = output_format if output_format in OUTPUT_FORMATS else 'JPEG'
+    with Image.open(BytesIO(data)) as source:
+        # draft: el decodificador JPEG reduce al leer, sin decodificar a resolución completa
+        source.draft('RGB', (max_size, max_size))
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'L'):
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            image = image.convert('RGBA')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    variants = {0: _encode(image, output_format, quality)}
+    for size in THUMBNAIL_SIZES:
+        if max(image.size) > size:
+            image.thumbnail((size, size), Image.LANCZOS)
+        variants[size] = _encode(image, output_format, quality)
+    return variants
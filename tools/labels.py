@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+from io import BytesIO
+import struct
+import zlib
+
+# Hoja A4 en puntos PDF
+A4 = (595.28, 841.89)
+MM = 72 / 25.4
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def png_to_pdf_image(png):
+    """
+    Convertir un PNG en diccionario y datos de un XObject de imagen PDF
+
+    Los datos comprimidos del PNG se copian tal cual (FlateDecode con
+    predictor PNG), sin decodificar los píxeles. Los PNG entrelazados o con
+    canal alfa se convierten antes a escala de grises.
+
+    Returns:
+        tuple: (ancho, alto, diccionario PDF en bytes, datos)
+    """
+    if png[:8] != _PNG_SIGNATURE:
+        raise ValueError('Not a PNG image')
+
+    position = 8
+    header = None
+    palette = b''
+    data = []
+    while position < len(png):
+        length, chunk_type = struct.unpack('>I4s', png[position:position + 8])
+        chunk = png[position + 8:position + 8 + length]
+        position += 12 + length
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif chunk_type == b'PLTE':
+            palette = chunk
+        elif chunk_type == b'IDAT':
+            data.append(chunk)
+        elif chunk_type == b'IEND':
+            break
+
+    width, height, depth, color_type, compression, filtering, interlace = header
+    if interlace or color_type not in (0, 2, 3):
+        return png_to_pdf_image(_flatten_png(png))
+
+    if color_type == 0:
+        colors, color_space = 1, b'/DeviceGray'
+    elif color_type == 2:
+        colors, color_space = 3, b'/DeviceRGB'
+    else:
+        colors = 1
+        color_space = b'[/Indexed /DeviceRGB %d <%s>]' % (len(palette) // 3 - 1, palette.hex().encode())
+
+    dictionary = (
+        b'/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent %d '
+        b'/Filter /FlateDecode /DecodeParms << /Predictor 15 /Colors %d /BitsPerComponent %d /Columns %d >>'
+        % (width, height, color_space, depth, colors, depth, width)
+    )
+    return width, height, dictionary, b''.join(data)
+
+
+def _flatten_png(png):
+    """PNG sin entrelazado ni alfa (escala de grises)"""
+    from PIL import Image
+    buffer = BytesIO()
+    Image.open(BytesIO(png)).convert('L').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _pdf_text(text):
+    """Cadena literal PDF (Latin-1) con los caracteres especiales escapados"""
+    text = (text or '').replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return b'(' + text.encode('latin-1', 'replace') + b')'
+
+
+class LabelSheetWriter(object):
+    """
+    Escritor en flujo de hojas PDF de etiquetas QR
+
+    Cada imagen se escribe en el archivo en cuanto se añade y cada página al
+    completarse; solo se conservan en memoria las etiquetas de la página en
+    curso y los desplazamientos de los objetos para la tabla xref.
+    """
+
+    def __init__(self, stream, columns=3, rows=8, page_size=A4, margin=10 * MM, caption_size=7):
+        self.stream = stream
+        self.columns = columns
+        self.rows = rows
+        self.page_size = page_size
+        self.margin = margin
+        self.caption_size = caption_size
+        self.cell_width = (page_size[0] - 2 * margin) / columns
+        self.cell_height = (page_size[1] - 2 * margin) / rows
+
+        self.offsets = {}
+        self.next_id = 4
+        self.page_ids = []
+        self.page_labels = []
+        self.label_count = 0
+
+        # Objetos reservados: 1 catálogo y 2 árbol de páginas (al cerrar), 3 fuente
+        self.stream.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+    def _new_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _write_object(self, object_id, body, data=None):
+        self.offsets[object_id] = self.stream.tell()
+        self.stream.write(b'%d 0 obj\n' % object_id)
+        if data is None:
+            self.stream.write(body)
+        else:
+            self.stream.write(b'<< %s /Length %d >>\nstream\n' % (body, len(data)))
+            self.stream.write(data)
+            self.stream.write(b'\nendstream')
+        self.stream.write(b'\nendobj\n')
+
+    def add_label(self, png, caption=None):
+        """Añadir una etiqueta con la imagen QR (PNG) y un texto opcional"""
+        width, height, dictionary, data = png_to_pdf_image(png)
+        image_id = self._new_id()
+        self._write_object(image_id, dictionary, data)
+        self.page_labels.append((image_id, caption))
+        self.label_count += 1
+        if len(self.page_labels) == self.columns * self.rows:
+            self._flush_page()
+
+    def _flush_page(self):
+        """Escribir la página en curso y liberar sus etiquetas"""
+        if not self.page_labels:
+            return
+        caption_height = self.caption_size + 4
+        side = min(self.cell_width, self.cell_height - caption_height) - 6
+        commands = []
+        resources = []
+        for index, (image_id, caption) in enumerate(self.page_labels):
+            column, row = index % self.columns, index // self.columns
+            x = self.margin + column * self.cell_width
+            top = self.page_size[1] - self.margin - row * self.cell_height
+            image_x = x + (self.cell_width - side) / 2
+            image_y = top - 3 - side
+            commands.append(b'q %.2f 0 0 %.2f %.2f %.2f cm /Im%d Do Q' % (side, side, image_x, image_y, image_id))
+            if caption:
+                commands.append(b'BT /F1 %d Tf %.2f %.2f Td %s Tj ET' % (
+                    self.caption_size, x + 4, image_y - caption_height + 2, _pdf_text(caption)
+                ))
+            resources.append(b'/Im%d %d 0 R' % (image_id, image_id))
+
+        content = zlib.compress(b'\n'.join(commands))
+        content_id = self._new_id()
+        self._write_object(content_id, b'/Filter /FlateDecode', content)
+
+        page_id = self._new_id()
+        self._write_object(page_id, (
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R '
+            b'/Resources << /Font << /F1 3 0 R >> /XObject << %s >> >> >>'
+        ) % (self.page_size[0], self.page_size[1], content_id, b' '.join(resources)))
+        self.page_ids.append(page_id)
+        self.page_labels = []
+
+    def close(self):
+        """Terminar el documento: última página, árbol de páginas y tabla xref"""
+        self._flush_page()
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        self._write_object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.page_ids)))
+        self._write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+        xref = self.stream.tell()
+        size = self.next_id
+        self.stream.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+        for object_id in range(1, size):
+            self.stream.write(b'%010d 00000 n \n' % self.offsets[object_id])
+        self.stream.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n' % (size, xref))
+        return self.label_count
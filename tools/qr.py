@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from io import BytesIO
+
+import qrcode
+
+
+def render_qr_png(payload, box_size=10, border=4):
+    """
+    Renderizar un código QR como PNG
+
+    Función pura (sin entorno de Odoo).
+
+    Returns:
+        bytes: Imagen PNG
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_qr_pngs(payloads, box_size=10, border=4):
+    """Imágenes PNG de un lote de textos, en el mismo orden"""
+    return [render_qr_png(payload, box_size, border) for payload in payloads]
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import math
+import re
+import unicodedata
+
+# Orden de los niveles de técnico (mayor = más experiencia)
+LEVEL_RANK = {
+    'junior': 1,
+    'senior': 2,
+    'expert': 3,
+    'specialist': 4,
+}
+
+# Pesos del puntaje de un candidato
+SKILL_WEIGHT = 3.0
+LEVEL_WEIGHT = 0.3
+URGENT_LEVEL_WEIGHT = 1.0
+LOAD_WEIGHT = 1.0
+DISTANCE_WEIGHT = 1.5
+MAX_DISTANCE_KM = 50.0
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Convertir un texto libre en un conjunto de palabras normalizadas (sin acentos)"""
+    if not text:
+        return frozenset()
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return frozenset(token for token in _TOKEN_RE.findall(text) if len(token) > 2)
+
+
+def haversine_km(origin, destination):
+    """Distancia en kilómetros entre dos puntos (latitud, longitud)"""
+    lat1, lon1 = map(math.radians, origin)
+    lat2, lon2 = map(math.radians, destination)
+    value = (math.sin((lat2 - lat1) / 2) ** 2
+             + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 6371.0 * 2 * math.asin(math.sqrt(value))
+
+
+def geo_point(latitude, longitude):
+    """Punto (latitud, longitud), o None si el registro no está geolocalizado"""
+    if not latitude and not longitude:
+        return None
+    return (latitude, longitude)
+
+
+class TechnicianRanker(object):
+    """
+    Puntaje de técnicos candidatos a partir de rasgos precalculados
+
+    Rasgos por técnico: conjunto de especialidades, nivel y puntos de ruta
+    (dirección de trabajo y clientes ya programados en el día). La carga del
+    día se pasa en cada consulta porque cambia mientras se asigna un lote.
+    """
+
+    def __init__(self, technicians, day_locations=None):
+        """
+        Args:
+            technicians (dict): {technician_id: (tokens, nivel, punto_base)}
+            day_locations (dict): {(technician_id, día): [punto, ...]}
+        """
+        self.technicians = technicians
+        self.day_locations = day_locations or {}
+
+    def add_location(self, technician_id, day, location):
+        """Registrar un nuevo cliente en la ruta del técnico para el día"""
+        if location:
+            self.day_locations.setdefault((technician_id, day), []).append(location)
+
+    def distance(self, technician_id, day, location):
+        """Distancia del cliente al punto más cercano de la ruta del técnico"""
+        if not location:
+            return None
+        tokens, level, base = self.technicians.get(technician_id, (frozenset(), 0, None))
+        points = list(self.day_locations.get((technician_id, day), ()))
+        if base:
+            points.append(base)
+        if not points:
+            return None
+        return min(haversine_km(point, location) for point in points)
+
+    def score(self, technician_id, order, load_ratio=0.0):
+        """
+        Puntaje de un técnico para una orden (mayor es mejor)
+
+        Args:
+            order (tuple): (tokens, prioridad, día, punto_cliente)
+            load_ratio (float): Órdenes del día / máximo diario del técnico
+        """
+        order_tokens, priority, day, location = order
+        tokens, level, base = self.technicians.get(technician_id, (frozenset(), 0, None))
+
+        score = 0.0
+        if order_tokens:
+            score += SKILL_WEIGHT * len(order_tokens & tokens) / len(order_tokens)
+        level_weight = URGENT_LEVEL_WEIGHT if priority in ('high', 'urgent') else LEVEL_WEIGHT
+        score += level_weight * level / len(LEVEL_RANK)
+        score -= LOAD_WEIGHT * load_ratio
+        distance = self.distance(technician_id, day, location)
+        if distance is not None:
+            score -= DISTANCE_WEIGHT * min(distance, MAX_DISTANCE_KM) / MAX_DISTANCE_KM
+        return score
+
+    def best(self, technician_ids, order, load_ratios=None):
+        """Mejor técnico de la lista (empates: orden original), o None"""
+        load_ratios = load_ratios or {}
+        best_id = None
+        best_score = None
+        for technician_id in technician_ids:
+            score = self.score(technician_id, order, load_ratios.get(technician_id, 0.0))
+            if best_score is None or score > best_score:
+                best_id, best_score = technician_id, score
+        return best_id
+
+    def score_matrix(self, orders, technician_ids):
+        """
+        Puntajes de todas las órdenes de un lote contra todos los técnicos
+
+        Args:
+            orders (dict): {order_id: (tokens, prioridad, día, punto_cliente)}
+
+        Returns:
+            dict: {(order_id, technician_id): puntaje}
+        """
+        return {
+            (order_id, technician_id): self.score(technician_id, order)
+            for order_id, order in orders.items()
+            for technician_id in technician_ids
+        }
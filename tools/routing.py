@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from .ranking import haversine_km
+
+
+def distance_matrix(points):
+    """Matriz simétrica de distancias (km) entre todos los puntos"""
+    size = len(points)
+    matrix = [[0.0] * size for index in range(size)]
+    for i in range(size):
+        row = matrix[i]
+        for j in range(i + 1, size):
+            row[j] = matrix[j][i] = haversine_km(points[i], points[j])
+    return matrix
+
+
+def nearest_neighbour(matrix, start=0):
+    """Ruta inicial visitando siempre el punto no visitado más cercano"""
+    size = len(matrix)
+    route = [start]
+    pending = set(range(size)) - {start}
+    while pending:
+        row = matrix[route[-1]]
+        closest = min(pending, key=row.__getitem__)
+        route.append(closest)
+        pending.remove(closest)
+    return route
+
+
+def two_opt(route, matrix, max_passes=50):
+    """
+    Mejorar una ruta abierta invirtiendo tramos mientras se acorte
+
+    El primer punto (origen) queda fijo; el recorrido no regresa al origen.
+    """
+    route = list(route)
+    size = len(route)
+    for iteration in range(max_passes):
+        improved = False
+        for i in range(1, size - 1):
+            a, b = route[i - 1], route[i]
+            row_a = matrix[a]
+            row_b = matrix[b]
+            for j in range(i + 1, size):
+                c = route[j]
+                d = route[j + 1] if j + 1 < size else None
+                before = row_a[b] + (matrix[c][d] if d is not None else 0.0)
+                after = row_a[c] + (row_b[d] if d is not None else 0.0)
+                if after < before - 1e-9:
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    b = route[i]
+                    row_b = matrix[b]
+                    improved = True
+        if not improved:
+            break
+    return route
+
+
+def route_length(route, matrix):
+    """Longitud total (km) de una ruta abierta"""
+    return sum(matrix[route[index]][route[index + 1]] for index in range(len(route) - 1))
+
+
+def solve_route(stops, origin=None):
+    """
+    Ordenar paradas con vecino más cercano + 2-opt
+
+    Args:
+        stops (list): Puntos (latitud, longitud) a visitar
+        origin (tuple, optional): Punto de salida del técnico
+
+    Returns:
+        list: Índices de stops en el orden de visita
+    """
+    if len(stops) < 2:
+        return list(range(len(stops)))
+
+    # Sin origen, se parte de la parada más al oeste para que el resultado sea estable
+    points = [origin or min(stops, key=lambda point: (point[1], point[0]))] + list(stops)
+    matrix = distance_matrix(points)
+    route = two_opt(nearest_neighbour(matrix, 0), matrix)
+    return [index - 1 for index in route[1:]]
@@ -3,3 +3,4 @@
 from . import service_reprogram_wizard
 from . import service_complete_wizard
 
+from . import qr_label_sheet
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.tools import split_every
+import logging
+import time as timer
+
+from ..tools.labels import LabelSheetWriter
+
+_logger = logging.getLogger(__name__)
+
+# Equipos procesados por lote: acota la memoria independientemente del total
+LABEL_BATCH_SIZE = 200
+
+
+class QRLabelSheet(models.TransientModel):
+    """
+    Hoja PDF de etiquetas QR para una selección de equipos
+    """
+    _name = 'inmoser.qr.label.sheet'
+    _description = 'QR Label Sheet'
+
+    equipment_ids = fields.Many2many(
+        'inmoser.service.equipment',
+        string='Equipment'
+    )
+
+    columns = fields.Integer(
+        string='Columns',
+        default=3
+    )
+
+    rows = fields.Integer(
+        string='Rows',
+        default=8
+    )
+
+    def _write_pdf(self, stream):
+        """
+        Escribir la hoja de etiquetas en un archivo abierto, por lotes
+
+        Los QR se toman de la caché o se renderizan en el proceso actual (sin
+        crear procesos desde la petición HTTP), y cada lote se escribe en el
+        PDF antes de leer el siguiente.
+
+        Args:
+            stream: Archivo binario de salida
+
+        Returns:
+            int: Número de etiquetas escritas
+        """
+        self.ensure_one()
+        started = timer.monotonic()
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        qr_generator = self.env['inmoser.qr.generator']
+        qr_cache = self.env['inmoser.qr.cache']
+        Equipment = self.env['inmoser.service.equipment']
+
+        writer = LabelSheetWriter(stream, columns=self.columns or 3, rows=self.rows or 8)
+        for batch_ids in split_every(LABEL_BATCH_SIZE, self.equipment_ids.ids):
+            equipments = Equipment.browse(batch_ids)
+            payloads = [qr_generator.generate_equipment_qr_url(equipment_id, base_url)
+                        for equipment_id in batch_ids]
+            images = qr_cache._get_images(payloads)
+            for equipment, payload in zip(equipments, payloads):
+                writer.add_label(images[payload], '%s - %s' % (equipment.name, equipment.partner_id.name))
+            equipments.invalidate_recordset()
+
+        count = writer.close()
+        _logger.info("QR label sheet: %s labels in %.2fs", count, timer.monotonic() - started)
+        return count
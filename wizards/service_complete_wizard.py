@@ -204,16 +204,10 @@ class ServiceCompleteWizard(models.TransientModel):
     
     def _send_completion_notification(self):
         """Enviar notificación de completación al cliente"""
-        template = self.env.ref(
+        self.env['inmoser.notification.outbox']._enqueue(
             'inmoser_service_order.email_template_service_completed',
-            raise_if_not_found=False
+            self.service_order_id
         )
-        
-        if template:
-            template.send_mail(
-                self.service_order_id.id,
-                force_send=True
-            )
     
     def _create_follow_up_activities(self):
         """Crear actividades de seguimiento"""
@@ -4,6 +4,8 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, timedelta
 
+from ..tools.availability import round_up_to_slot, slot_grid_lookup, slot_grid_soonest
+
 class ServiceReprogramWizard(models.TransientModel):
     """
     Wizard para reagendar órdenes de servicio
@@ -26,7 +28,7 @@ class ServiceReprogramWizard(models.TransientModel):
     new_date = fields.Datetime(
         string='New Scheduled Date',
         required=True,
-        default=lambda self: fields.Datetime.now() + timedelta(days=1)
+        default=lambda self: round_up_to_slot(fields.Datetime.now() + timedelta(days=1))
     )
     
     new_technician_id = fields.Many2one(
@@ -52,6 +54,18 @@ class ServiceReprogramWizard(models.TransientModel):
         readonly=True
     )
     
+    # Rejilla de huecos libres precalculada al abrir el wizard
+    slot_grid = fields.Json(
+        string='Free Slot Grid',
+        readonly=True
+    )
+    
+    soonest_slots = fields.Html(
+        string='Soonest Options',
+        compute='_compute_soonest_slots',
+        sanitize=False
+    )
+    
     notify_customer = fields.Boolean(
         string='Notify Customer',
         default=True
@@ -62,7 +76,7 @@ class ServiceReprogramWizard(models.TransientModel):
         default=True
     )
     
-    @api.depends('new_date')
+    @api.depends('new_date', 'slot_grid')
     def _compute_available_technicians(self):
         """Calcular técnicos disponibles para la nueva fecha"""
         for wizard in self:
@@ -72,20 +86,56 @@ class ServiceReprogramWizard(models.TransientModel):
             else:
                 wizard.available_technicians = [(6, 0, [])]
     
+    @api.depends('slot_grid')
+    def _compute_soonest_slots(self):
+        """Mostrar las opciones más próximas de la rejilla"""
+        for wizard in self:
+            grid, date_from = wizard._get_slot_grid()
+            if not grid:
+                wizard.soonest_slots = False
+                continue
+            
+            options = slot_grid_soonest(grid, date_from, fields.Datetime.now())
+            technicians = self.env['hr.employee'].browse([technician_id for start, technician_id in options])
+            names = dict(zip(technicians.ids, technicians.mapped('name')))
+            rows = ''.join(
+                '<tr><td>%s</td><td>%s</td></tr>' % (
+                    fields.Datetime.context_timestamp(wizard, start).strftime('%Y-%m-%d %H:%M'),
+                    names.get(technician_id, ''),
+                )
+                for start, technician_id in options
+            )
+            wizard.soonest_slots = '<table class="table table-sm"><tbody>%s</tbody></table>' % rows
+    
+    def _get_slot_grid(self):
+        """Rejilla guardada en el wizard como ({technician_id: [máscaras]}, primer día)"""
+        if not self.slot_grid:
+            return {}, None
+        grid = {int(technician_id): rows for technician_id, rows in self.slot_grid['technicians'].items()}
+        return grid, fields.Date.to_date(self.slot_grid['date_from'])
+    
     def _get_available_technicians(self, target_date):
         """Obtener técnicos disponibles para una fecha específica"""
-        technicians = self.env['hr.employee'].search([
-            ('x_inmoser_is_technician', '=', True),
-            ('active', '=', True)
-        ])
-        
-        available = self.env['hr.employee']
+        # Primero la rejilla precalculada, sin volver a la base de datos
+        grid, date_from = self._get_slot_grid()
+        if grid:
+            technician_ids = slot_grid_lookup(grid, date_from, target_date)
+            if technician_ids is not None:
+                return self.env['hr.employee'].browse(technician_ids)
         
-        for technician in technicians:
-            if self.service_order_id._is_technician_available(technician, target_date):
-                available |= technician
+        availability = self.service_order_id._get_technician_availability(target_date)
+        duration = self.service_order_id._get_estimated_duration()
         
-        return available
+        return self.env['hr.employee'].browse(availability.available_technicians(target_date, duration))
+    
+    def _is_technician_available(self, technician, target_date):
+        """Verificar un técnico contra la rejilla, o contra el motor si la fecha queda fuera"""
+        grid, date_from = self._get_slot_grid()
+        if technician.id in grid:
+            technician_ids = slot_grid_lookup(grid, date_from, target_date)
+            if technician_ids is not None:
+                return technician.id in technician_ids
+        return self.service_order_id._is_technician_available(technician, target_date)
     
     @api.onchange('new_date')
     def _onchange_new_date(self):
@@ -103,7 +153,7 @@ class ServiceReprogramWizard(models.TransientModel):
             # Si se mantiene el técnico actual, verificar disponibilidad
             if self.keep_current_technician and self.service_order_id.assigned_technician_id:
                 current_tech = self.service_order_id.assigned_technician_id
-                if not self.service_order_id._is_technician_available(current_tech, self.new_date):
+                if not self._is_technician_available(current_tech, self.new_date):
                     self.keep_current_technician = False
                     return {
                         'warning': {
@@ -218,24 +268,19 @@ class ServiceReprogramWizard(models.TransientModel):
     
     def _send_customer_notification(self):
         """Enviar notificación al cliente"""
-        template = self.env.ref(
+        # Contexto serializable para renderizar la plantilla en el cron
+        ctx = {
+            'old_date': fields.Datetime.to_string(self.current_date),
+            'new_date': fields.Datetime.to_string(self.new_date),
+            'reason': self.reason,
+            'technician': self._get_final_technician().name
+        }
+        
+        self.env['inmoser.notification.outbox']._enqueue(
             'inmoser_service_order.email_template_service_rescheduled',
-            raise_if_not_found=False
+            self.service_order_id,
+            ctx
         )
-        
-        if template:
-            # Preparar contexto para el template
-            ctx = {
-                'old_date': self.current_date,
-                'new_date': self.new_date,
-                'reason': self.reason,
-                'technician': self._get_final_technician().name
-            }
-            
-            template.with_context(ctx).send_mail(
-                self.service_order_id.id,
-                force_send=True
-            )
     
     def _send_technician_notification(self, technician):
         """Enviar notificación al técnico"""
@@ -285,6 +330,17 @@ class ServiceReprogramWizard(models.TransientModel):
                 'service_order_id': service_order_id,
                 'current_date': service_order.scheduled_date,
             })
+            
+            # Rejilla de huecos libres de los próximos días en una sola llamada
+            horizon = int(self.env['ir.config_parameter'].sudo().get_param(
+                'inmoser_service_order.reprogram_horizon_days', 7
+            ))
+            date_from = fields.Datetime.now().date()
+            grid = service_order._get_free_slot_grid(date_from, horizon)
+            res['slot_grid'] = {
+                'date_from': fields.Date.to_string(date_from),
+                'technicians': {str(technician_id): rows for technician_id, rows in grid.items()},
+            }
         
         return res
 